@@ -1,24 +1,192 @@
-from flask import Flask, request, render_template_string
-import pypdf
-import pandas as pd
+from flask import Flask, Response, abort, g, redirect, request, render_template, session, stream_template, jsonify, url_for
+from jinja2 import DictLoader
+# pandas, numpy আর pypdf ভারী, তাই যে ফাংশনে লাগে সেখানেই import হয় (load_data_stack দেখুন)
+import io
 import os
 import re
 import shutil
-import numpy as np
+import tempfile
+import threading
+import contextlib
+import hashlib
+import html
+import json
+import multiprocessing
+import sqlite3
+import time
+import uuid
+import zipfile
+import zlib
+from array import array
+from collections import deque
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
 app = Flask(__name__)
 
 # কনফিগারেশন
-UPLOAD_FOLDER = 'uploads'
-if not os.path.exists(UPLOAD_FOLDER):
-    os.makedirs(UPLOAD_FOLDER)
+# আপলোড মেমোরিতেই থাকে; এর চেয়ে বড় ফাইল রিকোয়েস্টের নিজস্ব temp ফোল্ডারে যায়
+app.config['UPLOAD_SPOOL_MAX_BYTES'] = int(os.environ.get('UPLOAD_SPOOL_MAX_BYTES', 16 * 1024 * 1024))
+# ZIP আপলোড: এক রিকোয়েস্টে সর্বোচ্চ এতগুলো PDF আর এত বাইট আনজিপ হবে, বেশি হলে 413
+app.config['ZIP_MAX_MEMBERS'] = int(os.environ.get('ZIP_MAX_MEMBERS', 500))
+app.config['ZIP_MAX_BYTES'] = int(os.environ.get('ZIP_MAX_BYTES', 512 * 1024 * 1024))
 
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+# প্রতিটি PDF আলাদা প্রসেসে পার্স হবে; 1 দিলে আগের মতো সিরিয়াল
+app.config['EXTRACT_WORKERS'] = int(os.environ.get('EXTRACT_WORKERS', os.cpu_count() or 1))
+# এর চেয়ে বেশি পেজের PDF পেজের টুকরো করে কয়েকটা প্রসেসে পার্স হয় (0 দিলে বন্ধ)।
+# benchmark.py pages: পেজ প্রতি ~3.3 ms, টুকরো করার বাড়তি খরচ 2 ওয়ার্কারে ~60 ms আর 4 ওয়ার্কারে ~100 ms,
+# তাই ~36-40 পেজের পর থেকে লাভ; 48 তার একটু উপরে রাখা
+app.config['PAGE_SPLIT_MIN_PAGES'] = int(os.environ.get('PAGE_SPLIT_MIN_PAGES', 48))
+
+# একই PDF আবার আপলোড হলে পার্স না করে ক্যাশ থেকে ফলাফল
+app.config['EXTRACT_CACHE_PATH'] = os.environ.get('EXTRACT_CACHE_PATH', os.path.join('cache', 'extract_cache.sqlite3'))
+app.config['EXTRACT_CACHE_MAX_BYTES'] = int(os.environ.get('EXTRACT_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+
+# একসাথে এতগুলো পেজের বেশি পার্স হয় না (ক্যাশে থাকা ফাইল বাদে, 0 দিলে সীমা নেই); বাকিরা লাইনে অপেক্ষা করে।
+# লাইন ভরা থাকলে বা অপেক্ষা টাইমআউট হলে সাথে সাথে 503 + Retry-After, তাই আপলোড ফর্মের মতো হালকা রিকোয়েস্ট আটকায় না।
+# হিসাব প্রতি ওয়ার্কারে: একসাথে সর্বোচ্চ REQUEST_THREADS - 1 টা আপলোড চলে, অন্তত একটা থ্রেড হালকা রিকোয়েস্টের জন্য খালি থাকে
+app.config['REQUEST_THREADS'] = int(os.environ.get('GUNICORN_THREADS', 4))
+app.config['EXTRACT_MAX_PAGES'] = int(os.environ.get('EXTRACT_MAX_PAGES', 400))
+app.config['EXTRACT_QUEUE_SIZE'] = int(os.environ.get('EXTRACT_QUEUE_SIZE', max(0, app.config['REQUEST_THREADS'] - 2)))
+app.config['EXTRACT_QUEUE_TIMEOUT'] = float(os.environ.get('EXTRACT_QUEUE_TIMEOUT', 30))
+app.config['RETRY_AFTER_SECONDS'] = int(os.environ.get('RETRY_AFTER_SECONDS', 10))
+
+# পার্স হওয়া PO গুলো এখানে জমা থাকে, পরে আবার আপলোড ছাড়াই কোয়েরি করা যায় (খালি রাখলে বন্ধ)
+app.config['PO_STORE_PATH'] = os.environ.get('PO_STORE_PATH', os.path.join('data', 'po_store.sqlite3'))
+
+# টেক্সট এক্সট্র্যাকশন ব্যাকএন্ড: pypdf, pdfplumber বা auto (রিকোয়েস্টে URL এর ?backend=... বা X-PO-Backend হেডার দিয়েও বদলানো যায়)
+app.config['EXTRACT_BACKEND'] = os.environ.get('EXTRACT_BACKEND', 'pypdf')
+
+# বড় ব্যাচ ব্যাকগ্রাউন্ড জবে চলে; জবের অবস্থা সব ওয়ার্কারের শেয়ার করা SQLite এ, শেষ হওয়া জব এতক্ষণ থাকে
+app.config['JOB_RUNNERS'] = int(os.environ.get('JOB_RUNNERS', 2))
+app.config['JOB_STORE_PATH'] = os.environ.get('JOB_STORE_PATH', os.path.join('cache', 'jobs.sqlite3'))
+app.config['JOB_TTL_SECONDS'] = int(os.environ.get('JOB_TTL_SECONDS', 3600))
+# চলতে থাকা জব এতক্ষণ পরপর স্টোরে জানান দেয়; এতক্ষণ কোনো খবর না থাকলে ধরা হয় ওয়ার্কারটা মারা গেছে, জব failed
+app.config['JOB_HEARTBEAT_SECONDS'] = float(os.environ.get('JOB_HEARTBEAT_SECONDS', 10))
+app.config['JOB_STALE_SECONDS'] = float(os.environ.get('JOB_STALE_SECONDS', 60))
+
+# ব্যাচের id সেশন কুকিতে থাকে, তাই সব ওয়ার্কারে একই SECRET_KEY লাগবে; না দিলে শুধু ব্যাচ রুটগুলো 503 দেয়
+app.secret_key = os.environ.get('SECRET_KEY')
+# ব্যাচ সব ওয়ার্কারের শেয়ার করা SQLite এ থাকে; এতক্ষণ ব্যবহার না হলে বাদ
+app.config['BATCH_STORE_PATH'] = os.environ.get('BATCH_STORE_PATH', os.path.join('cache', 'batches.sqlite3'))
+app.config['BATCH_TTL_SECONDS'] = int(os.environ.get('BATCH_TTL_SECONDS', 3600))
+
+# রেজাল্ট পেজ স্ট্রিম করে পাঠানো হবে কিনা (রিকোয়েস্টে stream=1 দিলেও হয়)
+app.config['STREAM_RESULTS'] = os.environ.get('STREAM_RESULTS', '0') == '1'
+
+# স্টেজভিত্তিক টাইমিং ও /metrics; বন্ধ থাকলে টাইমারগুলো কিছুই করে না।
+# কাউন্টার প্রতিটি ওয়ার্কার প্রসেসের নিজের: gunicorn -w N এ প্রতিটি scrape যে ওয়ার্কারে যায় শুধু তার হিসাব দেখায়
+app.config['METRICS_ENABLED'] = os.environ.get('METRICS_ENABLED', '1') == '1'
+app.config['TIMING_FOOTER'] = os.environ.get('TIMING_FOOTER', '0') == '1'
+
+# এক্সপোর্ট এতগুলো রো করে টুকরো টুকরো স্ট্রিম হয়
+app.config['EXPORT_CHUNK_ROWS'] = int(os.environ.get('EXPORT_CHUNK_ROWS', 5000))
+
+# HTML/CSS/CSV/JSON রেসপন্স gzip বা (brotli ইনস্টল থাকলে) br করে পাঠানো হয়; এর চেয়ে ছোট হলে যেমন আছে তেমন
+app.config['COMPRESS_RESPONSES'] = os.environ.get('COMPRESS_RESPONSES', '1') == '1'
+app.config['COMPRESS_MIN_BYTES'] = int(os.environ.get('COMPRESS_MIN_BYTES', 1024))
+app.config['COMPRESS_GZIP_LEVEL'] = int(os.environ.get('COMPRESS_GZIP_LEVEL', 6))
+app.config['COMPRESS_BROTLI_QUALITY'] = int(os.environ.get('COMPRESS_BROTLI_QUALITY', 5))
+
+# পার্সারের আউটপুট বদলালে এটা বাড়াতে হবে, পুরনো ক্যাশ আর মিলবে না
+PARSER_VERSION = 3
 
 # ==========================================
 #  HTML & CSS TEMPLATES
 # ==========================================
 
+INDEX_CSS = """
+* { font-family: 'Inter', sans-serif; }
+body { 
+    background: linear-gradient(135deg, #0f172a 0%, #1e293b 100%);
+    min-height: 100vh;
+    display: flex;
+    align-items: center;
+    justify-content: center;
+}
+.main-card { 
+    border: none; 
+    border-radius: 16px; 
+    box-shadow: 0 25px 50px rgba(0,0,0,0.4);
+    background: #ffffff;
+    overflow: hidden;
+    max-width: 480px;
+    width: 100%;
+}
+.card-header { 
+    background: linear-gradient(135deg, #1e293b 0%, #334155 100%);
+    color: white; 
+    padding: 35px 40px;
+    text-align: center;
+}
+.card-header h2 { 
+    font-weight: 700; 
+    font-size: 1.5rem;
+    margin-bottom: 6px;
+    letter-spacing: -0.5px;
+}
+.card-header p {
+    opacity: 0.7;
+    font-weight: 400;
+    font-size: 0.9rem;
+    margin: 0;
+}
+.btn-upload { 
+    background: linear-gradient(135deg, #3b82f6 0%, #1d4ed8 100%);
+    border: none; 
+    padding: 14px 40px; 
+    font-weight: 600; 
+    font-size: 1rem;
+    border-radius: 8px;
+    transition: all 0.3s ease;
+    box-shadow: 0 4px 15px rgba(59, 130, 246, 0.4);
+}
+.btn-upload:hover { 
+    transform: translateY(-2px);
+    box-shadow: 0 8px 25px rgba(59, 130, 246, 0.5);
+}
+.file-input-wrapper { 
+    border: 2px dashed #d1d5db; 
+    border-radius: 12px; 
+    padding: 40px 30px; 
+    background: #f9fafb;
+    transition: all 0.3s ease;
+}
+.file-input-wrapper:hover { 
+    border-color: #3b82f6; 
+    background: #eff6ff;
+}
+.file-input-wrapper h5 {
+    font-weight: 600;
+    color: #1e293b;
+    font-size: 1.1rem;
+    margin-bottom: 8px;
+}
+.file-input-wrapper p {
+    color: #64748b;
+    font-size: 0.85rem;
+}
+.form-control {
+    border: 2px solid #e2e8f0;
+    border-radius: 8px;
+    padding: 12px 16px;
+    font-size: 0.95rem;
+}
+.form-control:focus {
+    border-color: #3b82f6;
+    box-shadow: 0 0 0 3px rgba(59, 130, 246, 0.1);
+}
+.footer-credit { 
+    margin-top: 25px; 
+    font-size: 0.8rem; 
+    color: #94a3b8;
+}
+.footer-credit strong {
+    color: #3b82f6;
+}
+"""
+
 INDEX_HTML = """
 <!DOCTYPE html>
 <html lang="en">
@@ -28,96 +196,7 @@ INDEX_HTML = """
     <title>PO Report Generator</title>
     <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
     <link href="https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700;800&display=swap" rel="stylesheet">
-    <style>
-        * { font-family: 'Inter', sans-serif; }
-        body { 
-            background: linear-gradient(135deg, #0f172a 0%, #1e293b 100%);
-            min-height: 100vh;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-        }
-        .main-card { 
-            border: none; 
-            border-radius: 16px; 
-            box-shadow: 0 25px 50px rgba(0,0,0,0.4);
-            background: #ffffff;
-            overflow: hidden;
-            max-width: 480px;
-            width: 100%;
-        }
-        .card-header { 
-            background: linear-gradient(135deg, #1e293b 0%, #334155 100%);
-            color: white; 
-            padding: 35px 40px;
-            text-align: center;
-        }
-        .card-header h2 { 
-            font-weight: 700; 
-            font-size: 1.5rem;
-            margin-bottom: 6px;
-            letter-spacing: -0.5px;
-        }
-        .card-header p {
-            opacity: 0.7;
-            font-weight: 400;
-            font-size: 0.9rem;
-            margin: 0;
-        }
-        .btn-upload { 
-            background: linear-gradient(135deg, #3b82f6 0%, #1d4ed8 100%);
-            border: none; 
-            padding: 14px 40px; 
-            font-weight: 600; 
-            font-size: 1rem;
-            border-radius: 8px;
-            transition: all 0.3s ease;
-            box-shadow: 0 4px 15px rgba(59, 130, 246, 0.4);
-        }
-        .btn-upload:hover { 
-            transform: translateY(-2px);
-            box-shadow: 0 8px 25px rgba(59, 130, 246, 0.5);
-        }
-        .file-input-wrapper { 
-            border: 2px dashed #d1d5db; 
-            border-radius: 12px; 
-            padding: 40px 30px; 
-            background: #f9fafb;
-            transition: all 0.3s ease;
-        }
-        .file-input-wrapper:hover { 
-            border-color: #3b82f6; 
-            background: #eff6ff;
-        }
-        .file-input-wrapper h5 {
-            font-weight: 600;
-            color: #1e293b;
-            font-size: 1.1rem;
-            margin-bottom: 8px;
-        }
-        .file-input-wrapper p {
-            color: #64748b;
-            font-size: 0.85rem;
-        }
-        .form-control {
-            border: 2px solid #e2e8f0;
-            border-radius: 8px;
-            padding: 12px 16px;
-            font-size: 0.95rem;
-        }
-        .form-control:focus {
-            border-color: #3b82f6;
-            box-shadow: 0 0 0 3px rgba(59, 130, 246, 0.1);
-        }
-        .footer-credit { 
-            margin-top: 25px; 
-            font-size: 0.8rem; 
-            color: #94a3b8;
-        }
-        .footer-credit strong {
-            color: #3b82f6;
-        }
-    </style>
+    <link href="{{ asset_url('index.css') }}" rel="stylesheet">
 </head>
 <body>
     <div class="container py-4">
@@ -132,13 +211,16 @@ INDEX_HTML = """
                         <form action="/" method="post" enctype="multipart/form-data">
                             <div class="file-input-wrapper mb-4 text-center">
                                 <h5>Upload PDF Files</h5>
-                                <p class="mb-3">Select Booking & PO files together</p>
-                                <input class="form-control" type="file" name="pdf_files" multiple accept=".pdf" required>
+                                <p class="mb-3">Select Booking & PO files together, or a ZIP of them</p>
+                                <input class="form-control" type="file" name="pdf_files" multiple accept=".pdf,.zip" required>
                             </div>
                             <button type="submit" class="btn btn-primary btn-upload w-100">
                                 Generate Report
                             </button>
                         </form>
+                        <div class="text-center mt-3">
+                            <a href="/batch" class="small">Or build the report file by file</a>
+                        </div>
                         <div class="footer-credit text-center">
                             Developed by <strong>Mehedi Hasan</strong>
                         </div>
@@ -151,6 +233,509 @@ INDEX_HTML = """
 </html>
 """
 
+RESULT_CSS = """
+:root {
+    --primary: #1e40af;
+    --primary-light: #3b82f6;
+    --dark: #0f172a;
+    --dark-light: #1e293b;
+    --gray-50: #f8fafc;
+    --gray-100: #f1f5f9;
+    --gray-200: #e2e8f0;
+    --gray-300: #cbd5e1;
+    --gray-600: #475569;
+    --gray-800: #1e293b;
+    --success: #059669;
+    --success-light: #d1fae5;
+    --warning: #d97706;
+    --warning-light: #fef3c7;
+}
+
+* { font-family: 'Inter', sans-serif; }
+
+body { 
+    background: var(--gray-100);
+    min-height: 100vh;
+    padding: 30px 0; 
+}
+
+.container { max-width: 1200px; }
+
+/* ===== HEADER ===== */
+.company-header { 
+    background: white;
+    border-radius: 12px;
+    padding: 24px 32px;
+    margin-bottom: 20px;
+    box-shadow: 0 1px 3px rgba(0,0,0,0.1);
+    border-left: 4px solid var(--primary);
+}
+
+.header-content {
+    display: flex;
+    justify-content: space-between;
+    align-items: center;
+}
+
+.company-name { 
+    font-size: 1.5rem; 
+    font-weight: 800; 
+    color: var(--dark);
+    letter-spacing: -0.5px;
+    margin-bottom: 4px;
+}
+
+.report-title { 
+    font-size: 0.85rem; 
+    color: var(--gray-600);
+    font-weight: 500;
+    text-transform: uppercase;
+    letter-spacing: 1px;
+}
+
+.date-box {
+    text-align: right;
+}
+
+.date-label {
+    font-size: 0.7rem;
+    color: var(--gray-600);
+    text-transform: uppercase;
+    letter-spacing: 1px;
+    font-weight: 600;
+}
+
+.date-value {
+    font-size: 1.1rem;
+    font-weight: 700;
+    color: var(--dark);
+}
+
+/* ===== INFO SECTION ===== */
+.info-section {
+    display: grid;
+    grid-template-columns: 1fr 220px;
+    gap: 20px;
+    margin-bottom: 20px;
+}
+
+.info-grid { 
+    background: white;
+    border-radius: 12px;
+    padding: 24px;
+    box-shadow: 0 1px 3px rgba(0,0,0,0.1);
+    display: grid;
+    grid-template-columns: repeat(3, 1fr);
+    gap: 20px;
+}
+
+.info-item {
+    padding: 12px 16px;
+    background: var(--gray-50);
+    border-radius: 8px;
+    border-left: 3px solid var(--primary-light);
+}
+
+/* Booking Item Highlight */
+.info-item.booking-highlight {
+    background: linear-gradient(135deg, #fef3c7 0%, #fde68a 100%);
+    border-left: 4px solid #f59e0b;
+    box-shadow: 0 2px 8px rgba(245, 158, 11, 0.25);
+}
+
+.info-item.booking-highlight .info-value {
+    color: #92400e;
+    font-size: 1.05rem;
+}
+
+.info-label { 
+    font-size: 0.65rem;
+    font-weight: 700;
+    color: var(--gray-600);
+    text-transform: uppercase;
+    letter-spacing: 1px;
+    margin-bottom: 4px;
+}
+
+.info-value { 
+    font-size: 0.95rem;
+    font-weight: 700;
+    color: var(--dark);
+}
+
+.grand-total-box { 
+    background: linear-gradient(135deg, var(--dark) 0%, var(--dark-light) 100%);
+    color: white; 
+    padding: 24px;
+    border-radius: 12px;
+    text-align: center;
+    display: flex;
+    flex-direction: column;
+    justify-content: center;
+    box-shadow: 0 4px 15px rgba(0,0,0,0.2);
+}
+
+.grand-total-label { 
+    font-size: 0.7rem;
+    text-transform: uppercase;
+    letter-spacing: 2px;
+    font-weight: 600;
+    opacity: 0.8;
+    margin-bottom: 8px;
+}
+
+.grand-total-value { 
+    font-size: 2.2rem;
+    font-weight: 800;
+    line-height: 1;
+}
+
+.grand-total-unit {
+    font-size: 0.75rem;
+    opacity: 0.7;
+    margin-top: 6px;
+    font-weight: 500;
+}
+
+/* ===== TABLE ===== */
+.table-card { 
+    background: white;
+    border-radius: 12px;
+    margin-bottom: 20px;
+    overflow: hidden;
+    box-shadow: 0 1px 3px rgba(0,0,0,0.1);
+}
+
+.color-header { 
+    background: var(--dark);
+    color: white;
+    padding: 14px 20px;
+    font-size: 0.9rem;
+    font-weight: 700;
+    text-transform: uppercase;
+    letter-spacing: 1px;
+}
+
+.table { 
+    margin-bottom: 0; 
+    width: 100%;
+}
+
+.table th { 
+    background: var(--gray-100);
+    color: var(--gray-800);
+    font-weight: 700;
+    font-size: 0.75rem;
+    text-align: center;
+    padding: 12px 10px;
+    border-bottom: 2px solid var(--gray-200);
+    text-transform: uppercase;
+    letter-spacing: 0.5px;
+}
+
+.table td { 
+    text-align: center;
+    vertical-align: middle;
+    padding: 12px 10px;
+    color: var(--dark);
+    font-weight: 600;
+    font-size: 0.9rem;
+    border-bottom: 1px solid var(--gray-200);
+}
+
+.table tbody tr:hover td {
+    background: var(--gray-50);
+}
+
+.order-col { 
+    font-weight: 800 !important;
+    background: var(--gray-50) !important;
+    color: var(--primary) !important;
+    border-right: 2px solid var(--gray-200) !important;
+}
+
+.total-col { 
+    font-weight: 800 !important;
+    background: var(--success-light) !important;
+    color: var(--success) !important;
+    border-left: 2px solid #a7f3d0 !important;
+}
+
+.total-col-header { 
+    background: var(--success-light) !important;
+    color: var(--success) !important;
+    font-weight: 800 !important;
+    border-left: 2px solid #a7f3d0 !important;
+}
+
+/* ===== SUMMARY ROWS ===== */
+.table tbody tr.summary-row td { 
+    background: linear-gradient(135deg, #fef3c7 0%, #fde68a 100%) !important;
+    color: #92400e !important;
+    font-weight: 800 !important;
+    font-size: 1.0rem !important;
+    border-top: 3px solid #f59e0b !important;
+    border-bottom: 1px solid #fbbf24 !important;
+    padding: 14px 10px !important;
+}
+
+.table tbody tr.summary-row:last-child td {
+    background: linear-gradient(135deg, #dbeafe 0%, #bfdbfe 100%) !important;
+    color: #1e40af !important;
+    font-weight: 800 !important;
+    font-size: 1.0rem !important;
+    border-top: 3px solid #3b82f6 !important;
+    border-bottom: none !important;
+}
+
+.summary-label { 
+    text-align: right !important;
+    padding-right: 20px !important;
+    font-size: 0.85rem !important;
+    text-transform: uppercase;
+    letter-spacing: 1px;
+    font-weight: 800 !important;
+}
+
+/* ===== ACTION BAR ===== */
+.action-bar { 
+    margin-bottom: 20px;
+    display: flex;
+    justify-content: space-between;
+    align-items: center;
+}
+
+.btn-back {
+    background: white;
+    color: var(--dark);
+    border: 2px solid var(--gray-200);
+    border-radius: 8px;
+    padding: 10px 24px;
+    font-weight: 600;
+    font-size: 0.9rem;
+    transition: all 0.2s ease;
+    text-decoration: none;
+}
+
+.btn-back:hover {
+    border-color: var(--primary-light);
+    color: var(--primary);
+}
+
+.btn-print { 
+    background: var(--primary);
+    color: white;
+    border: none;
+    border-radius: 8px;
+    padding: 12px 28px;
+    font-weight: 600;
+    font-size: 0.9rem;
+    transition: all 0.2s ease;
+    box-shadow: 0 2px 8px rgba(30, 64, 175, 0.3);
+}
+
+.btn-print:hover {
+    background: var(--primary-light);
+    transform: translateY(-1px);
+    box-shadow: 0 4px 12px rgba(30, 64, 175, 0.4);
+}
+
+/* ===== FOOTER ===== */
+.footer-credit { 
+    text-align: center;
+    margin-top: 30px;
+    padding: 16px;
+    background: white;
+    border-radius: 8px;
+    box-shadow: 0 1px 3px rgba(0,0,0,0.1);
+    font-size: 0.85rem;
+    color: var(--gray-600);
+}
+
+.footer-credit strong {
+    color: var(--primary);
+}
+
+/* ===== BATCH ===== */
+.batch-panel {
+    background: white;
+    border-radius: 12px;
+    padding: 20px 24px;
+    margin-bottom: 20px;
+    box-shadow: 0 1px 3px rgba(0,0,0,0.1);
+}
+
+.batch-title {
+    font-size: 0.75rem;
+    font-weight: 700;
+    color: var(--gray-600);
+    text-transform: uppercase;
+    letter-spacing: 1px;
+    margin-bottom: 12px;
+}
+
+.batch-file {
+    display: flex;
+    justify-content: space-between;
+    align-items: center;
+    padding: 6px 0;
+    border-bottom: 1px solid var(--gray-200);
+    font-size: 0.9rem;
+}
+
+.batch-file form { margin: 0; }
+
+.batch-actions {
+    display: flex;
+    gap: 10px;
+    margin-top: 14px;
+}
+
+.timing-footer {
+    margin-top: 10px;
+    padding: 10px 16px;
+    font-family: monospace;
+    font-size: 0.75rem;
+    color: var(--gray-600);
+}
+
+.timing-footer span {
+    margin-right: 16px;
+}
+
+/* ===== PRINT ===== */
+@media print {
+    @page { 
+        margin: 10mm;
+        size: portrait;
+    }
+
+    body { 
+        background: white !important;
+        padding: 0 !important;
+        -webkit-print-color-adjust: exact !important;
+        print-color-adjust: exact !important;
+    }
+
+    .container { 
+        max-width: 100% !important;
+        padding: 0 !important;
+    }
+
+    .no-print { display: none !important; }
+
+    .company-header {
+        border-radius: 0 !important;
+        box-shadow: none !important;
+        border: 1px solid #000 !important;
+        border-left: 4px solid #000 !important;
+        margin-bottom: 10px !important;
+        padding: 15px 20px !important;
+    }
+
+    .company-name {
+        font-size: 1.3rem !important;
+    }
+
+    .info-section {
+        margin-bottom: 10px !important;
+    }
+
+    .info-grid {
+        border-radius: 0 !important;
+        box-shadow: none !important;
+        border: 1px solid #000 !important;
+        padding: 15px !important;
+    }
+
+    .info-item {
+        border-left: 3px solid #000 !important;
+    }
+
+    .info-item.booking-highlight {
+        background: #fff8dc !important;
+        border-left: 4px solid #000 !important;
+    }
+
+    .grand-total-box {
+        border-radius: 0 !important;
+        box-shadow: none !important;
+        border: 2px solid #000 !important;
+        background: #f0f0f0 !important;
+        color: #000 !important;
+    }
+
+    .grand-total-box * {
+        color: #000 !important;
+    }
+
+    .table-card {
+        border-radius: 0 !important;
+        box-shadow: none !important;
+        border: 1px solid #000 !important;
+        margin-bottom: 10px !important;
+        break-inside: avoid;
+    }
+
+    .color-header {
+        background: #e0e0e0 !important;
+        color: #000 !important;
+        padding: 10px 15px !important;
+        font-size: 11pt !important;
+    }
+
+    .table th {
+        background: #f5f5f5 !important;
+        color: #000 !important;
+        font-size: 9pt !important;
+        padding: 8px 6px !important;
+        border: 1px solid #000 !important;
+    }
+
+    .table td {
+        font-size: 10pt !important;
+        padding: 8px 6px !important;
+        border: 1px solid #000 !important;
+    }
+
+    .order-col {
+        background: #f8f8f8 !important;
+        color: #000 !important;
+    }
+
+    .total-col,
+    .total-col-header {
+        background: #e8f5e9 !important;
+        color: #000 !important;
+    }
+
+    .summary-row td {
+        font-size: 10.5pt !important;
+        font-weight: 800 !important;
+        border-top: 2px solid #000 !important;
+    }
+
+    .summary-row:first-of-type td {
+        background: #fff8e1 !important;
+        color: #000 !important;
+    }
+
+    .summary-row:last-of-type td {
+        background: #e3f2fd !important;
+        color: #000 !important;
+    }
+
+    .footer-credit {
+        border-radius: 0 !important;
+        box-shadow: none !important;
+        border-top: 1px solid #000 !important;
+        margin-top: 15px !important;
+        padding: 10px !important;
+        background: transparent !important;
+    }
+}
+"""
+
 RESULT_HTML = """
 <!DOCTYPE html>
 <html lang="en">
@@ -160,461 +745,7 @@ RESULT_HTML = """
     <title>PO Report - Cotton Clothing BD</title>
     <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
     <link href="https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700;800;900&display=swap" rel="stylesheet">
-    <style>
-        :root {
-            --primary: #1e40af;
-            --primary-light: #3b82f6;
-            --dark: #0f172a;
-            --dark-light: #1e293b;
-            --gray-50: #f8fafc;
-            --gray-100: #f1f5f9;
-            --gray-200: #e2e8f0;
-            --gray-300: #cbd5e1;
-            --gray-600: #475569;
-            --gray-800: #1e293b;
-            --success: #059669;
-            --success-light: #d1fae5;
-            --warning: #d97706;
-            --warning-light: #fef3c7;
-        }
-        
-        * { font-family: 'Inter', sans-serif; }
-        
-        body { 
-            background: var(--gray-100);
-            min-height: 100vh;
-            padding: 30px 0; 
-        }
-        
-        .container { max-width: 1200px; }
-        
-        /* ===== HEADER ===== */
-        .company-header { 
-            background: white;
-            border-radius: 12px;
-            padding: 24px 32px;
-            margin-bottom: 20px;
-            box-shadow: 0 1px 3px rgba(0,0,0,0.1);
-            border-left: 4px solid var(--primary);
-        }
-        
-        .header-content {
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-        }
-        
-        .company-name { 
-            font-size: 1.5rem; 
-            font-weight: 800; 
-            color: var(--dark);
-            letter-spacing: -0.5px;
-            margin-bottom: 4px;
-        }
-        
-        .report-title { 
-            font-size: 0.85rem; 
-            color: var(--gray-600);
-            font-weight: 500;
-            text-transform: uppercase;
-            letter-spacing: 1px;
-        }
-        
-        .date-box {
-            text-align: right;
-        }
-        
-        .date-label {
-            font-size: 0.7rem;
-            color: var(--gray-600);
-            text-transform: uppercase;
-            letter-spacing: 1px;
-            font-weight: 600;
-        }
-        
-        .date-value {
-            font-size: 1.1rem;
-            font-weight: 700;
-            color: var(--dark);
-        }
-        
-        /* ===== INFO SECTION ===== */
-        .info-section {
-            display: grid;
-            grid-template-columns: 1fr 220px;
-            gap: 20px;
-            margin-bottom: 20px;
-        }
-        
-        .info-grid { 
-            background: white;
-            border-radius: 12px;
-            padding: 24px;
-            box-shadow: 0 1px 3px rgba(0,0,0,0.1);
-            display: grid;
-            grid-template-columns: repeat(3, 1fr);
-            gap: 20px;
-        }
-        
-        .info-item {
-            padding: 12px 16px;
-            background: var(--gray-50);
-            border-radius: 8px;
-            border-left: 3px solid var(--primary-light);
-        }
-        
-        /* Booking Item Highlight */
-        .info-item.booking-highlight {
-            background: linear-gradient(135deg, #fef3c7 0%, #fde68a 100%);
-            border-left: 4px solid #f59e0b;
-            box-shadow: 0 2px 8px rgba(245, 158, 11, 0.25);
-        }
-        
-        .info-item.booking-highlight .info-value {
-            color: #92400e;
-            font-size: 1.05rem;
-        }
-        
-        .info-label { 
-            font-size: 0.65rem;
-            font-weight: 700;
-            color: var(--gray-600);
-            text-transform: uppercase;
-            letter-spacing: 1px;
-            margin-bottom: 4px;
-        }
-        
-        .info-value { 
-            font-size: 0.95rem;
-            font-weight: 700;
-            color: var(--dark);
-        }
-
-        .grand-total-box { 
-            background: linear-gradient(135deg, var(--dark) 0%, var(--dark-light) 100%);
-            color: white; 
-            padding: 24px;
-            border-radius: 12px;
-            text-align: center;
-            display: flex;
-            flex-direction: column;
-            justify-content: center;
-            box-shadow: 0 4px 15px rgba(0,0,0,0.2);
-        }
-        
-        .grand-total-label { 
-            font-size: 0.7rem;
-            text-transform: uppercase;
-            letter-spacing: 2px;
-            font-weight: 600;
-            opacity: 0.8;
-            margin-bottom: 8px;
-        }
-        
-        .grand-total-value { 
-            font-size: 2.2rem;
-            font-weight: 800;
-            line-height: 1;
-        }
-        
-        .grand-total-unit {
-            font-size: 0.75rem;
-            opacity: 0.7;
-            margin-top: 6px;
-            font-weight: 500;
-        }
-
-        /* ===== TABLE ===== */
-        .table-card { 
-            background: white;
-            border-radius: 12px;
-            margin-bottom: 20px;
-            overflow: hidden;
-            box-shadow: 0 1px 3px rgba(0,0,0,0.1);
-        }
-        
-        .color-header { 
-            background: var(--dark);
-            color: white;
-            padding: 14px 20px;
-            font-size: 0.9rem;
-            font-weight: 700;
-            text-transform: uppercase;
-            letter-spacing: 1px;
-        }
-
-        .table { 
-            margin-bottom: 0; 
-            width: 100%;
-        }
-        
-        .table th { 
-            background: var(--gray-100);
-            color: var(--gray-800);
-            font-weight: 700;
-            font-size: 0.75rem;
-            text-align: center;
-            padding: 12px 10px;
-            border-bottom: 2px solid var(--gray-200);
-            text-transform: uppercase;
-            letter-spacing: 0.5px;
-        }
-        
-        .table td { 
-            text-align: center;
-            vertical-align: middle;
-            padding: 12px 10px;
-            color: var(--dark);
-            font-weight: 600;
-            font-size: 0.9rem;
-            border-bottom: 1px solid var(--gray-200);
-        }
-        
-        .table tbody tr:hover td {
-            background: var(--gray-50);
-        }
-        
-        .order-col { 
-            font-weight: 800 !important;
-            background: var(--gray-50) !important;
-            color: var(--primary) !important;
-            border-right: 2px solid var(--gray-200) !important;
-        }
-        
-        .total-col { 
-            font-weight: 800 !important;
-            background: var(--success-light) !important;
-            color: var(--success) !important;
-            border-left: 2px solid #a7f3d0 !important;
-        }
-        
-        .total-col-header { 
-            background: var(--success-light) !important;
-            color: var(--success) !important;
-            font-weight: 800 !important;
-            border-left: 2px solid #a7f3d0 !important;
-        }
-
-        /* ===== SUMMARY ROWS ===== */
-        .table tbody tr.summary-row td { 
-            background: linear-gradient(135deg, #fef3c7 0%, #fde68a 100%) !important;
-            color: #92400e !important;
-            font-weight: 800 !important;
-            font-size: 1.0rem !important;
-            border-top: 3px solid #f59e0b !important;
-            border-bottom: 1px solid #fbbf24 !important;
-            padding: 14px 10px !important;
-        }
-        
-        .table tbody tr.summary-row:last-child td {
-            background: linear-gradient(135deg, #dbeafe 0%, #bfdbfe 100%) !important;
-            color: #1e40af !important;
-            font-weight: 800 !important;
-            font-size: 1.0rem !important;
-            border-top: 3px solid #3b82f6 !important;
-            border-bottom: none !important;
-        }
-        
-        .summary-label { 
-            text-align: right !important;
-            padding-right: 20px !important;
-            font-size: 0.85rem !important;
-            text-transform: uppercase;
-            letter-spacing: 1px;
-            font-weight: 800 !important;
-        }
-
-        /* ===== ACTION BAR ===== */
-        .action-bar { 
-            margin-bottom: 20px;
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-        }
-        
-        .btn-back {
-            background: white;
-            color: var(--dark);
-            border: 2px solid var(--gray-200);
-            border-radius: 8px;
-            padding: 10px 24px;
-            font-weight: 600;
-            font-size: 0.9rem;
-            transition: all 0.2s ease;
-            text-decoration: none;
-        }
-        
-        .btn-back:hover {
-            border-color: var(--primary-light);
-            color: var(--primary);
-        }
-        
-        .btn-print { 
-            background: var(--primary);
-            color: white;
-            border: none;
-            border-radius: 8px;
-            padding: 12px 28px;
-            font-weight: 600;
-            font-size: 0.9rem;
-            transition: all 0.2s ease;
-            box-shadow: 0 2px 8px rgba(30, 64, 175, 0.3);
-        }
-        
-        .btn-print:hover {
-            background: var(--primary-light);
-            transform: translateY(-1px);
-            box-shadow: 0 4px 12px rgba(30, 64, 175, 0.4);
-        }
-        
-        /* ===== FOOTER ===== */
-        .footer-credit { 
-            text-align: center;
-            margin-top: 30px;
-            padding: 16px;
-            background: white;
-            border-radius: 8px;
-            box-shadow: 0 1px 3px rgba(0,0,0,0.1);
-            font-size: 0.85rem;
-            color: var(--gray-600);
-        }
-        
-        .footer-credit strong {
-            color: var(--primary);
-        }
-
-        /* ===== PRINT ===== */
-        @media print {
-            @page { 
-                margin: 10mm;
-                size: portrait;
-            }
-            
-            body { 
-                background: white !important;
-                padding: 0 !important;
-                -webkit-print-color-adjust: exact !important;
-                print-color-adjust: exact !important;
-            }
-            
-            .container { 
-                max-width: 100% !important;
-                padding: 0 !important;
-            }
-            
-            .no-print { display: none !important; }
-            
-            .company-header {
-                border-radius: 0 !important;
-                box-shadow: none !important;
-                border: 1px solid #000 !important;
-                border-left: 4px solid #000 !important;
-                margin-bottom: 10px !important;
-                padding: 15px 20px !important;
-            }
-            
-            .company-name {
-                font-size: 1.3rem !important;
-            }
-            
-            .info-section {
-                margin-bottom: 10px !important;
-            }
-            
-            .info-grid {
-                border-radius: 0 !important;
-                box-shadow: none !important;
-                border: 1px solid #000 !important;
-                padding: 15px !important;
-            }
-            
-            .info-item {
-                border-left: 3px solid #000 !important;
-            }
-            
-            .info-item.booking-highlight {
-                background: #fff8dc !important;
-                border-left: 4px solid #000 !important;
-            }
-            
-            .grand-total-box {
-                border-radius: 0 !important;
-                box-shadow: none !important;
-                border: 2px solid #000 !important;
-                background: #f0f0f0 !important;
-                color: #000 !important;
-            }
-            
-            .grand-total-box * {
-                color: #000 !important;
-            }
-            
-            .table-card {
-                border-radius: 0 !important;
-                box-shadow: none !important;
-                border: 1px solid #000 !important;
-                margin-bottom: 10px !important;
-                break-inside: avoid;
-            }
-            
-            .color-header {
-                background: #e0e0e0 !important;
-                color: #000 !important;
-                padding: 10px 15px !important;
-                font-size: 11pt !important;
-            }
-            
-            .table th {
-                background: #f5f5f5 !important;
-                color: #000 !important;
-                font-size: 9pt !important;
-                padding: 8px 6px !important;
-                border: 1px solid #000 !important;
-            }
-            
-            .table td {
-                font-size: 10pt !important;
-                padding: 8px 6px !important;
-                border: 1px solid #000 !important;
-            }
-            
-            .order-col {
-                background: #f8f8f8 !important;
-                color: #000 !important;
-            }
-            
-            .total-col,
-            .total-col-header {
-                background: #e8f5e9 !important;
-                color: #000 !important;
-            }
-            
-            .summary-row td {
-                font-size: 10.5pt !important;
-                font-weight: 800 !important;
-                border-top: 2px solid #000 !important;
-            }
-            
-            .summary-row:first-of-type td {
-                background: #fff8e1 !important;
-                color: #000 !important;
-            }
-            
-            .summary-row:last-of-type td {
-                background: #e3f2fd !important;
-                color: #000 !important;
-            }
-            
-            .footer-credit {
-                border-radius: 0 !important;
-                box-shadow: none !important;
-                border-top: 1px solid #000 !important;
-                margin-top: 15px !important;
-                padding: 10px !important;
-                background: transparent !important;
-            }
-        }
-    </style>
+    <link href="{{ asset_url('result.css') }}" rel="stylesheet">
 </head>
 <body>
     <div class="container">
@@ -640,6 +771,32 @@ RESULT_HTML = """
             <div class="alert alert-warning text-center no-print">{{ message }}</div>
         {% endif %}
 
+        {% if batch %}
+            <div class="batch-panel no-print">
+                <div class="batch-title">Batch: {{ batch.files | length }} file(s)</div>
+                {% for f in batch.files %}
+                    <div class="batch-file">
+                        <span>{{ f.name }} <small class="text-muted">({{ f.rows }} rows)</small></span>
+                        <form action="{{ url_for('batch_remove_file', digest=f.digest) }}" method="post">
+                            <button type="submit" class="btn btn-sm btn-outline-danger">Remove</button>
+                        </form>
+                    </div>
+                {% endfor %}
+                <div class="batch-actions">
+                    <form action="{{ url_for('batch_add_files') }}" method="post" enctype="multipart/form-data" class="d-flex gap-2 flex-grow-1">
+                        <input class="form-control form-control-sm" type="file" name="pdf_files" multiple accept=".pdf,.zip" required>
+                        <button type="submit" class="btn btn-sm btn-primary">Add</button>
+                    </form>
+                    {% if tables %}
+                        <a href="{{ url_for('batch_export', fmt='xlsx') }}" class="btn btn-sm btn-outline-success">Download Excel</a>
+                    {% endif %}
+                    <form action="{{ url_for('batch_clear') }}" method="post">
+                        <button type="submit" class="btn btn-sm btn-outline-secondary">Clear</button>
+                    </form>
+                </div>
+            </div>
+        {% endif %}
+
         {% if tables %}
             <div class="info-section">
                 <div class="info-grid">
@@ -688,6 +845,21 @@ RESULT_HTML = """
             <div class="footer-credit">
                 Report Generated by <strong>Mehedi Hasan</strong>
             </div>
+
+            {% if timing %}
+                <div class="timing-footer no-print">
+                    <div>
+                        {% for name, ms in timing.stages %}<span>{{ name }}: {{ ms }} ms</span>{% endfor %}
+                    </div>
+                    {% for f in timing.files %}
+                        <div>
+                            <span>{{ f.name }}</span>
+                            {% if f.cache == 'hit' %}<span>cache hit</span>
+                            {% else %}<span>text: {{ f.text_ms }} ms</span><span>parse: {{ f.parse_ms }} ms</span><span>pages: {{ f.pages_parsed }} parsed / {{ f.pages_skipped }} skipped</span><span>rows: {{ f.rows }}</span>{% endif %}
+                        </div>
+                    {% endfor %}
+                </div>
+            {% endif %}
         {% endif %}
     </div>
 
@@ -702,36 +874,120 @@ RESULT_HTML = """
 </html>
 """
 
+TEMPLATES = {'index.html': INDEX_HTML, 'result.html': RESULT_HTML}
+ASSETS = {'index.css': INDEX_CSS, 'result.css': RESULT_CSS}
+# URL এ CSS এর hash থাকে, তাই ব্রাউজার বছরখানেক ক্যাশে রাখতে পারে; CSS বদলালে URL ও বদলায়
+ASSET_VERSIONS = {name: hashlib.sha256(css.encode()).hexdigest()[:12] for name, css in ASSETS.items()}
+
+# টেমপ্লেট স্টার্টআপেই একবার কম্পাইল হয়ে jinja এর ক্যাশে থাকে, প্রতি রিকোয়েস্টে আর পার্স হয় না
+app.jinja_loader = DictLoader(TEMPLATES)
+
+
+@app.template_global()
+def asset_url(name):
+    return url_for('asset', name=name, v=ASSET_VERSIONS[name])
+
+
+def compile_templates():
+    for name in TEMPLATES:
+        app.jinja_env.get_template(name)
+
+
+compile_templates()
+
 # ==========================================
-#  LOGIC PART
-# ==========================================
+#  LOGIC PART
+# ==========================================
+
+# সাইজ চেনার টেবিল ও রেগেক্স একবারই তৈরি হয়; একই টোকেন বারবার আসে বলে ফলাফল মেমোইজ করা
+NON_SIZE_HEADERS = frozenset(["COLO", "SIZE", "TOTAL", "QUANTITY", "PRICE", "AMOUNT", "CURRENCY", "ORDER NO", "P.O NO"])
+LETTER_SIZES = frozenset(["XXS", "XS", "S", "M", "L", "XL", "XXL", "XXXL", "TU"])
+_NUMERIC_SIZE_RE = re.compile(r'^\d+[AMYT]?$')
+_ONE_SIZE_RE = re.compile(r'^ONE\s*SIZE$')
+_SIZE_WITH_SUFFIX_RE = re.compile(r'^(\d+)([A-Z]+)$')
+
+STANDARD_ORDER = [
+    '0M', '1M', '3M', '6M', '9M', '12M', '18M', '24M', '36M',
+    '2A', '3A', '4A', '5A', '6A', '8A', '10A', '12A', '14A', '16A', '18A',
+    'XXS', 'XS', 'S', 'M', 'L', 'XL', 'XXL', '3XL', '4XL', '5XL',
+    'TU', 'One Size'
+]
+SIZE_RANK = {s: idx for idx, s in enumerate(STANDARD_ORDER)}
 
+
+@lru_cache(maxsize=4096)
 def is_potential_size(header):
     h = header.strip().upper()
-    if h in ["COLO", "SIZE", "TOTAL", "QUANTITY", "PRICE", "AMOUNT", "CURRENCY", "ORDER NO", "P.O NO"]:
+    if h in NON_SIZE_HEADERS:
         return False
-    if re.match(r'^\d+$', h): return True
-    if re.match(r'^\d+[AMYT]$', h): return True
-    if re.match(r'^(XXS|XS|S|M|L|XL|XXL|XXXL|TU|ONE\s*SIZE)$', h): return True
-    if re.match(r'^[A-Z]\d{2,}$', h): return False
+    if h in LETTER_SIZES:
+        return True
+    if _NUMERIC_SIZE_RE.match(h): return True
+    if _ONE_SIZE_RE.match(h): return True
     return False
 
 
+@lru_cache(maxsize=1024)
+def size_sort_key(s):
+    s = s.strip()
+    rank = SIZE_RANK.get(s)
+    if rank is not None: return (0, rank)
+    if s.isdigit(): return (1, int(s))
+    match = _SIZE_WITH_SUFFIX_RE.match(s)
+    if match: return (2, int(match.group(1)), match.group(2))
+    return (3, s)
+
+
 def sort_sizes(size_list):
-    STANDARD_ORDER = [
-        '0M', '1M', '3M', '6M', '9M', '12M', '18M', '24M', '36M',
-        '2A', '3A', '4A', '5A', '6A', '8A', '10A', '12A', '14A', '16A', '18A',
-        'XXS', 'XS', 'S', 'M', 'L', 'XL', 'XXL', '3XL', '4XL', '5XL',
-        'TU', 'One Size'
-    ]
-    def sort_key(s):
-        s = s.strip()
-        if s in STANDARD_ORDER: return (0, STANDARD_ORDER.index(s))
-        if s.isdigit(): return (1, int(s))
-        match = re.match(r'^(\d+)([A-Z]+)$', s)
-        if match: return (2, int(match.group(1)), match.group(2))
-        return (3, s)
-    return sorted(size_list, key=sort_key)
+    return sorted(size_list, key=size_sort_key)
+
+
+# মেটাডেটার সব লেবেল একবারের স্ক্যানেই খুঁজে পাওয়া যায় (lookahead, তাই একটা লেবেল আরেকটাকে ঢেকে দেয় না);
+# মান পড়া হয় লেবেলের ঠিক পর থেকে ছোট anchored match দিয়ে, কোনো [\s\S]*? ব্যাকট্র্যাকিং ছাড়া।
+# প্রথম দুই অক্ষরের ক্লাস আগে মেলানো হয়, যাতে বেশিরভাগ পজিশনে পুরো alternation চেষ্টাই না হয়
+_META_LABEL_RE = re.compile(
+    r"(?=(?i:[bdgiks][aeinotuı]))"
+    r"(?=(?P<booking>(?i:(?:Internal )?Booking NO\.?))"
+    r"|(?P<style_ref>(?i:Style Ref\.?))"
+    r"|(?P<style_des>(?i:Style Des\.?))"
+    r"|(?P<season>(?i:Season))"
+    r"|(?P<dept>(?i:Dept\.?))"
+    r"|(?P<item>(?i:Garments? Item))"
+    r"|(?P<buyer>Buyer)"
+    # "KIABI" in text.upper() এর সমান: 'ı'.upper() == 'I'
+    r"|(?P<kiabi>[Kk][Iiı][Aa][Bb][Iiı]))"
+)
+_BOOKING_END_RE = re.compile(r"System NO|Control No|Buyer", re.IGNORECASE)
+_BUYER_RUN_RE = re.compile(r"[\w\s&]+")
+_LABEL_GAP_RE = re.compile(r"[:\s]*")
+_WORD_RE = re.compile(r"[\w-]+")
+_STYLE_VALUE_RE = re.compile(r"[:\s]*([\w-]+)")
+_SPACE_RUN_RE = re.compile(r"\s*")
+_SEASON_GAP_RE = re.compile(r"[:\n\"]*")
+_DEPT_VALUE_RE = re.compile(r"[\s:]*([A-Za-z]+)", re.IGNORECASE)
+_LINE_REST_RE = re.compile(r"[^\n\r]+")
+
+
+def _buyer_value(text, pos):
+    # "Name" এর পরের প্রথম [\w\s&]+ অংশ যেটা লাইন শেষে (বা টেক্সটের শেষে) গিয়ে থামে
+    for run in _BUYER_RUN_RE.finditer(text, pos):
+        if run.end() == len(text):
+            return text[run.start():]
+        newline = text.rfind('\n', run.start() + 1, run.end())
+        if newline != -1:
+            return text[run.start():newline]
+    return None
+
+
+def _item_value(text, pos):
+    start = _LABEL_GAP_RE.match(text, pos).end()
+    if start < len(text):
+        return _LINE_REST_RE.match(text, start).group()
+    # লেবেলের পর শুধু ফাঁকা/কোলন দিয়েই টেক্সট শেষ
+    for idx in range(len(text) - 1, pos - 1, -1):
+        if text[idx] not in '\n\r':
+            return text[idx]
+    return None
 
 
 def extract_metadata(first_page_text):
@@ -739,35 +995,84 @@ def extract_metadata(first_page_text):
         'buyer': 'N/A', 'booking': 'N/A', 'style': 'N/A', 
         'season': 'N/A', 'dept': 'N/A', 'item': 'N/A'
     }
-    
-    if "KIABI" in first_page_text.upper():
+    text = first_page_text
+
+    labels = {}
+    kiabi = False
+    buyer = style_des = None
+    buyer_line_end = -1
+    for label in _META_LABEL_RE.finditer(text):
+        field = label.lastgroup
+        end = label.end(field)
+        if field == 'kiabi':
+            kiabi = True
+        elif field == 'buyer':
+            # একই লাইনে "Name" না থাকলে এই লাইনের পরের Buyer গুলোতেও থাকবে না
+            if buyer is None and label.start(field) > buyer_line_end:
+                line_end = text.find('\n', end)
+                line_end = len(text) if line_end == -1 else line_end
+                name = text.find('Name', end, line_end)
+                if name == -1:
+                    buyer_line_end = line_end
+                else:
+                    buyer = name + 4
+        elif field == 'style_des':
+            if style_des is None:
+                style_des = end
+        elif field == 'booking':
+            labels.setdefault('booking', end)
+        elif field == 'style_ref':
+            if 'style_ref' not in labels:
+                value = _STYLE_VALUE_RE.match(text, end)
+                if value:
+                    labels['style_ref'] = value.group(1)
+        elif field == 'season':
+            if 'season' not in labels:
+                gap = _SEASON_GAP_RE.match(text, _SPACE_RUN_RE.match(text, end).end()).end()
+                value = _WORD_RE.match(text, gap)
+                if value:
+                    labels['season'] = value.group()
+        elif field == 'dept':
+            if 'dept' not in labels:
+                value = _DEPT_VALUE_RE.match(text, end)
+                if value:
+                    labels['dept'] = value.group(1)
+        elif field == 'item':
+            if 'item' not in labels:
+                value = _item_value(text, end)
+                if value is not None:
+                    labels['item'] = value
+
+        # KIABI আর সব লেবেলের মান পাওয়া গেলে বাকি পেজ দেখার দরকার নেই
+        if kiabi and len(labels) == 5:
+            break
+
+    if kiabi:
         meta['buyer'] = "KIABI"
-    else:
-        buyer_match = re.search(r"Buyer.*?Name[\s\S]*?([\w\s&]+)(?:\n|$)", first_page_text)
-        if buyer_match: meta['buyer'] = buyer_match.group(1).strip()
-
-    booking_block_match = re.search(r"(?:Internal )?Booking NO\.?[:\s]*([\s\S]*?)(?:System NO|Control No|Buyer)", first_page_text, re.IGNORECASE)
-    if booking_block_match: 
-        raw_booking = booking_block_match.group(1).strip()
-        clean_booking = raw_booking.replace('\n', '').replace('\r', '').replace(' ', '')
-        if "System" in clean_booking: clean_booking = clean_booking.split("System")[0]
-        meta['booking'] = clean_booking
-
-    style_match = re.search(r"Style Ref\.?[:\s]*([\w-]+)", first_page_text, re.IGNORECASE)
-    if style_match: meta['style'] = style_match.group(1).strip()
-    else:
-        style_match = re.search(r"Style Des\.?[\s\S]*?([\w-]+)", first_page_text, re.IGNORECASE)
-        if style_match: meta['style'] = style_match.group(1).strip()
+    elif buyer is not None:
+        value = _buyer_value(text, buyer)
+        if value is not None: meta['buyer'] = value.strip()
 
-    season_match = re.search(r"Season\s*[:\n\"]*([\w\d-]+)", first_page_text, re.IGNORECASE)
-    if season_match: meta['season'] = season_match.group(1).strip()
+    if 'booking' in labels:
+        start = _LABEL_GAP_RE.match(text, labels['booking']).end()
+        booking_end = _BOOKING_END_RE.search(text, start)
+        if booking_end:
+            raw_booking = text[start:booking_end.start()].strip()
+            clean_booking = raw_booking.replace('\n', '').replace('\r', '').replace(' ', '')
+            if "System" in clean_booking: clean_booking = clean_booking.split("System")[0]
+            meta['booking'] = clean_booking
 
-    dept_match = re.search(r"Dept\.?[\s\n:]*([A-Za-z]+)", first_page_text, re.IGNORECASE)
-    if dept_match: meta['dept'] = dept_match.group(1).strip()
+    if 'style_ref' in labels:
+        meta['style'] = labels['style_ref'].strip()
+    elif style_des is not None:
+        style_match = _WORD_RE.search(text, style_des)
+        if style_match: meta['style'] = style_match.group().strip()
 
-    item_match = re.search(r"Garments? Item[\s\n:]*([^\n\r]+)", first_page_text, re.IGNORECASE)
-    if item_match: 
-        item_text = item_match.group(1).strip()
+    if 'season' in labels: meta['season'] = labels['season'].strip()
+    if 'dept' in labels: meta['dept'] = labels['dept'].strip()
+
+    if 'item' in labels:
+        item_text = labels['item'].strip()
         if "Style" in item_text: item_text = item_text.split("Style")[0].strip()
         meta['item'] = item_text
 
@@ -803,68 +1108,218 @@ def is_partial_color_name(text):
     return False
 
 
-def parse_vertical_table(lines, start_idx, sizes, order_no):
-    extracted_data = []
+# প্রতিটি লাইনের ধরন একবারই বের করে বিটফ্ল্যাগ হিসেবে রাখা হয়
+LINE_BLANK = 1
+LINE_DIGITS = 2
+LINE_COLOR = 4
+LINE_PARTIAL_COLOR = 8
+LINE_SPEC = 16
+LINE_TOTAL = 32
+LINE_TOTAL_END = 64     # Total এর পরে এই লাইন এলে টেবিল শেষ
+
+_DIGITS_RE = re.compile(r'^\d+$')
+_LEADING_DIGIT_RE = re.compile(r'^\d')
+
+
+def classify_lines(lines, start_idx=0):
+    tags = bytearray(len(lines))
+    for idx in range(start_idx, len(lines)):
+        line = lines[idx].strip()
+        if not line:
+            tags[idx] = LINE_BLANK
+            continue
+        tag = 0
+        if _DIGITS_RE.match(line):
+            tag |= LINE_DIGITS
+        if _LEADING_DIGIT_RE.match(line) or "Quantity" in line or "Amount" in line:
+            tag |= LINE_TOTAL_END
+        if line.startswith("Total"):
+            tag |= LINE_TOTAL
+        if 'spec' in line.lower():
+            tag |= LINE_SPEC
+        if is_color_name(line):
+            tag |= LINE_COLOR
+        if is_partial_color_name(line):
+            tag |= LINE_PARTIAL_COLOR
+        tags[idx] = tag
+    return tags
+
+
+class PORows:
+    # প্রতি সেলের জন্য dict না রেখে কলাম আকারে রাখা হয়: PO/Color/Size স্ট্রিং একবার করে
+    # (কোড হিসেবে), আর quantity একটা int64 array (EAN এর মতো লম্বা সংখ্যাও আঁটে)। DataFrame বানাতে কপি লাগে না।
+    COLUMNS = ('P.O NO', 'Color', 'Size')
+
+    def __init__(self):
+        self.categories = ([], [], [])
+        self.codes = (array('i'), array('i'), array('i'))
+        self.quantity = array('q')
+        self._lookup = ({}, {}, {})
+
+    def __len__(self):
+        return len(self.quantity)
+
+    def __iter__(self):
+        for po, color, size, qty in self.records():
+            yield {'P.O NO': po, 'Color': color, 'Size': size, 'Quantity': qty}
+
+    def records(self):
+        po, color, size = self.categories
+        for p, c, s, q in zip(*self.codes, self.quantity):
+            yield po[p], color[c], size[s], q
+
+    def __getstate__(self):
+        return self.categories, self.codes, self.quantity
+
+    def __setstate__(self, state):
+        self.categories, self.codes, self.quantity = state
+        self._lookup = tuple({value: code for code, value in enumerate(values)} for values in self.categories)
+
+    def _code(self, column, value):
+        lookup = self._lookup[column]
+        code = lookup.get(value)
+        if code is None:
+            code = lookup[value] = len(self.categories[column])
+            self.categories[column].append(value)
+        return code
+
+    def add_block(self, order_no, color_name, sizes, quantities):
+        # আগে quantity: বেমানান সংখ্যায় OverflowError হলে কোড কলামগুলো অর্ধেক লেখা থাকে না
+        quantities = array('q', quantities)
+        po_code = self._code(0, order_no)
+        color_code = self._code(1, color_name.strip())
+        count = len(sizes)
+        self.codes[0].extend([po_code] * count)
+        self.codes[1].extend([color_code] * count)
+        self.codes[2].extend(self._code(2, size) for size in sizes)
+        self.quantity.extend(quantities)
+
+    def extend(self, other, indices=None):
+        remap = [[self._code(col, value) for value in other.categories[col]] for col in range(3)]
+        if indices is None:
+            if not len(other):
+                return
+            # পুরো অবজেক্ট জুড়লে কোড রিম্যাপ numpy তে, প্রতি রো Python লুপ লাগে না
+            import numpy as np
+            for col in range(3):
+                mapping = np.asarray(remap[col], dtype=np.int32)
+                self.codes[col].frombytes(mapping[np.frombuffer(other.codes[col], dtype=np.int32)].tobytes())
+            self.quantity.extend(other.quantity)
+            return
+        for col in range(3):
+            codes, mapping = other.codes[col], remap[col]
+            self.codes[col].extend(mapping[codes[i]] for i in indices)
+        self.quantity.extend(other.quantity[i] for i in indices)
+
+    def blocks(self):
+        # (P.O NO, Color) ব্লক -> রো ইনডেক্স, প্রথম দেখা ক্রমে
+        po, color, _ = self.categories
+        grouped = {}
+        for idx, key in enumerate(zip(self.codes[0], self.codes[1])):
+            grouped.setdefault(key, []).append(idx)
+        return {(po[p], color[c]): indices for (p, c), indices in grouped.items()}
+
+    def fingerprint(self, indices):
+        sizes = self.categories[2]
+        return tuple(sorted((sizes[self.codes[2][i]], self.quantity[i]) for i in indices))
+
+    def to_payload(self):
+        return {
+            'categories': self.categories,
+            'codes': [codes.tolist() for codes in self.codes],
+            'quantity': self.quantity.tolist(),
+        }
+
+    @classmethod
+    def from_payload(cls, payload):
+        rows = cls()
+        rows.__setstate__((
+            tuple(list(values) for values in payload['categories']),
+            tuple(array('i', codes) for codes in payload['codes']),
+            array('q', payload['quantity']),
+        ))
+        return rows
+
+    def to_frame(self):
+        # quantity array এর মেমরি সরাসরি ব্যবহার হয়; ক্যাটেগরি সাজানো থাকে যাতে groupby এর
+        # ক্রম আগের স্ট্রিং কলামের মতোই থাকে। frame থাকা অবস্থায় এই অবজেক্টে আর append করা যাবে না।
+        import numpy as np
+        import pandas as pd
+        columns = {}
+        for col, name in enumerate(self.COLUMNS):
+            values = self.categories[col]
+            order = sorted(range(len(values)), key=values.__getitem__)
+            remap = np.empty(len(values), dtype=np.int32)
+            remap[order] = np.arange(len(values), dtype=np.int32)
+            codes = remap[np.frombuffer(self.codes[col], dtype=np.int32)] if values else np.empty(0, dtype=np.int32)
+            columns[name] = pd.Categorical.from_codes(codes, categories=[values[i] for i in order])
+        columns['Quantity'] = np.frombuffer(self.quantity, dtype=np.int64)
+        return pd.DataFrame(columns, copy=False)
+
+
+def parse_vertical_table(lines, start_idx, sizes, order_no, tags=None, extracted_data=None):
+    # extracted_data দিলে ব্লকগুলো সরাসরি তাতে যোগ হয়, মাঝপথে কিছু ভাঙলেও আগের ব্লক হারায় না
+    if tags is None:
+        tags = classify_lines(lines, start_idx)
+    if extracted_data is None:
+        extracted_data = PORows()
+    line_count = len(lines)
     i = start_idx
     
-    while i < len(lines):
-        line = lines[i].strip()
-        
-        if line.startswith("Total") and i + 1 < len(lines):
-            next_line = lines[i + 1].strip() if i + 1 < len(lines) else ""
-            if "Quantity" in next_line or "Amount" in next_line or re.match(r'^Quantity', next_line):
-                break
-            if re.match(r'^\d', next_line):
-                break
-        
-        if line and is_color_name(line):
-            color_name = line
+    while i < line_count:
+        tag = tags[i]
+
+        if tag & LINE_TOTAL and i + 1 < line_count and tags[i + 1] & LINE_TOTAL_END:
+            break
+
+        if tag & LINE_COLOR:
+            color_name = lines[i].strip()
             i += 1
             
-            while i < len(lines):
-                next_line = lines[i].strip()
+            while i < line_count:
+                next_tag = tags[i]
                 
-                if 'spec' in next_line.lower():
+                if next_tag & LINE_SPEC:
                     i += 1
                     break
                 
-                if re.match(r'^\d+$', next_line):
+                if next_tag & LINE_DIGITS:
                     break
                 
-                if not next_line:
+                if next_tag & LINE_BLANK:
                     i += 1
                     continue
                 
-                if is_partial_color_name(next_line):
-                    color_name = color_name + " " + next_line
+                if next_tag & LINE_PARTIAL_COLOR:
+                    color_name = color_name + " " + lines[i].strip()
                     i += 1
                 else:
                     break
             
-            if i < len(lines) and 'spec' in lines[i].lower():
+            if i < line_count and tags[i] & LINE_SPEC:
                 i += 1
             
             quantities = []
             size_idx = 0
             
-            while size_idx < len(sizes) and i < len(lines):
-                qty_line = lines[i].strip() if i < len(lines) else ""
-                price_line = lines[i + 1].strip() if i + 1 < len(lines) else ""
+            while size_idx < len(sizes) and i < line_count:
+                qty_tag = tags[i]
+                price_blank = i + 1 >= line_count or tags[i + 1] & LINE_BLANK
                 
-                if qty_line and is_color_name(qty_line):
+                if qty_tag & LINE_COLOR:
                     while size_idx < len(sizes):
                         quantities.append(0)
                         size_idx += 1
                     break
                 
-                if (qty_line == "" or qty_line.isspace()) and (price_line == "" or price_line.isspace()):
+                if qty_tag & LINE_BLANK and price_blank:
                     quantities.append(0)
                     size_idx += 1
                     i += 2
                     continue
                 
-                if re.match(r'^\d+$', qty_line):
-                    quantities.append(int(qty_line))
+                if qty_tag & LINE_DIGITS:
+                    quantities.append(int(lines[i].strip()))
                     size_idx += 1
                     i += 2
                     continue
@@ -875,13 +1330,11 @@ def parse_vertical_table(lines, start_idx, sizes, order_no):
                 while len(quantities) < len(sizes):
                     quantities.append(0)
                 
-                for idx, size in enumerate(sizes):
-                    extracted_data.append({
-                        'P.O NO': order_no,
-                        'Color': color_name,
-                        'Size': size,
-                        'Quantity': quantities[idx] if idx < len(quantities) else 0
-                    })
+                try:
+                    extracted_data.add_block(order_no, color_name, sizes, quantities)
+                except OverflowError:
+                    # int64 এ আঁটে না এমন সংখ্যা quantity হতে পারে না; শুধু এই ব্লক বাদ, বাকি টেবিল চলে
+                    app.logger.warning("Skipping color %r of order %s: quantity out of range", color_name, order_no)
             
             continue
         
@@ -890,142 +1343,2443 @@ def parse_vertical_table(lines, start_idx, sizes, order_no):
     return extracted_data
 
 
-def extract_data_dynamic(file_path):
-    extracted_data = []
+# content stream দেখে সস্তায় বোঝা যায় পেজে টেবিল হেডার থাকতে পারে কিনা
+_PDF_LITERAL_RE = re.compile(rb"\((?:\\.|[^\\()])*\)", re.S)
+_PDF_HEX_STRING_RE = re.compile(rb"<[0-9A-Fa-f\s]*>")
+_PDF_ESCAPE_RE = re.compile(rb"\\(.)", re.S)
+_PRINTABLE_BYTES = bytes(range(32, 127))
+
+
+def is_candidate_page(page):
+    try:
+        contents = page.get_contents()
+        raw = contents.get_data() if contents is not None else b''
+    except Exception:
+        return True
+    return is_candidate_content(raw)
+
+
+def is_candidate_plumber_page(page):
+    # pdfplumber এর পেজ: pdfminer এর content stream থেকে একই প্রোব
+    from pdfminer.pdftypes import resolve1
+    try:
+        raw = b''.join(resolve1(stream).get_data() for stream in page.page_obj.contents)
+    except Exception:
+        return True
+    return is_candidate_content(raw)
+
+
+def is_candidate_content(raw):
+    # Form XObject এর ভেতরের লেখা এখান থেকে দেখা যায় না, তাই পুরো extract করতে হবে
+    if b'Do' in raw:
+        return True
+    if b'BT' not in raw:
+        return False
+    # hex string বা অদ্ভুত এনকোডিং হলে লেখা পড়া যায় না, ঝুঁকি না নিয়ে পার্স
+    if _PDF_HEX_STRING_RE.search(raw):
+        return True
+
+    probe = b''.join(s[1:-1] for s in _PDF_LITERAL_RE.findall(raw))
+    probe = _PDF_ESCAPE_RE.sub(rb'\1', probe)
+    if not probe or len(probe.translate(None, _PRINTABLE_BYTES)) > len(probe) // 10:
+        return True
+
+    return (b'Colo' in probe or b'Size' in probe) and b'Total' in probe
+
+
+def is_booking_text(first_page_text):
+    return "Main Fabric Booking" in first_page_text or "Fabric Booking Sheet" in first_page_text
+
+
+def find_order_no(first_page_text):
+    order_no = "Unknown"
+    order_match = re.search(r"Order no\D*(\d+)", first_page_text, re.IGNORECASE)
+    if order_match: order_no = order_match.group(1)
+    else:
+        alt_match = re.search(r"Order\s*[:\.]?\s*(\d+)", first_page_text, re.IGNORECASE)
+        if alt_match: order_no = alt_match.group(1)
+    
+    order_no = str(order_no).strip()
+    if order_no.endswith("00"): order_no = order_no[:-2]
+    return order_no
+
+
+def is_header_line(line):
+    return ("Colo" in line or "Size" in line) and "Total" in line
+
+
+HEADER_LABELS = ["Colo", "/", "Size", "Colo/Size", "Colo/", "Size's"]
+
+
+def header_sizes(parts):
+    # হেডারের টোকেনগুলোর অর্ধেকের বেশি সাইজ হলে তবেই এটা আসল সাইজ টেবিল
+    total_idx = [idx for idx, x in enumerate(parts) if 'Total' in x][0]
+    sizes = [s for s in parts[:total_idx] if s not in HEADER_LABELS]
+    valid_size_count = sum(1 for s in sizes if is_potential_size(s))
+    if sizes and valid_size_count >= len(sizes) / 2:
+        return sizes
+    return None
+
+
+def parse_page_text(text, order_no, extracted_data):
+    lines = text.split('\n')
+    for i, line in enumerate(lines):
+        if is_header_line(line):
+            try:
+                sizes = header_sizes(line.split())
+                if sizes:
+                    parse_vertical_table(lines, i + 1, sizes, order_no, extracted_data=extracted_data)
+            except Exception:
+                app.logger.exception("Could not parse the rest of the table for order %s", order_no)
+            break
+
+
+def _extract_pages(reader, start, stop, order_no, extracted_data, stats=None, first_page_text=None):
+    text_seconds = parse_seconds = 0.0
+    pages_parsed = pages_skipped = 0
+    for page_no in range(start, stop):
+        page = reader.pages[page_no]
+        if page_no == 0 and first_page_text is not None:
+            text = first_page_text
+        elif is_candidate_page(page):
+            started = time.perf_counter()
+            text = page.extract_text()
+            text_seconds += time.perf_counter() - started
+        else:
+            pages_skipped += 1
+            continue
+        pages_parsed += 1
+        started = time.perf_counter()
+        parse_page_text(text, order_no, extracted_data)
+        parse_seconds += time.perf_counter() - started
+
+    if stats is not None:
+        stats['pages_parsed'] = stats.get('pages_parsed', 0) + pages_parsed
+        stats['pages_skipped'] = stats.get('pages_skipped', 0) + pages_skipped
+        stats['text_seconds'] = stats.get('text_seconds', 0.0) + text_seconds
+        stats['parse_seconds'] = stats.get('parse_seconds', 0.0) + parse_seconds
+
+
+def extract_data_dynamic(source, stats=None):
+    import pypdf
+    extracted_data = PORows()
     metadata = {
         'buyer': 'N/A', 'booking': 'N/A', 'style': 'N/A', 
         'season': 'N/A', 'dept': 'N/A', 'item': 'N/A'
     }
-    order_no = "Unknown"
     
     try:
-        reader = pypdf.PdfReader(file_path)
+        if isinstance(source, (bytes, bytearray)):
+            source = io.BytesIO(source)
+        started = time.perf_counter()
+        reader = pypdf.PdfReader(source)
         first_page_text = reader.pages[0].extract_text()
+        text_seconds = time.perf_counter() - started
         
-        if "Main Fabric Booking" in first_page_text or "Fabric Booking Sheet" in first_page_text:
+        if is_booking_text(first_page_text):
             metadata = extract_metadata(first_page_text)
-            return [], metadata 
+            if stats is not None:
+                stats['pages_parsed'] = stats.get('pages_parsed', 0) + 1
+                stats['text_seconds'] = stats.get('text_seconds', 0.0) + text_seconds
+            return extracted_data, metadata 
 
-        order_match = re.search(r"Order no\D*(\d+)", first_page_text, re.IGNORECASE)
-        if order_match: order_no = order_match.group(1)
-        else:
-            alt_match = re.search(r"Order\s*[:\.]?\s*(\d+)", first_page_text, re.IGNORECASE)
-            if alt_match: order_no = alt_match.group(1)
-        
-        order_no = str(order_no).strip()
-        if order_no.endswith("00"): order_no = order_no[:-2]
+        order_no = find_order_no(first_page_text)
+        if stats is not None:
+            stats['text_seconds'] = stats.get('text_seconds', 0.0) + text_seconds
+        _extract_pages(reader, 0, len(reader.pages), order_no, extracted_data, stats, first_page_text)
 
-        for page in reader.pages:
-            text = page.extract_text()
-            lines = text.split('\n')
-            
-            for i, line in enumerate(lines):
-                if ("Colo" in line or "Size" in line) and "Total" in line:
-                    parts = line.split()
-                    try:
-                        total_idx = [idx for idx, x in enumerate(parts) if 'Total' in x][0]
-                        raw_sizes = parts[:total_idx]
-                        sizes = [s for s in raw_sizes if s not in ["Colo", "/", "Size", "Colo/Size", "Colo/", "Size's"]]
-                        
-                        valid_size_count = sum(1 for s in sizes if is_potential_size(s))
-                        if sizes and valid_size_count >= len(sizes) / 2:
-                            data = parse_vertical_table(lines, i + 1, sizes, order_no)
-                            extracted_data.extend(data)
-                    except: 
-                        pass
-                    break
+        if stats is not None:
+            stats['rows'] = stats.get('rows', 0) + len(extracted_data)
                     
     except Exception as e: 
-        print(f"Error processing file: {e}")
+        # আধা-পার্স হওয়া ফলাফল ক্যাশে বা স্টোরে যাওয়া ঠেকাতে stats এ error রাখা হয়
+        app.logger.warning("Error processing file: %s", e)
+        if stats is not None:
+            stats['error'] = str(e)
     
     return extracted_data, metadata
 
 
+def extract_page_range(path, start, stop, order_no):
+    # বড় PDF এর এক টুকরো পেজ; প্রতিটি ওয়ার্কার একই ফাইল নিজে read-only খোলে
+    import pypdf
+    extracted_data = PORows()
+    stats = {}
+    try:
+        _extract_pages(pypdf.PdfReader(path), start, stop, order_no, extracted_data, stats)
+    except Exception as e:
+        app.logger.warning("Error processing pages %d-%d of %s: %s", start, stop, path, e)
+        stats['error'] = str(e)
+    stats['rows'] = len(extracted_data)
+    return extracted_data, stats
+
+
+def prepare_page_split(source, workers):
+    # পেজ থ্রেশহোল্ডের কম হলে বা বুকিং ফাইল হলে None, তখন পুরো ফাইল একটা কাজ হিসেবেই যায়।
+    # নাহলে প্রথম পেজ এখানেই পার্স হয় (অর্ডার নম্বর সব টুকরোর লাগে), বাকি পেজ ওয়ার্কারদের মধ্যে ভাগ হয়
+    min_pages = app.config['PAGE_SPLIT_MIN_PAGES']
+    if workers <= 1 or min_pages <= 0:
+        return None
+    # ছোট ফাইলের জন্য PdfReader খোলাই হয় না; admission যে গোনা করেছে সেটাই (PdfSource.pages)
+    if estimate_pages(source) < max(min_pages, 2):
+        return None
+    import pypdf
+    try:
+        reader = pypdf.PdfReader(io.BytesIO(source.data) if source.data is not None else source.path)
+        page_count = len(reader.pages)
+        if page_count < max(min_pages, 2):
+            return None
+        started = time.perf_counter()
+        first_page_text = reader.pages[0].extract_text()
+        stats = {'text_seconds': time.perf_counter() - started}
+    except Exception:
+        return None
+    if is_booking_text(first_page_text):
+        return None
+
+    order_no = find_order_no(first_page_text)
+    first_rows = PORows()
+    _extract_pages(reader, 0, 1, order_no, first_rows, stats, first_page_text)
+    chunk = -(-(page_count - 1) // workers)
+    ranges = [(start, min(start + chunk, page_count)) for start in range(1, page_count, chunk)]
+    return order_no, first_rows, stats, ranges
+
+
 # ==========================================
-#  FLASK ROUTES
+#  EXTRACTION BACKENDS
 # ==========================================
 
-@app.route('/', methods=['GET', 'POST'])
-def index():
-    if request.method == 'POST':
-        if os.path.exists(UPLOAD_FOLDER): 
-            shutil.rmtree(UPLOAD_FOLDER)
-        os.makedirs(UPLOAD_FOLDER)
+def group_word_lines(words, tolerance=3):
+    lines = []
+    for word in sorted(words, key=lambda w: (w['top'], w['x0'])):
+        if lines and word['top'] - lines[-1][0] <= tolerance:
+            lines[-1][1].append(word)
+        else:
+            lines.append((word['top'], [word]))
+    return [sorted(line, key=lambda w: w['x0']) for _, line in lines]
+
+
+def parse_word_table(words, order_no):
+    # শব্দের x পজিশন থেকে সরাসরি সাইজ কলাম মেলানো হয়, লাইন ধরে অনুমান করতে হয় না।
+    # কালারের নাম তার quantity রো থেকেই শুরু হয় ধরে নেওয়া হয়; নিচের লাইনগুলো নামের বাকি অংশ
+    extracted_data = PORows()
+    lines = group_word_lines(words)
+    for header_idx, line in enumerate(lines):
+        parts = [w['text'] for w in line]
+        if is_header_line(' '.join(parts)):
+            break
+    else:
+        return extracted_data
+
+    try:
+        sizes = header_sizes(parts)
+    except IndexError:
+        return extracted_data
+    if not sizes:
+        return extracted_data
+
+    centres = []
+    for word in line:
+        if 'Total' in word['text']:
+            centres.append(((word['x0'] + word['x1']) / 2, None))
+            break
+        if word['text'] not in HEADER_LABELS:
+            centres.append(((word['x0'] + word['x1']) / 2, word['text']))
+    gaps = [b[0] - a[0] for a, b in zip(centres, centres[1:])]
+    half_gap = (min(gaps) if gaps else 40) / 2
+    label_edge = centres[0][0] - half_gap
+
+    blocks = []
+    current = None
+    for line in lines[header_idx + 1:]:
+        label = ' '.join(w['text'] for w in line if (w['x0'] + w['x1']) / 2 < label_edge).strip()
+        if label.startswith('Total'):
+            break
+
+        cells = {}
+        for word in line:
+            centre = (word['x0'] + word['x1']) / 2
+            if centre < label_edge or not _DIGITS_RE.match(word['text']):
+                continue
+            x, size = min(centres, key=lambda c: abs(c[0] - centre))
+            if size is not None and abs(x - centre) <= half_gap and size not in cells:
+                cells[size] = int(word['text'])
+
+        if cells and label and is_color_name(label):
+            current = [label, cells]
+            blocks.append(current)
+        elif cells and current is not None:
+            for size, qty in cells.items():
+                current[1].setdefault(size, qty)
+        elif label and current is not None and 'spec' not in label.lower() and is_partial_color_name(label):
+            current[0] = current[0] + " " + label
+
+    for color_name, quantities in blocks:
+        extracted_data.add_block(order_no, color_name, sizes, [quantities.get(size, 0) for size in sizes])
+    return extracted_data
+
+
+class PypdfBackend:
+    name = 'pypdf'
+
+    def extract(self, source, stats=None):
+        return extract_data_dynamic(source, stats)
+
+
+class PdfplumberBackend:
+    name = 'pdfplumber'
 
-        uploaded_files = request.files.getlist('pdf_files')
-        all_data = []
-        final_meta = {
+    def extract(self, source, stats=None):
+        extracted_data = PORows()
+        metadata = {
             'buyer': 'N/A', 'booking': 'N/A', 'style': 'N/A',
             'season': 'N/A', 'dept': 'N/A', 'item': 'N/A'
         }
-        
-        for file in uploaded_files:
-            if file.filename == '': 
+        text_seconds = parse_seconds = 0.0
+        pages_parsed = pages_skipped = 0
+        try:
+            import pdfplumber
+
+            if isinstance(source, (bytes, bytearray)):
+                source = io.BytesIO(source)
+            with pdfplumber.open(source) as pdf:
+                # প্রথম পেজের শব্দ একবারই বের হয়; অর্ডার নম্বর/বুকিং চেনার টেক্সট সেই শব্দের লাইন থেকে
+                started = time.perf_counter()
+                first_words = pdf.pages[0].extract_words()
+                first_page_text = '\n'.join(' '.join(w['text'] for w in line) for line in group_word_lines(first_words))
+                text_seconds += time.perf_counter() - started
+                pages_parsed = 1
+                if is_booking_text(first_page_text):
+                    metadata = extract_metadata(first_page_text)
+                else:
+                    order_no = find_order_no(first_page_text)
+                    for page_no, page in enumerate(pdf.pages):
+                        if page_no == 0:
+                            words = first_words
+                        elif is_candidate_plumber_page(page):
+                            started = time.perf_counter()
+                            words = page.extract_words()
+                            text_seconds += time.perf_counter() - started
+                            pages_parsed += 1
+                        else:
+                            pages_skipped += 1
+                            continue
+
+                        started = time.perf_counter()
+                        extracted_data.extend(parse_word_table(words, order_no))
+                        parse_seconds += time.perf_counter() - started
+        except Exception as e:
+            app.logger.warning("Error processing file: %s", e)
+            if stats is not None:
+                stats['error'] = str(e)
+
+        if stats is not None:
+            stats['pages_parsed'] = stats.get('pages_parsed', 0) + pages_parsed
+            stats['pages_skipped'] = stats.get('pages_skipped', 0) + pages_skipped
+            stats['text_seconds'] = stats.get('text_seconds', 0.0) + text_seconds
+            stats['parse_seconds'] = stats.get('parse_seconds', 0.0) + parse_seconds
+            stats['rows'] = stats.get('rows', 0) + len(extracted_data)
+        return extracted_data, metadata
+
+
+EXTRACT_BACKENDS = {b.name: b for b in (PypdfBackend(), PdfplumberBackend())}
+BACKEND_CHOICES = tuple(EXTRACT_BACKENDS) + ('auto',)
+
+
+def pdfplumber_available():
+    try:
+        import pdfplumber  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def extract_with_backend(source, backend='pypdf', stats=None):
+    if backend != 'auto':
+        return EXTRACT_BACKENDS[backend].extract(source, stats)
+    # auto: দ্রুত pypdf আগে; টেবিল না পেলে (আর বুকিং ফাইল না হলে) pdfplumber দিয়ে আবার চেষ্টা।
+    # যে ব্যাকএন্ডের ফলাফল রাখা হলো শুধু তার stats, নাহলে একই পেজ দুবার গোনা হয়
+    kept = {}
+    data, metadata = EXTRACT_BACKENDS['pypdf'].extract(source, kept)
+    if not data and metadata['buyer'] == 'N/A' and pdfplumber_available():
+        kept = {}
+        data, metadata = EXTRACT_BACKENDS['pdfplumber'].extract(source, kept)
+    if stats is not None:
+        for key, value in kept.items():
+            stats[key] = value if key == 'error' else stats.get(key, 0) + value
+    return data, metadata
+
+
+def extract_with_stats(source, backend='pypdf'):
+    stats = {}
+    data, metadata = extract_with_backend(source, backend, stats)
+    return data, metadata, stats
+
+
+EXTRACT_STATS = {
+    'files_parsed': 0, 'pages_parsed': 0, 'pages_skipped': 0, 'rows': 0,
+    'text_seconds': 0.0, 'parse_seconds': 0.0,
+}
+_extract_stats_lock = threading.Lock()
+
+
+def record_extract_stats(stats):
+    with _extract_stats_lock:
+        EXTRACT_STATS['files_parsed'] += 1
+        for key in ('pages_parsed', 'pages_skipped', 'rows', 'text_seconds', 'parse_seconds'):
+            EXTRACT_STATS[key] += stats.get(key, 0)
+
+
+def extract_stats():
+    with _extract_stats_lock:
+        return dict(EXTRACT_STATS)
+
+
+class ExtractionCache:
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS extract_cache ("
+                " key TEXT PRIMARY KEY, payload BLOB NOT NULL,"
+                " size INTEGER NOT NULL, last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_extract_cache_last_used ON extract_cache(last_used)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    @staticmethod
+    def make_key(digest, backend='pypdf'):
+        return f"{digest}:{backend}:v{PARSER_VERSION}"
+
+    def get(self, digest, backend='pypdf'):
+        key = self.make_key(digest, backend)
+        with self._connect() as conn:
+            row = conn.execute("SELECT payload FROM extract_cache WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                conn.execute("UPDATE extract_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        payload = json.loads(zlib.decompress(row[0]))
+        return PORows.from_payload(payload['rows']), payload['meta']
+
+    def put(self, digest, data, metadata, backend='pypdf'):
+        payload = {
+            'rows': data.to_payload(),
+            'meta': metadata,
+        }
+        blob = zlib.compress(json.dumps(payload, separators=(',', ':')).encode('utf-8'))
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO extract_cache (key, payload, size, last_used) VALUES (?, ?, ?, ?)",
+                (self.make_key(digest, backend), blob, len(blob), time.time()),
+            )
+            self._evict(conn)
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM extract_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # সবচেয়ে পুরনো ব্যবহার করা এন্ট্রি আগে বাদ (LRU)
+        for key, size in conn.execute("SELECT key, size FROM extract_cache ORDER BY last_used").fetchall():
+            conn.execute("DELETE FROM extract_cache WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+
+class PdfSource:
+    # data (bytes) অথবা path — যেকোনো একটা থাকে; payload সরাসরি extract_data_dynamic() এ যায়
+    __slots__ = ('name', 'data', 'path', 'digest', 'size', 'pages')
+
+    def __init__(self, name, data=None, path=None, digest=None, size=0):
+        self.name = name
+        self.data = data
+        self.path = path
+        self.digest = digest
+        self.size = size
+        # estimate_pages() প্রথমবার গুনে এখানে রাখে
+        self.pages = None
+
+    @property
+    def payload(self):
+        return self.data if self.data is not None else self.path
+
+    @classmethod
+    def from_path(cls, path):
+        h = hashlib.sha256()
+        size = 0
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                h.update(chunk)
+                size += len(chunk)
+        return cls(os.path.basename(path), path=path, digest=h.hexdigest(), size=size)
+
+
+def read_upload(file, spool_dir, spool_max_bytes):
+    return read_stream(file.filename, file.stream, spool_dir, spool_max_bytes)
+
+
+def read_stream(name, stream, spool_dir, spool_max_bytes, max_bytes=None):
+    # একবার পড়েই hash, পেজ সংখ্যা আর বাফার তিনটাই তৈরি হয়; max_bytes পেরোলে মাঝপথেই থামে
+    h = hashlib.sha256()
+    pages = PageCounter()
+    buf = io.BytesIO()
+    spill = None
+    spill_path = None
+    size = 0
+    try:
+        for chunk in iter(lambda: stream.read(1024 * 1024), b''):
+            h.update(chunk)
+            pages.feed(chunk)
+            size += len(chunk)
+            if max_bytes is not None and size > max_bytes:
+                raise zip_too_large()
+            if spill is None and size > spool_max_bytes:
+                fd, spill_path = tempfile.mkstemp(suffix='.pdf', dir=spool_dir)
+                spill = os.fdopen(fd, 'wb')
+                spill.write(buf.getvalue())
+                buf = None
+            (spill or buf).write(chunk)
+    finally:
+        if spill is not None:
+            spill.close()
+
+    if spill_path:
+        source = PdfSource(name, path=spill_path, digest=h.hexdigest(), size=size)
+    else:
+        source = PdfSource(name, data=buf.getvalue(), digest=h.hexdigest(), size=size)
+    source.pages = pages.close()
+    return source
+
+
+class UploadRejected(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def zip_too_large():
+    return UploadRejected(f"ZIP uploads may unpack to at most {app.config['ZIP_MAX_BYTES'] // (1024 * 1024)} MB.", 413)
+
+
+def is_zip_upload(file):
+    return file.filename.lower().endswith('.zip')
+
+
+def zip_pdf_members(archive):
+    # ফোল্ডার, macOS এর __MACOSX/._ ফাইল আর PDF ছাড়া অন্য কিছু বাদ; ক্রম আর্কাইভের মতোই
+    members = []
+    for info in archive.infolist():
+        base = info.filename.rsplit('/', 1)[-1]
+        if info.is_dir() or info.filename.startswith('__MACOSX/') or base.startswith('.'):
+            continue
+        if base.lower().endswith('.pdf'):
+            members.append(info)
+    return members
+
+
+def read_zip_upload(file, spool_dir, budget):
+    # ডিস্কে আনজিপ না করে প্রতিটি PDF সরাসরি আর্কাইভ থেকে পড়া হয়, সাধারণ আপলোডের মতোই
+    # মেমোরিতে (বড় হলে spool এ)। budget এ পুরো রিকোয়েস্টের বাকি মেম্বার সংখ্যা ও আনজিপ বাইট থাকে।
+    # হেডারের সাইজে ভরসা না করে আসল ডিকম্প্রেস হওয়া বাইট গোনা হয়, তাই zip bomb মাঝপথেই থামে
+    try:
+        archive = zipfile.ZipFile(file.stream)
+    except zipfile.BadZipFile:
+        raise UploadRejected(f"{file.filename} is not a valid ZIP archive.")
+    sources = []
+    with archive:
+        members = zip_pdf_members(archive)
+        if len(members) > budget['members']:
+            raise UploadRejected(f"ZIP uploads may contain at most {app.config['ZIP_MAX_MEMBERS']} PDF files.", 413)
+        budget['members'] -= len(members)
+        for info in members:
+            if info.file_size > budget['bytes']:
+                raise zip_too_large()
+            try:
+                with archive.open(info) as member:
+                    source = read_stream(info.filename, member, spool_dir, app.config['UPLOAD_SPOOL_MAX_BYTES'], budget['bytes'])
+            except (RuntimeError, NotImplementedError, zipfile.BadZipFile, zlib.error) as e:
+                # এনক্রিপ্টেড, অচেনা কম্প্রেশন বা নষ্ট মেম্বার
+                raise UploadRejected(f"Cannot read {info.filename} from {file.filename}: {e}")
+            budget['bytes'] -= source.size
+            sources.append(source)
+    return sources
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    if not app.config['EXTRACT_CACHE_PATH']:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ExtractionCache(app.config['EXTRACT_CACHE_PATH'], app.config['EXTRACT_CACHE_MAX_BYTES'])
+        return _cache
+
+
+# ==========================================
+#  PO STORE
+# ==========================================
+
+STORE_META_FIELDS = ['buyer', 'booking', 'style', 'season', 'dept', 'item']
+STORE_COLUMNS = {
+    'order_no': 'q.order_no', 'color': 'q.color', 'size': 'q.size',
+    'buyer': 'p.buyer', 'booking': 'p.booking', 'style': 'p.style',
+    'season': 'p.season', 'dept': 'p.dept', 'item': 'p.item',
+}
+
+
+class POStore:
+    # প্রতিটি PO নম্বরের সর্বশেষ আপলোডই থাকে: আবার আপলোড হলে আগের রো বদলে যায়, যোগ হয় না।
+    # মেটাডেটা N/A এলে (বুকিং ফাইল ছাড়া আপলোড) আগের জানা মান রেখে দেওয়া হয়
+    def __init__(self, path):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS purchase_orders ("
+                " order_no TEXT PRIMARY KEY, buyer TEXT, booking TEXT, style TEXT,"
+                " season TEXT, dept TEXT, item TEXT, updated REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS po_quantities ("
+                " order_no TEXT NOT NULL, color TEXT NOT NULL, size TEXT NOT NULL, quantity INTEGER NOT NULL,"
+                " PRIMARY KEY (order_no, color, size)) WITHOUT ROWID"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_po_style ON purchase_orders(style)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_po_season_style ON purchase_orders(season, style)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_po_quantities_color ON po_quantities(color)")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def save(self, all_data, meta):
+        quantities = {}
+        for po, color, size, qty in all_data.records():
+            # রিপোর্টের মতোই (prepare_frame) নামহীন কালারের রো বাদ
+            if color == "":
                 continue
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], file.filename)
-            file.save(file_path)
-            
-            data, meta = extract_data_dynamic(file_path)
-            
-            if meta['buyer'] != 'N/A':
-                final_meta = meta
-            
-            if data:
-                all_data.extend(data)
-        
-        if not all_data:
-            return render_template_string(RESULT_HTML, tables=None, message="No PO table data found.")
+            quantities[(po, color, size)] = quantities.get((po, color, size), 0) + qty
+        orders = sorted({key[0] for key in quantities})
+        values = [None if meta[field] == 'N/A' else meta[field] for field in STORE_META_FIELDS]
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO purchase_orders (order_no, buyer, booking, style, season, dept, item, updated)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(order_no) DO UPDATE SET "
+                + ', '.join(f"{field} = COALESCE(excluded.{field}, {field})" for field in STORE_META_FIELDS)
+                + ", updated = excluded.updated",
+                [[po] + values + [now] for po in orders],
+            )
+            conn.executemany("DELETE FROM po_quantities WHERE order_no = ?", [(po,) for po in orders])
+            conn.executemany(
+                "INSERT INTO po_quantities (order_no, color, size, quantity) VALUES (?, ?, ?, ?)",
+                [key + (qty,) for key, qty in quantities.items()],
+            )
+        return len(orders)
 
-        df = pd.DataFrame(all_data)
-        df['Color'] = df['Color'].str.strip()
-        df = df[df['Color'] != ""]
-        unique_colors = df['Color'].unique()
-        
-        final_tables = []
-        grand_total_qty = 0
+    @staticmethod
+    def _where(filters):
+        clauses = [f"{STORE_COLUMNS[column]} = ?" for column in filters]
+        return (' WHERE ' + ' AND '.join(clauses) if clauses else ''), list(filters.values())
 
-        for color in unique_colors:
-            color_df = df[df['Color'] == color]
-            pivot = color_df.pivot_table(index='P.O NO', columns='Size', values='Quantity', aggfunc='sum', fill_value=0)
-            
-            existing_sizes = pivot.columns.tolist()
-            sorted_sizes = sort_sizes(existing_sizes)
-            pivot = pivot[sorted_sizes]
-            
-            pivot['Total'] = pivot.sum(axis=1)
-            grand_total_qty += pivot['Total'].sum()
+    def totals(self, group_by, filters):
+        where, params = self._where(filters)
+        columns = [f"{STORE_COLUMNS[column]} AS {column}" for column in group_by]
+        sql = (
+            "SELECT " + ', '.join(columns + ['SUM(q.quantity) AS quantity', 'COUNT(DISTINCT q.order_no) AS orders'])
+            + " FROM po_quantities q JOIN purchase_orders p ON p.order_no = q.order_no" + where
+        )
+        if group_by:
+            sql += " GROUP BY " + ', '.join(STORE_COLUMNS[column] for column in group_by)
+            sql += " ORDER BY " + ', '.join(STORE_COLUMNS[column] for column in group_by)
+        with self._connect() as conn:
+            rows = [dict(row) for row in conn.execute(sql, params)]
+        if 'size' in group_by:
+            # সাইজ রিপোর্টের ক্রমেই, অক্ষর ক্রমে নয়
+            rows.sort(key=lambda row: [size_sort_key(row[c]) if c == 'size' else (row[c] is None, row[c] or '') for c in group_by])
+        return [row for row in rows if row['quantity'] is not None]
 
-            actual_qty = pivot.sum()
-            actual_qty.name = 'Actual Qty'
-            
-            qty_plus_3 = (actual_qty * 1.03).round().astype(int)
-            qty_plus_3.name = '3% Order Qty'
-            
-            pivot = pd.concat([pivot, actual_qty.to_frame().T, qty_plus_3.to_frame().T])
-            
+    def orders(self, filters):
+        where, params = self._where(filters)
+        sql = (
+            "SELECT p.order_no, " + ', '.join(f"p.{field}" for field in STORE_META_FIELDS)
+            + ", p.updated, SUM(q.quantity) AS quantity"
+            " FROM purchase_orders p JOIN po_quantities q ON q.order_no = p.order_no" + where
+            + " GROUP BY p.order_no ORDER BY p.order_no"
+        )
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(sql, params)]
+
+    def order(self, order_no):
+        with self._connect() as conn:
+            head = conn.execute("SELECT * FROM purchase_orders WHERE order_no = ?", (order_no,)).fetchone()
+            if head is None:
+                return None
+            rows = conn.execute(
+                "SELECT color, size, quantity FROM po_quantities WHERE order_no = ? ORDER BY color", (order_no,)
+            ).fetchall()
+        result = dict(head)
+        result['rows'] = [dict(row) for row in rows]
+        return result
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if not app.config['PO_STORE_PATH']:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = POStore(app.config['PO_STORE_PATH'])
+        return _store
+
+
+def store_results(all_data, meta):
+    # স্টোরে লেখা ব্যর্থ হলেও রিপোর্ট দেখানো বন্ধ হবে না
+    store = get_store()
+    if store is None or not all_data:
+        return
+    try:
+        store.save(all_data, meta)
+    except Exception as e:
+        app.logger.warning("Error saving to PO store: %s", e)
+
+
+def store_query_args(allowed_group_by=True):
+    filters = {}
+    for column in STORE_COLUMNS:
+        value = request.args.get(column)
+        if value is not None:
+            filters[column] = value
+    unknown = set(request.args) - set(STORE_COLUMNS) - {'group_by'}
+    if unknown:
+        abort(400, description=f"Unknown filter: {', '.join(sorted(unknown))}")
+    group_by = [c for c in request.args.get('group_by', '').split(',') if c] if allowed_group_by else []
+    for column in group_by:
+        if column not in STORE_COLUMNS:
+            abort(400, description=f"Unknown group_by column: {column}")
+    return group_by, filters
+
+
+SUMMARY_ROWS = ['Actual Qty', '3% Order Qty']
+
+
+def prepare_frame(all_data):
+    # কালারের নাম PORows এ ঢোকার সময়ই strip করা থাকে
+    df = all_data.to_frame()
+    return df[df['Color'] != ""]
+
+
+def consolidate_quantities(df):
+    import pandas as pd
+    quantities = df.groupby(['Color', 'P.O NO', 'Size'], observed=True)['Quantity'].sum()
+    # ক্যাটেগরিক্যাল লেভেল সাধারণ স্ট্রিং করে নেওয়া হয়, নাহলে পিভটে 'Total' কলাম যোগ করা যায় না
+    quantities.index = pd.MultiIndex.from_arrays(
+        [quantities.index.get_level_values(level).astype(object) for level in range(3)],
+        names=quantities.index.names,
+    )
+    return quantities.astype('int64')
+
+
+def build_color_pivots(df, quantities=None, colors=None):
+    # (Color, P.O NO, Size) এ একবারই groupby; প্রতি কালারের টেবিল, Total ও সামারি রো একসাথে হিসাব
+    import pandas as pd
+    if quantities is None:
+        quantities = consolidate_quantities(df)
+    wide = quantities.unstack('Size', fill_value=0)
+    wide['Total'] = wide.sum(axis=1)
+
+    actual_qty = wide.groupby(level='Color').sum()
+    qty_plus_3 = (actual_qty * 1.03).round().astype(int)
+
+    sizes_by_color = {}
+    for color, size in quantities.index.droplevel('P.O NO').unique():
+        sizes_by_color.setdefault(color, []).append(size)
+
+    if colors is None:
+        colors = df['Color'].unique() if df is not None else quantities.index.unique('Color')
+
+    # টেবিলগুলো lazily তৈরি হয়, যাতে স্ট্রিম মোডে একটা করে রেন্ডার হয়ে চলে যেতে পারে
+    def iter_pivots():
+        for color in colors:
+            columns = sort_sizes(sizes_by_color[color]) + ['Total']
+            pivot = wide.xs(color, level='Color')[columns]
+            summary = pd.DataFrame(
+                [actual_qty.loc[color, columns], qty_plus_3.loc[color, columns]],
+                index=SUMMARY_ROWS,
+            )
+            pivot = pd.concat([pivot, summary])
+            pivot.index.name = 'P.O NO'
             pivot = pivot.reset_index()
-            pivot = pivot.rename(columns={'index': 'P.O NO'})
             pivot.columns.name = None
+            yield color, pivot
 
-            pd.set_option('colheader_justify', 'center')
-            table_html = pivot.to_html(classes='table table-bordered table-striped', index=False, border=0)
-            
-            table_html = re.sub(r'<tr>\s*<td>', '<tr><td class="order-col">', table_html)
-            table_html = table_html.replace('<th>Total</th>', '<th class="total-col-header">Total</th>')
-            table_html = table_html.replace('<td>Total</td>', '<td class="total-col">Total</td>')
-            
-            table_html = table_html.replace('<td>Actual Qty</td>', '<td class="summary-label">Actual Qty</td>')
-            table_html = table_html.replace('<td>3% Order Qty</td>', '<td class="summary-label">3% Order Qty</td>')
-            table_html = re.sub(r'<tr>\s*<td class="summary-label">', '<tr class="summary-row"><td class="summary-label">', table_html)
+    return iter_pivots(), wide['Total'].sum()
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def pool_context():
+    # gthread ওয়ার্কারে অন্য থ্রেড কোনো লক (import, logging, sqlite) ধরে থাকা অবস্থায় fork হলে চাইল্ড চিরকাল আটকে যেতে পারে;
+    # forkserver/spawn এর চাইল্ড একক-থ্রেড প্রসেস থেকে আসে
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return multiprocessing.get_context('spawn')
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=app.config['EXTRACT_WORKERS'], mp_context=pool_context())
+        return _executor
+
+
+def reset_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _extract_serial(payloads, backend):
+    for payload in payloads:
+        yield extract_with_stats(payload, backend)
+
+
+def _merge_page_results(first_rows, stats, parts):
+    # টুকরোগুলো পেজের ক্রমেই জোড়া লাগে, তাই row order সিরিয়াল পার্সের মতোই
+    extracted_data = PORows()
+    extracted_data.extend(first_rows)
+    for rows, part_stats in parts:
+        extracted_data.extend(rows)
+        for key in ('pages_parsed', 'pages_skipped', 'text_seconds', 'parse_seconds'):
+            stats[key] = stats.get(key, 0) + part_stats.get(key, 0)
+        if 'error' in part_stats:
+            stats['error'] = part_stats['error']
+    stats['rows'] = len(extracted_data)
+    stats['page_tasks'] = len(parts)
+    metadata = {
+        'buyer': 'N/A', 'booking': 'N/A', 'style': 'N/A', 
+        'season': 'N/A', 'dept': 'N/A', 'item': 'N/A'
+    }
+    return extracted_data, metadata, stats
+
+
+def _extract_parallel(sources, backend):
+    # বড় PDF পেজের টুকরো হিসেবে, বাকিগুলো পুরো ফাইল হিসেবে একই পুলে যায়; ফলাফল ইনপুটের ক্রমেই
+    workers = app.config['EXTRACT_WORKERS']
+    splits = [prepare_page_split(s, workers) if backend == 'pypdf' else None for s in sources]
+    if len(sources) == 1 and splits[0] is None:
+        yield from _extract_serial([sources[0].payload], backend)
+        return
+
+    executor = get_executor()
+    plans = []
+    pending = []
+    spilled = []
+    try:
+        for source, split in zip(sources, splits):
+            if split is None:
+                future = executor.submit(extract_with_stats, source.payload, backend)
+                pending.append(future)
+                plans.append((None, future))
+                continue
+            order_no, first_rows, stats, ranges = split
+            path = source.path
+            if path is None:
+                # মেমোরিতে থাকা আপলোড temp ফাইলে লেখা হয়, যাতে প্রতিটি ওয়ার্কার নিজে খুলতে পারে
+                with tempfile.NamedTemporaryFile(prefix='po-split-', suffix='.pdf', delete=False) as f:
+                    spilled.append(f.name)
+                    f.write(source.data)
+                path = f.name
+            futures = [executor.submit(extract_page_range, path, start, stop, order_no) for start, stop in ranges]
+            pending.extend(futures)
+            plans.append(((first_rows, stats), futures))
+
+        for split, work in plans:
+            if split is None:
+                yield work.result()
+            else:
+                yield _merge_page_results(split[0], split[1], [f.result() for f in work])
+    finally:
+        # মাঝপথে থেমে গেলে (যেমন BrokenProcessPool) বাকি কাজ আর চালানোর দরকার নেই
+        for future in pending:
+            future.cancel()
+        for path in spilled:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def _extract_uncached(sources, on_done=None, backend='pypdf', queued=True):
+    # ক্যাশে না থাকা ফাইলগুলোর পেজ গুনে, পেজের সীমার মধ্যে জায়গা পেলে তবেই পার্স (Admission দেখুন)
+    if not sources or app.config['EXTRACT_MAX_PAGES'] <= 0:
+        return _extract_admitted(sources, on_done, backend)
+    with ADMISSION.admit(sum(estimate_pages(s) for s in sources), queued):
+        return _extract_admitted(sources, on_done, backend)
+
+
+def _extract_admitted(sources, on_done=None, backend='pypdf'):
+    payloads = [s.payload for s in sources]
+    results = []
+    try:
+        if app.config['EXTRACT_WORKERS'] <= 1 or (len(payloads) <= 1 and backend != 'pypdf'):
+            produced = _extract_serial(payloads, backend)
+        else:
+            produced = _extract_parallel(sources, backend)
+        for data, meta, stats in produced:
+            record_extract_stats(stats)
+            results.append((data, meta))
+            if on_done is not None:
+                on_done(len(results) - 1, stats)
+    except BrokenProcessPool:
+        reset_executor()
+        for data, meta, stats in _extract_serial(payloads[len(results):], backend):
+            record_extract_stats(stats)
+            results.append((data, meta))
+            if on_done is not None:
+                on_done(len(results) - 1, stats)
+    return results
+
+
+def extract_all(sources, on_done=None, backend=None, queued=True):
+    # ফলাফল সবসময় ইনপুটের ক্রমেই ফেরত আসে, তাই final_meta ও row order আগের মতোই থাকে
+    # on_done(idx, stats) প্রতিটি ফাইল শেষ হলে ডাকা হয় (জবের প্রগ্রেস ও টাইমিংয়ের জন্য)
+    # লাইন ভরা থাকলে বা অপেক্ষা টাইমআউট হলে ExtractionBusy (queued=False হলে শুধু অপেক্ষা)
+    backend = backend or app.config['EXTRACT_BACKEND']
+    cache = get_cache()
+    if cache is None:
+        return _extract_uncached(sources, on_done, backend, queued)
+
+    results = [None] * len(sources)
+    missing = []
+    for idx, source in enumerate(sources):
+        results[idx] = cache.get(source.digest, backend)
+        if results[idx] is None:
+            missing.append(idx)
+        elif on_done is not None:
+            on_done(idx, {'cache': 'hit'})
+
+    failed = set()
+
+    def fresh_done(pos, stats):
+        if 'error' in stats:
+            failed.add(missing[pos])
+        if on_done is not None:
+            on_done(missing[pos], dict(stats, cache='miss'))
+
+    fresh = _extract_uncached([sources[idx] for idx in missing], fresh_done, backend, queued)
+    for idx, (data, meta) in zip(missing, fresh):
+        # পার্স ব্যর্থ হলে (খালি বা অর্ধেক রো) ক্যাশ হয় না, পরের আপলোডে আবার চেষ্টা হবে
+        if idx not in failed:
+            cache.put(sources[idx].digest, data, meta, backend)
+        results[idx] = (data, meta)
+    return results
+
+
+def read_uploads(uploaded_files, spool_dir):
+    sources = []
+    budget = {'members': app.config['ZIP_MAX_MEMBERS'], 'bytes': app.config['ZIP_MAX_BYTES']}
+    for file in uploaded_files:
+        if file.filename == '':
+            continue
+        if is_zip_upload(file):
+            sources.extend(read_zip_upload(file, spool_dir, budget))
+        else:
+            sources.append(read_upload(file, spool_dir, app.config['UPLOAD_SPOOL_MAX_BYTES']))
+    return sources
+
+
+def new_dedupe_report():
+    return {'files_skipped': 0, 'blocks_merged': 0, 'blocks_conflicting': []}
+
+
+def skip_duplicate_files(sources, dedupe):
+    # একই বাইটের ফাইল দুবার এলে দ্বিতীয়টা পার্সই হয় না
+    seen = set()
+    unique = []
+    for source in sources:
+        if source.digest in seen:
+            dedupe['files_skipped'] += 1
+            continue
+        seen.add(source.digest)
+        unique.append(source)
+    return unique
+
+
+def merge_results(results, dedupe=None):
+    # dedupe দিলে আলাদা ফাইলে হুবহু একই (P.O NO, Color) ব্লক একবারই যোগ হয়,
+    # আর একই ব্লক ভিন্ন সংখ্যা নিয়ে এলে দুটোই রাখা হয় কিন্তু রিপোর্টে ফ্ল্যাগ হয়।
+    # নতুন কপি আগে রাখা সব ভ্যারিয়েন্টের সাথে মেলানো হয়, শুধু প্রথমটার সাথে নয়
+    all_data = PORows()
+    final_meta = {
+        'buyer': 'N/A', 'booking': 'N/A', 'style': 'N/A',
+        'season': 'N/A', 'dept': 'N/A', 'item': 'N/A'
+    }
+    seen_blocks = {}
+    for file_idx, (data, meta) in enumerate(results):
+        if meta['buyer'] != 'N/A':
+            final_meta = meta
+        if not data:
+            continue
+        if dedupe is None:
+            all_data.extend(data)
+            continue
+
+        for key, indices in data.blocks().items():
+            fingerprint = data.fingerprint(indices)
+            kept = seen_blocks.setdefault(key, set())
+            if fingerprint in kept:
+                dedupe['blocks_merged'] += 1
+                continue
+            if kept:
+                dedupe['blocks_conflicting'].append(key)
+            kept.add(fingerprint)
+            all_data.extend(data, indices)
+    return all_data, final_meta
+
+
+def dedupe_message(dedupe):
+    parts = []
+    if dedupe['files_skipped']:
+        parts.append(f"Skipped {dedupe['files_skipped']} duplicate file(s).")
+    if dedupe['blocks_merged']:
+        parts.append(f"Merged {dedupe['blocks_merged']} repeated PO colour block(s).")
+    if dedupe['blocks_conflicting']:
+        listed = ', '.join(f"PO {po} / {color}" for po, color in dedupe['blocks_conflicting'][:5])
+        parts.append(f"{len(dedupe['blocks_conflicting'])} PO colour block(s) differ between files and were added together: {listed}.")
+    return ' '.join(parts) or None
+
+
+def render_table_html(pivot):
+    # CSS ক্লাসগুলো সরাসরি বসানো হয়, পরে regex দিয়ে HTML প্যাচ করার দরকার নেই
+    columns = list(pivot.columns)
+    total_pos = columns.index('Total') if 'Total' in columns else -1
+
+    out = ['<table class="table table-bordered table-striped">', '<thead>', '<tr style="text-align: center;">']
+    for pos, col in enumerate(columns):
+        cls = ' class="total-col-header"' if pos == total_pos else ''
+        out.append(f'<th{cls}>{html.escape(str(col))}</th>')
+    out += ['</tr>', '</thead>', '<tbody>']
+
+    for row in pivot.itertuples(index=False, name=None):
+        if row[0] in SUMMARY_ROWS:
+            out.append(f'<tr class="summary-row"><td class="summary-label">{html.escape(str(row[0]))}</td>')
+        else:
+            out.append(f'<tr><td class="order-col">{html.escape(str(row[0]))}</td>')
+        for pos in range(1, len(row)):
+            cls = ' class="total-col"' if pos == total_pos else ''
+            out.append(f'<td{cls}>{row[pos]}</td>')
+        out.append('</tr>')
+
+    out += ['</tbody>', '</table>']
+    return '\n'.join(out)
+
+
+def build_report(all_data, final_meta, df=None, quantities=None, lazy=False):
+    if not all_data:
+        return None
+
+    if df is None:
+        df = prepare_frame(all_data)
+    pivots, grand_total_qty = build_color_pivots(df, quantities)
+    final_tables = ({'color': color, 'table': render_table_html(pivot)} for color, pivot in pivots)
+    if not lazy:
+        final_tables = list(final_tables)
+
+    return {'tables': final_tables, 'meta': final_meta, 'grand_total': f"{grand_total_qty:,}"}
+
+
+# ==========================================
+#  MACHINE-READABLE EXPORT
+# ==========================================
+
+EXPORT_FORMATS = {
+    'json': 'application/json',
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+EXPORT_COLUMNS = ['P.O NO', 'Color', 'Size', 'Quantity']
+META_COLUMNS = [
+    ('buyer', 'Buyer'), ('booking', 'Booking'), ('style', 'Style'),
+    ('season', 'Season'), ('dept', 'Dept'), ('item', 'Item'),
+]
+
+
+def iter_export_chunks(quantities, chunk_rows):
+    if quantities is None:
+        return
+    for start in range(0, len(quantities), chunk_rows):
+        yield quantities.iloc[start:start + chunk_rows].reset_index()[EXPORT_COLUMNS]
+
+
+def _with_meta_columns(chunk, meta):
+    for pos, (key, label) in enumerate(META_COLUMNS):
+        chunk.insert(pos, label, meta[key])
+    return chunk
+
+
+def stream_json(quantities, meta, chunk_rows):
+    yield '{"meta": ' + json.dumps(meta) + ', "rows": ['
+    first = True
+    for chunk in iter_export_chunks(quantities, chunk_rows):
+        body = chunk.to_json(orient='records')[1:-1]
+        yield body if first else ',' + body
+        first = False
+    yield ']}'
+
+
+def stream_csv(quantities, meta, chunk_rows):
+    header = True
+    for chunk in iter_export_chunks(quantities, chunk_rows):
+        yield _with_meta_columns(chunk, meta).to_csv(index=False, header=header)
+        header = False
+    if header:
+        yield ','.join([label for _, label in META_COLUMNS] + EXPORT_COLUMNS) + '\n'
+
+
+class _StreamSink(io.RawIOBase):
+    # ParquetWriter এখানে লেখে, আর প্রতিটি row group এর পর জমা বাইট ছেড়ে দেওয়া হয়
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._pos = 0
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._chunks.append(bytes(b))
+        self._pos += len(b)
+        return len(b)
+
+    def tell(self):
+        return self._pos
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_parquet(quantities, meta, chunk_rows):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema(
+        [(label, pa.string()) for _, label in META_COLUMNS]
+        + [('P.O NO', pa.string()), ('Color', pa.string()), ('Size', pa.string()), ('Quantity', pa.int64())]
+    )
+    sink = _StreamSink()
+    writer = pq.ParquetWriter(sink, schema)
+    for chunk in iter_export_chunks(quantities, chunk_rows):
+        writer.write_table(pa.Table.from_pandas(_with_meta_columns(chunk, meta), schema=schema, preserve_index=False))
+        data = sink.drain()
+        if data:
+            yield data
+    writer.close()
+    yield sink.drain()
+
+
+EXPORT_WRITERS = {'json': stream_json, 'csv': stream_csv, 'parquet': stream_parquet}
+
+XLSX_META_FIELDS = [
+    ('Buyer', 'buyer'), ('Season', 'season'), ('Booking No', 'booking'),
+    ('Department', 'dept'), ('Style', 'style'), ('Item', 'item'),
+]
+
+
+def write_xlsx_report(path, quantities, meta, colors=None):
+    # HTML রিপোর্টের মতোই: উপরে মেটাডেটা, তারপর প্রতি কালারের টেবিল (সাইজ ক্রম, Total, সামারি রো)।
+    # constant_memory মোডে প্রতিটি রো লেখার সাথে সাথে ডিস্কে চলে যায়, তাই রো ক্রমানুসারেই লিখতে হয়
+    import xlsxwriter
+
+    workbook = xlsxwriter.Workbook(path, {'constant_memory': True})
+    title = workbook.add_format({'bold': True, 'font_size': 14})
+    label = workbook.add_format({'bold': True, 'font_color': '#475569'})
+    color_title = workbook.add_format({'bold': True, 'font_color': '#ffffff', 'bg_color': '#1e293b'})
+    header = workbook.add_format({'bold': True, 'bg_color': '#f1f5f9', 'border': 1, 'align': 'center'})
+    cell = workbook.add_format({'border': 1, 'align': 'center'})
+    order_cell = workbook.add_format({'border': 1, 'bold': True})
+    total_cell = workbook.add_format({'border': 1, 'align': 'center', 'bold': True, 'bg_color': '#d1fae5'})
+    summary = workbook.add_format({'border': 1, 'align': 'center', 'bold': True, 'bg_color': '#fef3c7'})
+
+    sheet = workbook.add_worksheet('PO Report')
+    sheet.set_column(0, 0, 22)
+    sheet.set_column(1, 30, 10)
+
+    sheet.write(0, 0, 'Cotton Clothing BD Limited', title)
+    sheet.write(1, 0, 'Purchase Order Summary Report')
+    row = 3
+    for name, key in XLSX_META_FIELDS:
+        sheet.write(row, 0, name, label)
+        sheet.write(row, 1, meta[key])
+        row += 1
+    sheet.write(row, 0, 'Grand Total', label)
+    sheet.write_number(row, 1, int(quantities.sum()) if quantities is not None else 0)
+    row += 2
+
+    if quantities is not None:
+        pivots, _ = build_color_pivots(None, quantities, colors)
+        for color, pivot in pivots:
+            sheet.write(row, 0, f"Color: {color}", color_title)
+            row += 1
+            columns = list(pivot.columns)
+            total_pos = columns.index('Total')
+            sheet.write_row(row, 0, columns, header)
+            row += 1
+            for values in pivot.itertuples(index=False, name=None):
+                is_summary = values[0] in SUMMARY_ROWS
+                sheet.write(row, 0, values[0], summary if is_summary else order_cell)
+                for pos in range(1, len(values)):
+                    fmt = summary if is_summary else total_cell if pos == total_pos else cell
+                    sheet.write_number(row, pos, int(values[pos]), fmt)
+                row += 1
+            row += 1
+
+    workbook.close()
+
+
+def stream_xlsx(quantities, meta, colors=None, chunk_bytes=64 * 1024):
+    # xlsx zip ফাইল শেষ না হলে পাঠানো যায় না; temp ফাইলে লিখে টুকরো করে পাঠিয়ে মুছে ফেলা হয়
+    fd, path = tempfile.mkstemp(prefix='po-export-', suffix='.xlsx')
+    os.close(fd)
+    try:
+        write_xlsx_report(path, quantities, meta, colors)
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_bytes), b''):
+                yield chunk
+    finally:
+        os.remove(path)
+
+
+def xlsxwriter_available():
+    try:
+        import xlsxwriter  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def export_response(quantities, meta, fmt, dedupe=None, colors=None):
+    if fmt == 'parquet':
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            return jsonify({'error': 'Parquet export needs pyarrow installed on the server.'}), 501
+    if fmt == 'xlsx':
+        if not xlsxwriter_available():
+            return jsonify({'error': 'Excel export needs xlsxwriter installed on the server.'}), 501
+        stream = stream_xlsx(quantities, meta, colors)
+    else:
+        stream = EXPORT_WRITERS[fmt](quantities, meta, app.config['EXPORT_CHUNK_ROWS'])
+    headers = {'Content-Disposition': f'attachment; filename=po_export.{fmt}'}
+    if dedupe is not None:
+        headers['X-PO-Duplicate-Files'] = str(dedupe['files_skipped'])
+        headers['X-PO-Merged-Blocks'] = str(dedupe['blocks_merged'])
+        headers['X-PO-Conflicting-Blocks'] = str(len(dedupe['blocks_conflicting']))
+    return Response(stream, mimetype=EXPORT_FORMATS[fmt], headers=headers)
+
+
+def render_report(report, stream=False, timing=None):
+    if report is None:
+        return render_template('result.html', tables=None, message="No PO table data found.")
+    if stream:
+        # হেডার ও মেটাডেটা আগে যায়, তারপর প্রতিটি কালার টেবিল তৈরি হওয়া মাত্র পাঠানো হয়।
+        # প্রতি কালারের পিভট আর HTML এখানেই তৈরি হয়, তাই render স্টেজ পুরো স্ট্রিম ধরে মাপা হয়
+        chunks = stream_template('result.html', timing=timing, **report)
+        return Response(request_timer().stream('render', chunks), mimetype='text/html')
+    return render_template('result.html', timing=timing, **report)
+
+
+def wants_stream():
+    return app.config['STREAM_RESULTS'] or request.values.get('stream') == '1'
+
+
+# ==========================================
+#  ADMISSION CONTROL
+# ==========================================
+
+class ExtractionBusy(Exception):
+    pass
+
+
+_PDF_PAGE_RE = re.compile(rb'/Type\s*/Page(?![A-Za-z])')
+
+
+class PageCounter:
+    # /Type /Page টুকরো টুকরো গোনা, পুরো ফাইল মেমোরিতে আনতে হয় না।
+    # প্রতিটি টুকরোর শেষ কয়েক বাইট পরের টুকরোর সাথে আবার দেখা হয়, তাই সীমানায় ভাঙা মিলও গোনা হয়
+    OVERLAP = 64
+
+    def __init__(self):
+        self.pages = 0
+        self._tail = b''
+
+    def feed(self, chunk):
+        buf = self._tail + chunk
+        limit = len(buf) - self.OVERLAP
+        for match in _PDF_PAGE_RE.finditer(buf):
+            if match.start() >= limit:
+                break
+            self.pages += 1
+        self._tail = buf[max(limit, 0):]
+
+    def close(self):
+        self.pages += sum(1 for _ in _PDF_PAGE_RE.finditer(self._tail))
+        self._tail = b''
+        return self.pages
+
+
+def estimate_pages(source):
+    # আপলোড পড়ার সময়ই (read_stream) গোনা হয়ে থাকে; পেজ object stream এ লুকানো থাকলে তবেই pypdf
+    if source.pages is None:
+        source.pages = scan_pages(source)
+    if source.pages == 0:
+        source.pages = _reader_pages(source)
+    return source.pages
+
+
+def scan_pages(source):
+    if source.data is not None:
+        return sum(1 for _ in _PDF_PAGE_RE.finditer(source.data))
+    counter = PageCounter()
+    with open(source.path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            counter.feed(chunk)
+    return counter.close()
+
+
+def _reader_pages(source):
+    import pypdf
+    try:
+        return max(1, len(pypdf.PdfReader(io.BytesIO(source.data) if source.data is not None else source.path).pages))
+    except Exception:
+        return 1
+
+
+class Admission:
+    # প্রসেস-লোকাল: এই ওয়ার্কারে এখন কত পেজ পার্স হচ্ছে আর কে কে লাইনে আছে।
+    # লাইন FIFO, তাই বড় ব্যাচ ছোটগুলোর পেছনে অনন্তকাল আটকে থাকে না
+    def __init__(self):
+        self._cond = threading.Condition()
+        self.pages_in_flight = 0
+        self.waiting = deque()
+        # রিকোয়েস্ট থ্রেডে চলা আপলোড (বডি পড়া থেকে রেসপন্স পর্যন্ত) আর তাদের মধ্যে লাইনে কতগুলো; জব এখানে গোনা হয় না
+        self.uploads = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+
+    def check(self):
+        # আপলোড পড়ার আগেই: থ্রেডগুলো সব আপলোডে গেলে বা নতুন কাউকে অপেক্ষা করতে হবে অথচ লাইন ভরা, তাহলে সাথে সাথে 503।
+        # পাস করলে রিকোয়েস্ট শেষ হওয়া পর্যন্ত একটা আপলোড জায়গা ধরে রাখে (release দেখুন)
+        limit = app.config['EXTRACT_MAX_PAGES']
+        if limit <= 0:
+            return
+        with self._cond:
+            busy = self.waiting or self.pages_in_flight >= limit
+            if (self.uploads >= max(1, app.config['REQUEST_THREADS'] - 1)
+                    or busy and self.queued >= app.config['EXTRACT_QUEUE_SIZE']):
+                self.rejected += 1
+                raise ExtractionBusy()
+            self.uploads += 1
+        g.upload_slot = True
+
+    def release(self):
+        with self._cond:
+            self.uploads -= 1
+
+    def _fits(self, pages):
+        # সীমার চেয়ে বড় একটা ব্যাচও চলতে পারে, যদি তখন আর কিছু না চলে
+        return self.pages_in_flight == 0 or self.pages_in_flight + pages <= app.config['EXTRACT_MAX_PAGES']
+
+    @contextlib.contextmanager
+    def admit(self, pages, queued=True):
+        # queued=False (ব্যাকগ্রাউন্ড জব): লাইনের সীমা বা টাইমআউট নেই, শুধু ক্রম মেনে অপেক্ষা
+        started = time.perf_counter()
+        with self._cond:
+            if self.waiting or not self._fits(pages):
+                if queued and self.queued >= app.config['EXTRACT_QUEUE_SIZE']:
+                    self.rejected += 1
+                    raise ExtractionBusy()
+                deadline = time.monotonic() + app.config['EXTRACT_QUEUE_TIMEOUT'] if queued else None
+                ticket = object()
+                self.waiting.append(ticket)
+                self.queued += queued
+                try:
+                    while self.waiting[0] is not ticket or not self._fits(pages):
+                        remaining = None if deadline is None else deadline - time.monotonic()
+                        if remaining is not None and remaining <= 0:
+                            self.rejected += 1
+                            raise ExtractionBusy()
+                        self._cond.wait(remaining)
+                finally:
+                    self.waiting.remove(ticket)
+                    self.queued -= queued
+                    self._cond.notify_all()
+            self.pages_in_flight += pages
+            self.admitted += 1
+            self.wait_seconds += time.perf_counter() - started
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.pages_in_flight -= pages
+                self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                'pages_in_flight': self.pages_in_flight, 'waiting': len(self.waiting), 'uploads': self.uploads,
+                'admitted': self.admitted, 'rejected': self.rejected, 'wait_seconds': self.wait_seconds,
+            }
+
+
+ADMISSION = Admission()
+
+
+# ==========================================
+#  BACKGROUND JOBS
+# ==========================================
+
+class Job:
+    def __init__(self, sources, spool_dir, backend=None, dedupe=None):
+        self.id = uuid.uuid4().hex
+        self.backend = backend
+        self.dedupe = dedupe if dedupe is not None else new_dedupe_report()
+        self.status = 'queued'
+        self.created = time.time()
+        self.finished = None
+        self.files = [{'name': s.name, 'status': 'queued'} for s in sources]
+        self.all_data = None
+        self.meta = None
+        self.error = None
+        self.sources = sources
+        self.spool_dir = spool_dir
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'files_done': sum(1 for f in self.files if f['status'] == 'done'),
+            'files_total': len(self.files),
+            'files': [dict(f) for f in self.files],
+            'duplicate_files_skipped': self.dedupe['files_skipped'],
+            'duplicate_blocks_merged': self.dedupe['blocks_merged'],
+            'conflicting_blocks': [{'P.O NO': po, 'Color': color} for po, color in self.dedupe['blocks_conflicting']],
+            'error': self.error,
+        }
+
+    def state(self):
+        return {
+            'backend': self.backend, 'status': self.status, 'created': self.created, 'finished': self.finished,
+            'files': self.files, 'dedupe': self.dedupe, 'error': self.error,
+        }
+
+    @classmethod
+    def from_record(cls, job_id, state, result):
+        job = cls([], None, state['backend'], state['dedupe'])
+        job.id = job_id
+        job.status = state['status']
+        job.created = state['created']
+        job.finished = state['finished']
+        job.files = state['files']
+        job.error = state['error']
+        if result is not None:
+            job.all_data = PORows.from_payload(result['rows'])
+            job.meta = result['meta']
+        return job
+
+    def report(self):
+        # রিপোর্ট যে ওয়ার্কার রেজাল্ট চায় সেখানেই স্টোরের রো থেকে তৈরি হয়
+        report = build_report(self.all_data, self.meta)
+        if report is not None:
+            report['message'] = dedupe_message(self.dedupe)
+        return report
+
+    def export_data(self):
+        if not self.all_data:
+            return None, None
+        df = prepare_frame(self.all_data)
+        return consolidate_quantities(df), list(df['Color'].unique())
+
+
+class JobStore:
+    # জবের অবস্থা আর ফলাফল SQLite এ, তাই যেকোনো gunicorn ওয়ার্কার স্ট্যাটাস/রেজাল্ট দিতে পারে।
+    # জব নিজে চলে যে ওয়ার্কার আপলোড নিয়েছে তার থ্রেডে
+    def __init__(self, path):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY, state TEXT NOT NULL, result BLOB, finished REAL, pid INTEGER, heartbeat REAL)"
+            )
+            # আগের ভার্সনের ফাইলে pid/heartbeat কলাম নেই
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, kind in (('pid', 'INTEGER'), ('heartbeat', 'REAL')):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_finished ON jobs(finished)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def save(self, job):
+        result = None
+        if job.status == 'done':
+            payload = {'rows': (job.all_data or PORows()).to_payload(), 'meta': job.meta}
+            result = zlib.compress(json.dumps(payload, separators=(',', ':')).encode('utf-8'))
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO jobs (id, state, result, finished, pid, heartbeat) VALUES (?, ?, ?, ?, ?, ?)",
+                (job.id, json.dumps(job.state()), result, job.finished, os.getpid(), time.time()),
+            )
+
+    def beat(self, job_ids):
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE jobs SET heartbeat = ? WHERE id = ? AND finished IS NULL", [(now, job_id) for job_id in job_ids],
+            )
+
+    def load(self, job_id, stale_cutoff=None):
+        with self._connect() as conn:
+            row = conn.execute("SELECT state, result, pid, heartbeat FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        result = json.loads(zlib.decompress(row[1])) if row[1] is not None else None
+        job = Job.from_record(job_id, json.loads(row[0]), result)
+        # চালানো ওয়ার্কার মারা গেলে জব কখনো শেষ হবে না; অনেকক্ষণ heartbeat না থাকলে failed করে রাখা হয়
+        if job.finished is None and stale_cutoff is not None and (row[3] or 0) < stale_cutoff:
+            job.status = 'failed'
+            job.error = f"The worker running this job (pid {row[2]}) stopped before it finished."
+            job.finished = time.time()
+            self.save(job)
+        return job
+
+    def purge(self, cutoff):
+        # শেষ না হওয়া জবও, যদি তার heartbeat এত পুরনো হয়
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM jobs WHERE finished < ? OR (finished IS NULL AND COALESCE(heartbeat, 0) < ?)",
+                (cutoff, cutoff),
+            )
+
+
+_job_store = None
+_jobs_lock = threading.Lock()
+_job_runner = None
+# এই প্রসেসে লাইনে থাকা বা চলা জব; heartbeat থ্রেড এদের জন্য স্টোরে জানান দেয়
+_live_jobs = set()
+
+
+def get_job_store():
+    global _job_store
+    with _jobs_lock:
+        if _job_store is None:
+            _job_store = JobStore(app.config['JOB_STORE_PATH'])
+        return _job_store
+
+
+def get_job_runner():
+    global _job_runner
+    with _jobs_lock:
+        if _job_runner is None:
+            _job_runner = ThreadPoolExecutor(max_workers=app.config['JOB_RUNNERS'], thread_name_prefix='po-job')
+            threading.Thread(target=_beat_jobs, name='po-job-heartbeat', daemon=True).start()
+        return _job_runner
+
+
+def _beat_jobs():
+    while True:
+        time.sleep(app.config['JOB_HEARTBEAT_SECONDS'])
+        with _jobs_lock:
+            live = list(_live_jobs)
+        if not live:
+            continue
+        try:
+            get_job_store().beat(live)
+        except sqlite3.Error:
+            app.logger.exception("Could not record the heartbeat of %d job(s)", len(live))
+
+
+def run_job(job):
+    store = get_job_store()
+    job.status = 'running'
+    for f in job.files:
+        f['status'] = 'running'
+    store.save(job)
+
+    def on_done(idx, stats):
+        job.files[idx]['status'] = 'done'
+        store.save(job)
+
+    try:
+        results = extract_all(job.sources, on_done, job.backend, queued=False)
+        job.all_data, job.meta = merge_results(results, job.dedupe)
+        store_results(job.all_data, job.meta)
+        job.status = 'done'
+    except Exception as e:
+        app.logger.exception("Error running job %s", job.id)
+        job.error = str(e)
+        job.status = 'failed'
+    finally:
+        job.finished = time.time()
+        job.sources = None
+        shutil.rmtree(job.spool_dir, ignore_errors=True)
+        with _jobs_lock:
+            _live_jobs.discard(job.id)
+    store.save(job)
+
+
+def submit_job(sources, spool_dir, backend=None):
+    dedupe = new_dedupe_report()
+    job = Job(skip_duplicate_files(sources, dedupe), spool_dir, backend, dedupe)
+    store = get_job_store()
+    store.purge(time.time() - app.config['JOB_TTL_SECONDS'])
+    store.save(job)
+    runner = get_job_runner()
+    with _jobs_lock:
+        _live_jobs.add(job.id)
+    runner.submit(run_job, job)
+    return job
+
+
+def get_job(job_id):
+    return get_job_store().load(job_id, time.time() - app.config['JOB_STALE_SECONDS'])
+
+
+# ==========================================
+#  BATCH SESSIONS
+# ==========================================
+
+class Batch:
+    # ফাইলভিত্তিক রো রাখা থাকে; ফাইল যোগ/বাদ দিলে শুধু সেই ফাইলের কালারগুলোর টেবিল আবার তৈরি হয়।
+    # files[digest]['rows'] None মানে রো স্টোর থেকে লোড করা হয়নি (শুধু দেখানোর জন্য খোলা)
+    def __init__(self, backend=None):
+        self.id = uuid.uuid4().hex
+        self.backend = backend
+        self.files = {}
+        self.meta = None
+        self.colors = []
+        self.tables = {}
+        self.color_totals = {}
+        self.files_skipped = 0
+        self.dedupe = new_dedupe_report()
+        self.touched = time.time()
+        self.added = []
+        self.removed = []
+
+    def pending(self, sources):
+        # নতুন আপলোডের মধ্যে বা ব্যাচে আগে থেকেই থাকা একই ফাইল আবার পার্স হয় না
+        dedupe = new_dedupe_report()
+        unique = skip_duplicate_files(sources, dedupe)
+        fresh = [s for s in unique if s.digest not in self.files]
+        return fresh, dedupe['files_skipped'] + len(unique) - len(fresh)
+
+    def add(self, sources, results, skipped=0):
+        self.files_skipped = skipped
+        affected = set()
+        for source, (data, meta) in zip(sources, results):
+            if source.digest in self.files:
+                # পার্সের মাঝে অন্য রিকোয়েস্ট একই ফাইল যোগ করে ফেলেছে
+                self.files_skipped += 1
+                continue
+            self.files[source.digest] = {'name': source.name, 'rows': data, 'meta': meta, 'row_count': len(data)}
+            self.added.append(source.digest)
+            affected.update(data.categories[1])
+        self.refresh(affected)
+        if self.added:
+            # স্টোর PO ধরে পুরো রো বদলায়, তাই শুধু নতুন ফাইল নয়, পুরো ব্যাচের dedupe করা merge যায়
+            store_results(self.merge(), self.meta)
+
+    def remove(self, digest):
+        entry = self.files.pop(digest, None)
+        self.files_skipped = 0
+        if entry is not None:
+            self.removed.append(digest)
+            self.refresh(set(entry['rows'].categories[1]))
+        return entry is not None
+
+    def refresh(self, affected):
+        # পিভট আর HTML শুধু affected কালারগুলোর জন্য আবার তৈরি হয়
+        df = self.frame()
+        self.colors = list(df['Color'].unique())
+        for color in affected:
+            self.tables.pop(color, None)
+            self.color_totals.pop(color, None)
+
+        subset = df[df['Color'].isin(affected)]
+        if len(subset):
+            pivots, _ = build_color_pivots(subset)
+            for color, pivot in pivots:
+                self.tables[color] = render_table_html(pivot)
+                self.color_totals[color] = int(pivot.loc[pivot['P.O NO'] == SUMMARY_ROWS[0], 'Total'].iloc[0])
+        self.touched = time.time()
+
+    def merge(self):
+        # merge সস্তা (শুধু কোড জোড়া); খরচের অংশ পিভট আর HTML
+        self.dedupe = new_dedupe_report()
+        all_data, self.meta = merge_results([(f['rows'], f['meta']) for f in self.files.values()], self.dedupe)
+        return all_data
+
+    def frame(self):
+        return prepare_frame(self.merge())
+
+    def report(self):
+        if not self.colors:
+            return None
+        return {
+            'tables': [{'color': color, 'table': self.tables[color]} for color in self.colors],
+            'meta': self.meta,
+            'grand_total': f"{sum(self.color_totals[color] for color in self.colors):,}",
+        }
+
+    def message(self):
+        dedupe = dict(self.dedupe, files_skipped=self.files_skipped)
+        return dedupe_message(dedupe)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'files': [
+                {'digest': digest, 'name': f['name'], 'rows': f['row_count']}
+                for digest, f in self.files.items()
+            ],
+        }
+
+    def state(self):
+        return {
+            'backend': self.backend, 'meta': self.meta, 'colors': self.colors, 'tables': self.tables,
+            'color_totals': self.color_totals, 'files_skipped': self.files_skipped, 'dedupe': self.dedupe,
+        }
+
+
+class BatchStore:
+    # ব্যাচ SQLite এ থাকে, তাই সেশন কুকি যে ওয়ার্কারেই যাক একই ব্যাচ পায়।
+    # টেবিলের HTML ব্যাচের সাথে রাখা হয়; ফাইলের রো আলাদা টেবিলে, শুধু যোগ/বাদ/এক্সপোর্টে লোড হয়
+    def __init__(self, path):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS batches ("
+                " id TEXT PRIMARY KEY, state TEXT NOT NULL, touched REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS batch_files ("
+                " batch_id TEXT NOT NULL, digest TEXT NOT NULL, name TEXT NOT NULL,"
+                " row_count INTEGER NOT NULL, payload BLOB NOT NULL, PRIMARY KEY (batch_id, digest))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_batches_touched ON batches(touched)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def create(self, batch):
+        with self._connect() as conn:
+            self._save(conn, batch)
+
+    def load(self, batch_id, rows=False):
+        with self._connect() as conn:
+            return self._load(conn, batch_id, rows)
+
+    @contextlib.contextmanager
+    def edit(self, batch_id):
+        # যোগ/বাদ এক ট্রানজ্যাকশনে: একই ব্যাচে একসাথে দুটো পরিবর্তন এলে একটা অন্যটার পরে চলে
+        conn = self._connect()
+        conn.isolation_level = None
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                batch = self._load(conn, batch_id, rows=True)
+                yield batch
+                if batch is not None:
+                    self._save(conn, batch)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def touch(self, batch_id):
+        with self._connect() as conn:
+            conn.execute("UPDATE batches SET touched = ? WHERE id = ?", (time.time(), batch_id))
+
+    def delete(self, batch_id):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM batch_files WHERE batch_id = ?", (batch_id,))
+            conn.execute("DELETE FROM batches WHERE id = ?", (batch_id,))
+
+    def purge(self, cutoff):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM batch_files WHERE batch_id IN (SELECT id FROM batches WHERE touched < ?)", (cutoff,))
+            conn.execute("DELETE FROM batches WHERE touched < ?", (cutoff,))
+
+    def _load(self, conn, batch_id, rows):
+        row = conn.execute("SELECT state, touched FROM batches WHERE id = ?", (batch_id,)).fetchone()
+        if row is None:
+            return None
+        state = json.loads(row[0])
+        batch = Batch(state['backend'])
+        batch.id = batch_id
+        batch.touched = row[1]
+        batch.meta = state['meta']
+        batch.colors = state['colors']
+        batch.tables = state['tables']
+        batch.color_totals = state['color_totals']
+        batch.files_skipped = state['files_skipped']
+        batch.dedupe = state['dedupe']
+        # rowid যোগ করার ক্রম রাখে, তাই merge আর final_meta আগের মতোই
+        columns = "digest, name, row_count" + (", payload" if rows else "")
+        for file_row in conn.execute(f"SELECT {columns} FROM batch_files WHERE batch_id = ? ORDER BY rowid", (batch_id,)):
+            entry = {'name': file_row[1], 'row_count': file_row[2], 'rows': None, 'meta': None}
+            if rows:
+                payload = json.loads(zlib.decompress(file_row[3]))
+                entry['rows'] = PORows.from_payload(payload['rows'])
+                entry['meta'] = payload['meta']
+            batch.files[file_row[0]] = entry
+        return batch
+
+    def _save(self, conn, batch):
+        conn.execute(
+            "INSERT OR REPLACE INTO batches (id, state, touched) VALUES (?, ?, ?)",
+            (batch.id, json.dumps(batch.state()), batch.touched),
+        )
+        conn.executemany(
+            "DELETE FROM batch_files WHERE batch_id = ? AND digest = ?", [(batch.id, digest) for digest in batch.removed]
+        )
+        added = []
+        for digest in batch.added:
+            entry = batch.files[digest]
+            payload = {'rows': entry['rows'].to_payload(), 'meta': entry['meta']}
+            blob = zlib.compress(json.dumps(payload, separators=(',', ':')).encode('utf-8'))
+            added.append((batch.id, digest, entry['name'], entry['row_count'], blob))
+        conn.executemany(
+            "INSERT OR REPLACE INTO batch_files (batch_id, digest, name, row_count, payload) VALUES (?, ?, ?, ?, ?)", added
+        )
+        batch.added = []
+        batch.removed = []
+
+
+_batch_store = None
+_batches_lock = threading.Lock()
+
+
+def get_batch_store():
+    global _batch_store
+    with _batches_lock:
+        if _batch_store is None:
+            _batch_store = BatchStore(app.config['BATCH_STORE_PATH'])
+        return _batch_store
+
+
+class BatchUnavailable(Exception):
+    pass
+
+
+def require_secret_key():
+    if not app.secret_key:
+        raise BatchUnavailable()
+
+
+def get_batch(create=False, rows=False):
+    require_secret_key()
+    store = get_batch_store()
+    store.purge(time.time() - app.config['BATCH_TTL_SECONDS'])
+    batch_id = session.get('batch_id')
+    batch = store.load(batch_id, rows) if batch_id else None
+    if batch is None and create:
+        batch = Batch(requested_backend())
+        store.create(batch)
+        session['batch_id'] = batch.id
+    return batch
+
+
+def drop_batch():
+    require_secret_key()
+    batch_id = session.pop('batch_id', None)
+    if batch_id:
+        get_batch_store().delete(batch_id)
+
+
+def render_batch(batch):
+    if batch is None or not batch.files:
+        return render_template('result.html', batch={'files': []}, tables=None, message="Add PDF files to start the batch.")
+    report = batch.report() or {'tables': None}
+    message = batch.message() or (None if report['tables'] else "No PO table data found.")
+    return render_template('result.html', batch=batch.to_dict(), message=message, **report)
+
+
+# ==========================================
+#  METRICS
+# ==========================================
+
+class Metrics:
+    # প্রসেস-লোকাল কাউন্টার; প্রতিটি gunicorn ওয়ার্কার নিজের হিসাব দেখায়, আউটপুটের প্রথম লাইনে তার pid থাকে
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stage_seconds = {}
+        self.stage_count = {}
+        self.requests = {}
+        self.request_seconds = {}
+
+    def observe_stage(self, stage, seconds):
+        with self._lock:
+            self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+            self.stage_count[stage] = self.stage_count.get(stage, 0) + 1
+
+    def observe_request(self, endpoint, seconds):
+        with self._lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+            self.request_seconds[endpoint] = self.request_seconds.get(endpoint, 0.0) + seconds
+
+    def render(self):
+        out = [f"# per-process counters of worker pid {os.getpid()}; other workers keep their own"]
+
+        def family(name, kind, help_text):
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            family('po_stage_seconds', 'summary', 'Wall time spent in each upload pipeline stage.')
+            for stage in sorted(self.stage_seconds):
+                out.append(f'po_stage_seconds_sum{{stage="{stage}"}} {self.stage_seconds[stage]:.6f}')
+                out.append(f'po_stage_seconds_count{{stage="{stage}"}} {self.stage_count[stage]}')
+            family('po_request_seconds', 'summary', 'Request duration by endpoint.')
+            for endpoint in sorted(self.requests):
+                out.append(f'po_request_seconds_sum{{endpoint="{endpoint}"}} {self.request_seconds[endpoint]:.6f}')
+                out.append(f'po_request_seconds_count{{endpoint="{endpoint}"}} {self.requests[endpoint]}')
+
+        stats = extract_stats()
+        for key, kind, help_text in [
+            ('files_parsed', 'counter', 'PDF files parsed (cache misses).'),
+            ('pages_parsed', 'counter', 'Pages whose text was extracted and scanned.'),
+            ('pages_skipped', 'counter', 'Pages skipped by the content-stream probe.'),
+            ('rows', 'counter', 'Table rows extracted.'),
+            ('text_seconds', 'counter', 'Seconds spent in PDF text extraction.'),
+            ('parse_seconds', 'counter', 'Seconds spent parsing tables.'),
+        ]:
+            name = f"po_extract_{key}_total"
+            family(name, kind, help_text)
+            out.append(f"{name} {stats[key]}")
+
+        admission = ADMISSION.stats()
+        for key, kind, help_text in [
+            ('pages_in_flight', 'gauge', 'Pages admitted for extraction and not finished yet.'),
+            ('waiting', 'gauge', 'Uploads and jobs waiting for extraction capacity.'),
+            ('uploads', 'gauge', 'Upload requests holding a request thread in this worker.'),
+            ('admitted', 'counter', 'Uploads admitted for extraction.'),
+            ('rejected', 'counter', 'Uploads rejected with 503 because the queue was full or the wait timed out.'),
+            ('wait_seconds', 'counter', 'Seconds uploads spent waiting for extraction capacity.'),
+        ]:
+            name = f"po_admission_{key}" + ('_total' if kind == 'counter' else '')
+            family(name, kind, help_text)
+            out.append(f"{name} {admission[key]}")
+
+        cache = get_cache()
+        if cache is not None:
+            cache_stats = cache.stats()
+            family('po_extract_cache_hits_total', 'counter', 'Extraction cache hits.')
+            out.append(f"po_extract_cache_hits_total {cache_stats['hits']}")
+            family('po_extract_cache_misses_total', 'counter', 'Extraction cache misses.')
+            out.append(f"po_extract_cache_misses_total {cache_stats['misses']}")
+        return '\n'.join(out) + '\n'
+
+
+METRICS = Metrics()
+_NO_STAGE = contextlib.nullcontext()
+
+
+class StageTimer:
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self.stages = {}
+        self.running = {}
+        self.files = []
+
+    def stage(self, name):
+        if not self.enabled:
+            return _NO_STAGE
+        return self._measure(name)
+
+    @contextlib.contextmanager
+    def _measure(self, name):
+        started = self.running[name] = time.perf_counter()
+        try:
+            yield
+        finally:
+            del self.running[name]
+            elapsed = time.perf_counter() - started
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed
+            METRICS.observe_stage(name, elapsed)
+
+    def stream(self, name, chunks):
+        # স্ট্রিমিং রেসপন্সের জেনারেটর শেষ (বা ক্লায়েন্ট চলে গেলে বন্ধ) হওয়া পর্যন্ত একটা স্টেজ
+        with self.stage(name):
+            yield from chunks
+
+    def file_done(self, sources):
+        # extract_all() এর on_done হিসেবে দেওয়া হয়
+        if not self.enabled:
+            return None
+
+        def on_done(idx, stats):
+            self.files.append(dict(stats, name=sources[idx].name))
+        return on_done
+
+    def summary(self):
+        files = []
+        for f in sorted(self.files, key=lambda f: f['name']):
+            files.append({
+                'name': f['name'],
+                'cache': f.get('cache'),
+                'text_ms': round(f.get('text_seconds', 0.0) * 1000, 1),
+                'parse_ms': round(f.get('parse_seconds', 0.0) * 1000, 1),
+                'pages_parsed': f.get('pages_parsed', 0),
+                'pages_skipped': f.get('pages_skipped', 0),
+                'rows': f.get('rows', 0),
+            })
+        # চলতে থাকা স্টেজ (স্ট্রিমের ফুটার রেন্ডার হওয়ার সময় render) এ পর্যন্ত যতটুকু হয়েছে
+        now = time.perf_counter()
+        seconds = dict(self.stages)
+        for name, started in self.running.items():
+            seconds[name] = seconds.get(name, 0.0) + now - started
+        stages = [(name, round(value * 1000, 1)) for name, value in seconds.items()]
+        return {'stages': stages, 'files': files}
+
+
+class TimingFooter:
+    # স্ট্রিম মোডে ফুটার সব টেবিলের পরে রেন্ডার হয়, তাই সংখ্যাগুলো তখনই পড়া হয়
+    def __init__(self, timer):
+        self.timer = timer
+
+    def __getattr__(self, name):
+        summary = self.timer.summary()
+        if name not in summary:
+            raise AttributeError(name)
+        return summary[name]
+
+
+def requested_backend():
+    # request.values নয়: POST এ সেটা পুরো multipart বডি পড়ে ফেলে, তখন ADMISSION.check() এর আর মানে থাকে না
+    backend = request.args.get('backend') or request.headers.get('X-PO-Backend') or app.config['EXTRACT_BACKEND']
+    if backend not in BACKEND_CHOICES:
+        abort(400, description=f"Unknown extraction backend: {backend}")
+    return backend
+
+
+def request_timer():
+    if 'timer' not in g:
+        g.timer = StageTimer(app.config['METRICS_ENABLED'])
+    return g.timer
+
+
+@app.before_request
+def _start_request_clock():
+    if app.config['METRICS_ENABLED']:
+        g.request_started = time.perf_counter()
+
+
+@app.after_request
+def _record_request(response):
+    started = g.get('request_started')
+    if started is not None:
+        METRICS.observe_request(request.endpoint or 'unknown', time.perf_counter() - started)
+    return response
+
+
+@app.teardown_request
+def _release_upload_slot(exc):
+    # স্ট্রিম করা রেজাল্টেও পেজ পাঠানো শেষ হলে তবেই ছাড়ে
+    if g.pop('upload_slot', False):
+        ADMISSION.release()
+
+
+# ==========================================
+#  STARTUP
+# ==========================================
+
+def load_data_stack():
+    # pandas/numpy/pypdf প্রথম পার্সের সময়ই লোড হয়, আপলোড ফর্ম এগুলো ছাড়াই চলে।
+    # gunicorn master এ আগেই ডেকে রাখলে (gunicorn.conf.py) সব ওয়ার্কার fork এর পর একই মেমরি ভাগ করে নেয়
+    started = time.perf_counter()
+    import numpy  # noqa: F401
+    import pandas  # noqa: F401
+    import pypdf  # noqa: F401
+    # pandas এর কিছু অংশ প্রথম groupby/concat এর সময় লোড হয়, তাই ছোট একটা রিপোর্ট একবার বানানো হয়
+    rows = PORows()
+    rows.add_block('0', 'WARM UP', ['S', 'M'], [1, 2])
+    build_report(rows, {'buyer': 'N/A', 'booking': 'N/A', 'style': 'N/A', 'season': 'N/A', 'dept': 'N/A', 'item': 'N/A'})
+    return time.perf_counter() - started
+
+
+# ==========================================
+#  RESPONSE COMPRESSION
+# ==========================================
+
+COMPRESS_MIMETYPES = frozenset(['text/html', 'text/css', 'text/csv', 'text/plain', 'application/json'])
+
+
+@lru_cache(maxsize=None)
+def brotli_module():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def choose_encoding(accept_encodings):
+    if brotli_module() is not None and accept_encodings['br']:
+        return 'br'
+    if accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+
+def _compressor(encoding):
+    # (compress, flush, finish) — flush এর পর পর্যন্ত যা এসেছে তা ক্লায়েন্ট সাথে সাথে ডিকোড করতে পারে
+    if encoding == 'br':
+        c = brotli_module().Compressor(quality=app.config['COMPRESS_BROTLI_QUALITY'])
+        return c.process, c.flush, c.finish
+    c = zlib.compressobj(app.config['COMPRESS_GZIP_LEVEL'], zlib.DEFLATED, 31)
+    return c.compress, lambda: c.flush(zlib.Z_SYNC_FLUSH), c.flush
+
+
+def compress_bytes(data, encoding):
+    compress, _, finish = _compressor(encoding)
+    return compress(data) + finish()
+
+
+def compress_chunks(chunks, encoding, source=None):
+    # স্ট্রিমিং রেসপন্সে প্রতিটি টুকরো flush হয়, তাই ব্রাউজার আগের মতোই টেবিল একে একে পায়
+    compress, flush, finish = _compressor(encoding)
+    try:
+        for chunk in chunks:
+            out = compress(chunk) + flush()
+            if out:
+                yield out
+        yield finish()
+    finally:
+        if hasattr(source, 'close'):
+            source.close()
+
+
+@app.after_request
+def _compress_response(response):
+    if not app.config['COMPRESS_RESPONSES'] or response.direct_passthrough:
+        return response
+    if response.mimetype not in COMPRESS_MIMETYPES or 'Content-Encoding' in response.headers:
+        return response
+    if response.status_code < 200 or response.status_code in (204, 304):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        source = response.response
+        response.response = compress_chunks(response.iter_encoded(), encoding, source)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < app.config['COMPRESS_MIN_BYTES']:
+            return response
+        response.set_data(compress_bytes(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+# ==========================================
+#  FLASK ROUTES
+# ==========================================
+
+def error_page(message, status, api_message=None):
+    # API ক্লায়েন্ট JSON পায়, ব্রাউজার সাধারণ রিপোর্ট পেজে বার্তা
+    if request.path.startswith('/api/'):
+        response = jsonify({'error': api_message or message})
+    else:
+        response = app.make_response(render_template('result.html', tables=None, message=message))
+    response.status_code = status
+    return response
+
+
+@app.errorhandler(ExtractionBusy)
+def _extraction_busy(e):
+    response = error_page(
+        "The server is busy with other uploads. Please try again in a moment.", 503,
+        "Too many uploads are being processed, please retry later.",
+    )
+    response.headers['Retry-After'] = str(app.config['RETRY_AFTER_SECONDS'])
+    return response
+
+
+@app.errorhandler(UploadRejected)
+def _upload_rejected(e):
+    return error_page(str(e), e.status)
+
+
+@app.errorhandler(BatchUnavailable)
+def _batch_unavailable(e):
+    # SECRET_KEY ছাড়া সেশন কুকি সই করা যায় না; সাধারণ আপলোড ফর্ম তবুও চলে
+    return error_page("Batches are unavailable because SECRET_KEY is not set on the server.", 503)
+
+
+@app.route('/', methods=['GET', 'POST'])
+def index():
+    if request.method == 'POST':
+        timer = request_timer()
+        ADMISSION.check()
+        backend = requested_backend()
+        # প্রতিটি রিকোয়েস্টের আলাদা temp ফোল্ডার, তাই একসাথে চলা রিকোয়েস্ট একে অপরের ফাইল মুছে না
+        with tempfile.TemporaryDirectory(prefix='po-upload-') as spool_dir:
+            dedupe = new_dedupe_report()
+            with timer.stage('upload'):
+                sources = read_uploads(request.files.getlist('pdf_files'), spool_dir)
+                sources = skip_duplicate_files(sources, dedupe)
+            with timer.stage('extract'):
+                results = extract_all(sources, timer.file_done(sources), backend)
+
+        stream = wants_stream()
+        all_data, final_meta = merge_results(results, dedupe)
+        with timer.stage('store'):
+            store_results(all_data, final_meta)
+        with timer.stage('pivot'):
+            report = build_report(all_data, final_meta, lazy=stream)
+            if report is not None:
+                report['message'] = dedupe_message(dedupe)
+        timing = None
+        if timer.enabled and (app.config['TIMING_FOOTER'] or request.values.get('timing') == '1'):
+            timing = TimingFooter(timer) if stream else timer.summary()
+        if stream:
+            return render_report(report, stream, timing)
+        with timer.stage('render'):
+            return render_report(report, timing=timing)
+
+    return render_template('index.html')
+
+
+@app.route('/assets/<name>')
+def asset(name):
+    if name not in ASSETS:
+        abort(404)
+    response = Response(ASSETS[name], mimetype='text/css')
+    if request.args.get('v') == ASSET_VERSIONS[name]:
+        response.cache_control.public = True
+        response.cache_control.max_age = 365 * 24 * 3600
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    response.set_etag(ASSET_VERSIONS[name], weak=True)
+    return response.make_conditional(request)
+
+
+@app.route('/api/jobs', methods=['POST'])
+def create_job():
+    ADMISSION.check()
+    backend = requested_backend()
+    spool_dir = tempfile.mkdtemp(prefix='po-job-')
+    try:
+        sources = read_uploads(request.files.getlist('pdf_files'), spool_dir)
+    except Exception:
+        shutil.rmtree(spool_dir, ignore_errors=True)
+        raise
+    if not sources:
+        shutil.rmtree(spool_dir, ignore_errors=True)
+        return jsonify({'error': 'No PDF files uploaded.'}), 400
+
+    job = submit_job(sources, spool_dir, backend)
+    return jsonify({
+        'job_id': job.id,
+        'status_url': url_for('job_status', job_id=job.id),
+        'result_url': url_for('job_result', job_id=job.id),
+    }), 202
+
+
+@app.route('/api/jobs/<job_id>')
+def job_status(job_id):
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job.'}), 404
+    return jsonify(job.to_dict())
+
+
+@app.route('/api/jobs/<job_id>/result')
+def job_result(job_id):
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job.'}), 404
+    if job.status == 'failed':
+        return jsonify(job.to_dict()), 500
+    if job.status != 'done':
+        return jsonify(job.to_dict()), 409
+    return render_report(job.report())
+
+
+@app.route('/api/export.<fmt>', methods=['POST'])
+def export_upload(fmt):
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': f'Unsupported export format: {fmt}'}), 404
+    ADMISSION.check()
+    backend = requested_backend()
+
+    with tempfile.TemporaryDirectory(prefix='po-upload-') as spool_dir:
+        dedupe = new_dedupe_report()
+        sources = skip_duplicate_files(read_uploads(request.files.getlist('pdf_files'), spool_dir), dedupe)
+        results = extract_all(sources, backend=backend)
+
+    all_data, final_meta = merge_results(results, dedupe)
+    store_results(all_data, final_meta)
+    quantities = colors = None
+    if all_data:
+        df = prepare_frame(all_data)
+        quantities = consolidate_quantities(df)
+        colors = list(df['Color'].unique())
+    return export_response(quantities, final_meta, fmt, dedupe, colors)
+
+
+@app.route('/api/jobs/<job_id>/export.<fmt>')
+def job_export(job_id, fmt):
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': f'Unsupported export format: {fmt}'}), 404
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job.'}), 404
+    if job.status != 'done':
+        return jsonify(job.to_dict()), 409
+    quantities, colors = job.export_data()
+    return export_response(quantities, job.meta, fmt, job.dedupe, colors)
+
+
+@app.route('/batch')
+def batch_view():
+    batch = get_batch()
+    if batch is not None:
+        get_batch_store().touch(batch.id)
+    return render_batch(batch)
+
+
+@app.route('/batch/files', methods=['POST'])
+def batch_add_files():
+    ADMISSION.check()
+    requested_backend()
+    batch = get_batch(create=True)
+    with tempfile.TemporaryDirectory(prefix='po-upload-') as spool_dir:
+        sources, skipped = batch.pending(read_uploads(request.files.getlist('pdf_files'), spool_dir))
+        results = extract_all(sources, backend=batch.backend)
+    # পার্স ট্রানজ্যাকশনের বাইরে হয়, শুধু যোগ করা আর টেবিল আপডেট লক ধরে
+    with get_batch_store().edit(batch.id) as batch:
+        if batch is None:
+            abort(404)
+        batch.add(sources, results, skipped)
+    return redirect(url_for('batch_view'), code=303)
+
+
+@app.route('/batch/files/<digest>/remove', methods=['POST'])
+def batch_remove_file(digest):
+    batch = get_batch()
+    if batch is None:
+        return redirect(url_for('batch_view'), code=303)
+    with get_batch_store().edit(batch.id) as batch:
+        if batch is None or not batch.remove(digest):
+            abort(404)
+    return redirect(url_for('batch_view'), code=303)
+
+
+@app.route('/batch/export.<fmt>')
+def batch_export(fmt):
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': f'Unsupported export format: {fmt}'}), 404
+    batch = get_batch(rows=True)
+    if batch is None or not batch.colors:
+        return jsonify({'error': 'The batch has no PO table data.'}), 404
+    quantities = consolidate_quantities(batch.frame())
+    return export_response(quantities, batch.meta, fmt, colors=list(batch.colors))
+
+
+@app.route('/batch/clear', methods=['POST'])
+def batch_clear():
+    drop_batch()
+    return redirect(url_for('batch_view'), code=303)
+
+
+@app.route('/api/store/totals')
+def store_totals():
+    store = get_store()
+    if store is None:
+        return jsonify({'error': 'The PO store is disabled.'}), 404
+    group_by, filters = store_query_args()
+    return jsonify({'group_by': group_by, 'filters': filters, 'rows': store.totals(group_by, filters)})
+
+
+@app.route('/api/store/pos')
+def store_orders():
+    store = get_store()
+    if store is None:
+        return jsonify({'error': 'The PO store is disabled.'}), 404
+    _, filters = store_query_args(allowed_group_by=False)
+    return jsonify({'filters': filters, 'orders': store.orders(filters)})
+
+
+@app.route('/api/store/pos/<order_no>')
+def store_order(order_no):
+    store = get_store()
+    if store is None:
+        return jsonify({'error': 'The PO store is disabled.'}), 404
+    order = store.order(order_no)
+    if order is None:
+        return jsonify({'error': 'Unknown PO.'}), 404
+    return jsonify(order)
 
-            final_tables.append({'color': color, 'table': table_html})
-            
-        return render_template_string(RESULT_HTML, 
-                                      tables=final_tables, 
-                                      meta=final_meta, 
-                                      grand_total=f"{grand_total_qty:,}")
 
-    return render_template_string(INDEX_HTML)
+@app.route('/metrics')
+def metrics():
+    if not app.config['METRICS_ENABLED']:
+        return jsonify({'error': 'Metrics are disabled.'}), 404
+    return Response(METRICS.render(), mimetype='text/plain; version=0.0.4')
 
 
 if __name__ == "__main__":
@@ -0,0 +1,662 @@
+"""Offline benchmarks for the PO report pipeline.
+
+    python benchmark.py sizes
+    python benchmark.py pipeline --batches 1,10,100,500
+    python benchmark.py backends --files 50
+    python benchmark.py metadata --lengths 1000,2000,4000,8000
+    python benchmark.py pages --pages 10,50,200 --workers 2,4
+    python benchmark.py templates --files 1,10,50
+    python benchmark.py startup --workers 4
+"""
+import argparse
+import io
+import json
+import os
+import random
+import re
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import app as po_app
+
+
+# ==========================================
+#  SYNTHETIC KIABI-STYLE PO PDFS
+# ==========================================
+
+COLOR_WORDS = [
+    'NAVY', 'BLUE', 'RED', 'MELANGE', 'WHITE', 'BLACK', 'HEATHER', 'GREY', 'PINK',
+    'GREEN', 'KHAKI', 'OCHRE', 'CORAL', 'SKY', 'MINT', 'ECRU', 'INDIGO', 'DENIM',
+]
+SYNTHETIC_SIZES = ['3M', '6M', '12M', '18M', '2A', '3A', '4A', '5A', '6A', '8A', '10A', '12A', '14A', 'S', 'M', 'L', 'XL']
+FILLER_LINES = ['Terms and conditions of purchase', 'Payment 60 days end of month', 'Delivery FOB Chittagong']
+
+
+def pdf_from_items(pages):
+    # একদম সাধারণ PDF: Helvetica, প্রতিটি সেল আলাদা Tj, আসল PO এর মতো সেল ধরে ধরে আঁকা
+    objects = [b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    pages_ref = 2 * len(pages) + 2
+    page_refs = []
+    for items in pages:
+        ops = [b"BT /F1 9 Tf"]
+        for x, y, text in items:
+            text = text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+            ops.append(b"1 0 0 1 %d %d Tm (%s) Tj" % (x, y, text.encode('latin-1')))
+        ops.append(b"ET")
+        stream = b"\n".join(ops)
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 1 0 R >> >> /Contents %d 0 R >>" % (pages_ref, len(objects))
+        )
+        page_refs.append(len(objects))
+    objects.append(b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % r for r in page_refs), len(page_refs)))
+    objects.append(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_ref)
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for num, body in enumerate(objects, 1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (num, body))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, len(objects), xref))
+    return out.getvalue()
+
+
+def synthetic_po(rng, order_no, colors=6, sizes=8, pages=3, table_pages=1, multiline=0.3):
+    # PDF আর পার্সারের কাছ থেকে যা আশা করা হয় সেই রো দুটোই ফেরত দেয়
+    size_pick = sorted(rng.sample(range(len(SYNTHETIC_SIZES)), min(sizes, len(SYNTHETIC_SIZES))))
+    size_cols = [SYNTHETIC_SIZES[idx] for idx in size_pick]
+    col_x = [150 + 40 * idx for idx in range(len(size_cols) + 1)]
+    names = []
+    while len(names) < colors:
+        words = rng.sample(COLOR_WORDS, rng.randint(2, 3) if rng.random() < multiline else 1)
+        if words not in names:
+            names.append(words)
+
+    table_pages = max(1, min(table_pages, pages))
+    page_items = [[] for _ in range(table_pages)]
+    cursor = [800] * table_pages
+    for line in ['KIABI', f'Order no : {order_no}00', 'Supplier Cotton Clothing BD Limited']:
+        page_items[0].append((40, cursor[0], line))
+        cursor[0] -= 12
+
+    expected = []
+    for idx, words in enumerate(names):
+        page = idx * table_pages // len(names)
+        items = page_items[page]
+        y = cursor[page]
+        if not any(text.startswith('Colo/Size') for _, _, text in items):
+            items.append((40, y, 'Colo/Size'))
+            items += [(x, y, size) for x, size in zip(col_x, size_cols)]
+            items.append((col_x[-1], y, 'Total'))
+            y -= 16
+
+        label = words + ['Spec']
+        items += [(40, y - 10 * pos, text) for pos, text in enumerate(label)]
+        row_total = 0
+        for x, size in zip(col_x, size_cols):
+            qty = rng.randint(0, 600)
+            row_total += qty
+            items += [(x, y, str(qty)), (x, y - 10, '2,35')]
+            expected.append({'P.O NO': str(order_no), 'Color': ' '.join(words), 'Size': size, 'Quantity': qty})
+        items += [(col_x[-1], y, str(row_total)), (col_x[-1], y - 10, '2,35')]
+        cursor[page] = y - 10 * len(label) - 6
+
+    for page, items in enumerate(page_items):
+        items += [(40, cursor[page], 'Total'), (40, cursor[page] - 10, 'Quantity')]
+    for _ in range(pages - table_pages):
+        page_items.append([(40, 800 - 12 * pos, line) for pos, line in enumerate(FILLER_LINES)])
+    return pdf_from_items(page_items), expected
+
+
+def synthetic_batch(files, seed=0, **po_options):
+    rng = random.Random(seed)
+    return [synthetic_po(rng, 4500000 + idx, **po_options) for idx in range(files)]
+
+
+# ==========================================
+#  SIZE CLASSIFICATION
+# ==========================================
+
+# আগের ইমপ্লিমেন্টেশন, শুধু তুলনার জন্য রাখা
+def legacy_is_potential_size(header):
+    h = header.strip().upper()
+    if h in ["COLO", "SIZE", "TOTAL", "QUANTITY", "PRICE", "AMOUNT", "CURRENCY", "ORDER NO", "P.O NO"]:
+        return False
+    if re.match(r'^\d+$', h): return True
+    if re.match(r'^\d+[AMYT]$', h): return True
+    if re.match(r'^(XXS|XS|S|M|L|XL|XXL|XXXL|TU|ONE\s*SIZE)$', h): return True
+    if re.match(r'^[A-Z]\d{2,}$', h): return False
+    return False
+
+
+def legacy_sort_sizes(size_list):
+    STANDARD_ORDER = [
+        '0M', '1M', '3M', '6M', '9M', '12M', '18M', '24M', '36M',
+        '2A', '3A', '4A', '5A', '6A', '8A', '10A', '12A', '14A', '16A', '18A',
+        'XXS', 'XS', 'S', 'M', 'L', 'XL', 'XXL', '3XL', '4XL', '5XL',
+        'TU', 'One Size'
+    ]
+    def sort_key(s):
+        s = s.strip()
+        if s in STANDARD_ORDER: return (0, STANDARD_ORDER.index(s))
+        if s.isdigit(): return (1, int(s))
+        match = re.match(r'^(\d+)([A-Z]+)$', s)
+        if match: return (2, int(match.group(1)), match.group(2))
+        return (3, s)
+    return sorted(size_list, key=sort_key)
+
+
+SIZE_TOKENS = [
+    'Colo/Size', '2A', '3A', '4A', '5A', '6A', '8A', '10A', '12A', '14A', 'Total',
+    '3M', '6M', '12M', '24M', 'XS', 'S', 'M', 'L', 'XL', 'XXL', 'TU', 'One Size',
+    '36', '38', '40', '42', 'NAVY BLUE', 'MELANGE', 'Spec', 'Quantity', '1,25', 'R12',
+]
+
+
+def _per_call_ns(func, args, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for arg in args:
+            func(arg)
+    return (time.perf_counter() - start) * 1e9 / (repeat * len(args))
+
+
+def bench_sizes(repeat):
+    mismatches = [t for t in SIZE_TOKENS if legacy_is_potential_size(t) != po_app.is_potential_size(t)]
+    if mismatches:
+        raise SystemExit(f"classifier mismatch: {mismatches}")
+    header_sizes = [t for t in SIZE_TOKENS if legacy_is_potential_size(t)]
+    if legacy_sort_sizes(header_sizes) != po_app.sort_sizes(header_sizes):
+        raise SystemExit("sort_sizes mismatch")
+
+    po_app.is_potential_size.cache_clear()
+    po_app.size_sort_key.cache_clear()
+    cold = _per_call_ns(po_app.is_potential_size, SIZE_TOKENS, 1)
+
+    rows = [
+        ('is_potential_size  legacy', _per_call_ns(legacy_is_potential_size, SIZE_TOKENS, repeat)),
+        ('is_potential_size  cold', cold),
+        ('is_potential_size  warm', _per_call_ns(po_app.is_potential_size, SIZE_TOKENS, repeat)),
+        ('sort_sizes (list)  legacy', _per_call_ns(legacy_sort_sizes, [header_sizes], repeat)),
+        ('sort_sizes (list)  new', _per_call_ns(po_app.sort_sizes, [header_sizes], repeat)),
+    ]
+    print(f"{len(SIZE_TOKENS)} tokens, {repeat} rounds")
+    for label, ns in rows:
+        print(f"  {label:<28} {ns:>10.1f} ns/call")
+
+
+# ==========================================
+#  METADATA EXTRACTION
+# ==========================================
+
+def legacy_extract_metadata(first_page_text):
+    meta = {
+        'buyer': 'N/A', 'booking': 'N/A', 'style': 'N/A',
+        'season': 'N/A', 'dept': 'N/A', 'item': 'N/A'
+    }
+    if "KIABI" in first_page_text.upper():
+        meta['buyer'] = "KIABI"
+    else:
+        buyer_match = re.search(r"Buyer.*?Name[\s\S]*?([\w\s&]+)(?:\n|$)", first_page_text)
+        if buyer_match: meta['buyer'] = buyer_match.group(1).strip()
+    booking_block_match = re.search(r"(?:Internal )?Booking NO\.?[:\s]*([\s\S]*?)(?:System NO|Control No|Buyer)", first_page_text, re.IGNORECASE)
+    if booking_block_match:
+        raw_booking = booking_block_match.group(1).strip()
+        clean_booking = raw_booking.replace('\n', '').replace('\r', '').replace(' ', '')
+        if "System" in clean_booking: clean_booking = clean_booking.split("System")[0]
+        meta['booking'] = clean_booking
+    style_match = re.search(r"Style Ref\.?[:\s]*([\w-]+)", first_page_text, re.IGNORECASE)
+    if style_match: meta['style'] = style_match.group(1).strip()
+    else:
+        style_match = re.search(r"Style Des\.?[\s\S]*?([\w-]+)", first_page_text, re.IGNORECASE)
+        if style_match: meta['style'] = style_match.group(1).strip()
+    season_match = re.search(r"Season\s*[:\n\"]*([\w\d-]+)", first_page_text, re.IGNORECASE)
+    if season_match: meta['season'] = season_match.group(1).strip()
+    dept_match = re.search(r"Dept\.?[\s\n:]*([A-Za-z]+)", first_page_text, re.IGNORECASE)
+    if dept_match: meta['dept'] = dept_match.group(1).strip()
+    item_match = re.search(r"Garments? Item[\s\n:]*([^\n\r]+)", first_page_text, re.IGNORECASE)
+    if item_match:
+        item_text = item_match.group(1).strip()
+        if "Style" in item_text: item_text = item_text.split("Style")[0].strip()
+        meta['item'] = item_text
+    return meta
+
+
+BOOKING_PAGE = (
+    "Main Fabric Booking\nInternal Booking NO.: CCBD-12-345\nSystem NO: 99812\n"
+    "Buyer Name: KIABI EUROPE\nStyle Ref.: ST-991\nSeason: SS26\nDept. Kids\n"
+    "Garments Item: T-Shirt Style basic\n"
+)
+
+# প্রতিটি ইনপুট পুরনো regex গুলোর কোনো একটাকে লম্বা ব্যাকট্র্যাকিংয়ে ফেলে
+PATHOLOGICAL_INPUTS = [
+    ('booking labels, no terminator', lambda n: 'Booking NO ' * (n // 11)),
+    ('buyer name, no line end', lambda n: 'Buyer Name ' + 'ab ' * (n // 3) + ':'),
+    ('season, newline run', lambda n: 'Season' + '\n' * n + ' '),
+    ('style des, no value', lambda n: 'Style Des.' + ' :' * (n // 2)),
+    ('item label, trailing gap', lambda n: ('Garment Item' + ' ' * 20 + '\n') * (n // 33)),
+    ('realistic page', lambda n: (BOOKING_PAGE + 'Terms and conditions of purchase\n') * max(1, n // 200)),
+]
+
+
+def _one_call_ms(func, text):
+    start = time.perf_counter()
+    result = func(text)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if elapsed_ms < 10:
+        # খুব দ্রুত হলে ~100ms ধরে বারবার চালিয়ে গড়
+        runs = min(10000, max(1, int(100 / max(elapsed_ms, 0.01))))
+        start = time.perf_counter()
+        for _ in range(runs):
+            func(text)
+        elapsed_ms = (time.perf_counter() - start) * 1000 / runs
+    return result, elapsed_ms
+
+
+def bench_metadata(lengths, budget):
+    print(f"{'input':<32} {'chars':>7} {'legacy ms':>10} {'new ms':>9}")
+    for label, make in PATHOLOGICAL_INPUTS:
+        legacy_ms = 0.0
+        for length in lengths:
+            text = make(length)
+            new, new_ms = _one_call_ms(po_app.extract_metadata, text)
+            if legacy_ms > budget:
+                # পুরনো সংস্করণ আগের দৈর্ঘ্যেই বাজেট পেরিয়েছে, বড় ইনপুটে আর চালানো হয় না
+                print(f"{label:<32} {len(text):>7} {'skipped':>10} {new_ms:>9.3f}")
+                continue
+            old, legacy_ms = _one_call_ms(legacy_extract_metadata, text)
+            if old != new:
+                raise SystemExit(f"metadata mismatch on {label!r} ({len(text)} chars): {old} != {new}")
+            print(f"{label:<32} {len(text):>7} {legacy_ms:>10.3f} {new_ms:>9.3f}")
+
+
+# ==========================================
+#  PIPELINE STAGES
+# ==========================================
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def _stage_text(pdfs):
+    import pypdf
+    texts = []
+    for pdf in pdfs:
+        reader = pypdf.PdfReader(io.BytesIO(pdf))
+        texts.append([page.extract_text() for page in reader.pages])
+    return texts
+
+
+def _stage_parse(texts):
+    rows = 0
+    for pages in texts:
+        for text in pages:
+            lines = text.split('\n')
+            for i, line in enumerate(lines):
+                if ("Colo" in line or "Size" in line) and "Total" in line:
+                    sizes = [s for s in line.split()[:-1] if po_app.is_potential_size(s)]
+                    rows += len(po_app.parse_vertical_table(lines, i + 1, sizes, 'X'))
+                    break
+    return rows
+
+
+def _stage_extract(pdfs):
+    return [po_app.extract_data_dynamic(pdf) for pdf in pdfs]
+
+
+def _stage_pivot(all_data):
+    df = po_app.prepare_frame(all_data)
+    pivots, grand_total = po_app.build_color_pivots(df)
+    return list(pivots), grand_total
+
+
+def _stage_render(pivots, grand_total, meta):
+    tables = [{'color': color, 'table': po_app.render_table_html(pivot)} for color, pivot in pivots]
+    with po_app.app.test_request_context():
+        page = po_app.render_report({'tables': tables, 'meta': meta, 'grand_total': f"{grand_total:,}"})
+    return len(page)
+
+
+def run_pipeline(pdfs):
+    timings = {}
+    texts, timings['pypdf text'] = _timed(_stage_text, pdfs)
+    _, timings['parse tables'] = _timed(_stage_parse, texts)
+    results, timings['extract_data_dynamic'] = _timed(_stage_extract, pdfs)
+    all_data, meta = po_app.merge_results(results)
+    (pivots, grand_total), timings['pivot'] = _timed(_stage_pivot, all_data)
+    html_bytes, timings['render'] = _timed(_stage_render, pivots, grand_total, meta)
+    pages = sum(len(t) for t in texts)
+    return timings, pages, len(all_data), html_bytes
+
+
+def bench_pipeline(args):
+    po_options = dict(colors=args.colors, sizes=args.sizes, pages=args.pages,
+                      table_pages=args.table_pages, multiline=args.multiline)
+    print(f"po options: {po_options}")
+    header = f"{'files':>6} {'pages':>7} {'rows':>8} {'text s':>8} {'parse s':>8} {'extract s':>9} " \
+             f"{'pivot s':>8} {'render s':>8} {'pages/s':>8} {'rows/s':>9} {'peak MB':>8}"
+    print(header)
+    for files in args.batches:
+        batch = synthetic_batch(files, seed=args.seed, **po_options)
+        pdfs = [pdf for pdf, _ in batch]
+        if args.write:
+            os.makedirs(args.write, exist_ok=True)
+            for idx, pdf in enumerate(pdfs):
+                with open(os.path.join(args.write, f'po_{files}_{idx:04d}.pdf'), 'wb') as f:
+                    f.write(pdf)
+
+        po_app.is_potential_size.cache_clear()
+        timings, pages, rows, _ = run_pipeline(pdfs)
+
+        peak_mb = float('nan')
+        if not args.no_memory:
+            tracemalloc.start()
+            run_pipeline(pdfs)
+            peak_mb = tracemalloc.get_traced_memory()[1] / 1e6
+            tracemalloc.stop()
+
+        extract = timings['extract_data_dynamic']
+        print(f"{files:>6} {pages:>7} {rows:>8} {timings['pypdf text']:>8.3f} {timings['parse tables']:>8.3f} "
+              f"{extract:>9.3f} {timings['pivot']:>8.3f} {timings['render']:>8.3f} "
+              f"{pages / extract:>8.1f} {rows / extract:>9.0f} {peak_mb:>8.1f}")
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"process max RSS: {maxrss:.1f} MB")
+
+
+# ==========================================
+#  EXTRACTION BACKENDS
+# ==========================================
+
+def _row_key(row):
+    return row['P.O NO'], row['Color'], row['Size'], row['Quantity']
+
+
+def bench_backends(args):
+    batch = synthetic_batch(args.files, seed=args.seed, colors=args.colors, sizes=args.sizes,
+                            pages=args.pages, table_pages=args.table_pages, multiline=args.multiline)
+    pages = args.files * args.pages
+    print(f"{args.files} files, {pages} pages")
+    print(f"{'backend':<12} {'seconds':>8} {'pages/s':>8} {'rows':>7} {'exact %':>8} {'missing':>8} {'extra':>6}")
+    for name in args.backend:
+        start = time.perf_counter()
+        results = [po_app.extract_with_backend(pdf, name) for pdf, _ in batch]
+        elapsed = time.perf_counter() - start
+
+        rows = matched = missing = extra = 0
+        for (data, _), (_, expected) in zip(results, batch):
+            got = {}
+            for row in data:
+                got[_row_key(row)] = got.get(_row_key(row), 0) + 1
+            for row in expected:
+                key = _row_key(row)
+                if got.get(key):
+                    got[key] -= 1
+                    matched += 1
+                else:
+                    missing += 1
+            extra += sum(got.values())
+            rows += len(data)
+        total = sum(len(expected) for _, expected in batch)
+        print(f"{name:<12} {elapsed:>8.3f} {pages / elapsed:>8.1f} {rows:>7} {100.0 * matched / total:>8.1f} "
+              f"{missing:>8} {extra:>6}")
+
+
+# ==========================================
+#  PAGE-LEVEL SPLITTING
+# ==========================================
+
+def bench_pages(args):
+    # একটা বড় PDF সিরিয়ালি বনাম পেজের টুকরো করে; PAGE_SPLIT_MIN_PAGES ঠিক করার জন্য
+    rng = random.Random(args.seed)
+    config = po_app.app.config
+    saved = config['EXTRACT_WORKERS'], config['PAGE_SPLIT_MIN_PAGES']
+    print(f"{'pages':>6} {'serial s':>9} " + ' '.join(f"{f'{w} workers':>10}" for w in args.workers))
+    try:
+        for pages in args.pages:
+            pdf, _ = synthetic_po(rng, 4500000, colors=args.colors * pages, sizes=args.sizes,
+                                  pages=pages, table_pages=pages, multiline=args.multiline)
+            source = po_app.PdfSource('bench.pdf', data=pdf)
+            start = time.perf_counter()
+            serial, _, _ = po_app.extract_with_stats(pdf)
+            cells = [f"{pages:>6} {time.perf_counter() - start:>9.3f}"]
+            for workers in args.workers:
+                config['EXTRACT_WORKERS'], config['PAGE_SPLIT_MIN_PAGES'] = workers, 1
+                po_app.reset_executor()
+                # প্রসেস চালু হওয়ার খরচ মাপের বাইরে রাখতে পুল আগেই গরম করা হয়
+                list(po_app.get_executor().map(abs, range(workers)))
+                start = time.perf_counter()
+                [(split, _)] = po_app._extract_uncached([source])
+                elapsed = time.perf_counter() - start
+                mark = '' if list(split.records()) == list(serial.records()) else '!'
+                cells.append(f"{elapsed:>9.3f}{mark or ' '}")
+            print(' '.join(cells))
+    finally:
+        config['EXTRACT_WORKERS'], config['PAGE_SPLIT_MIN_PAGES'] = saved
+        po_app.reset_executor()
+    print("seconds per file; '!' marks a split result that differs from the serial one")
+
+
+# ==========================================
+#  TEMPLATES & COMPRESSION
+# ==========================================
+
+def legacy_template(name):
+    # আগের মতো CSS টেমপ্লেটের ভেতরেই, আর প্রতিবার render_template_string দিয়ে নতুন করে কম্পাইল
+    css_name = name.replace('.html', '.css')
+    link = '<link href="{{ asset_url(\'%s\') }}" rel="stylesheet">' % css_name
+    return po_app.TEMPLATES[name].replace(link, '<style>' + po_app.ASSETS[css_name] + '</style>')
+
+
+def bench_templates(args):
+    from flask import render_template, render_template_string
+    brotli = po_app.brotli_module()
+    pages = [('index', 'index.html', {})]
+    for files in args.files:
+        results = [po_app.extract_data_dynamic(pdf) for pdf, _ in synthetic_batch(files, seed=args.seed)]
+        all_data, meta = po_app.merge_results(results)
+        pages.append((f'{files} files', 'result.html', po_app.build_report(all_data, meta)))
+
+    print(f"{'page':<10} {'legacy ms':>9} {'compiled ms':>11} {'legacy KB':>9} {'page KB':>8} "
+          f"{'gzip KB':>8} {'gzip ms':>8} {'br KB':>7} {'br ms':>7}")
+    with po_app.app.test_request_context():
+        for label, name, context in pages:
+            legacy = legacy_template(name)
+            old, legacy_ms = _one_call_ms(lambda _: render_template_string(legacy, **context), None)
+            new, new_ms = _one_call_ms(lambda _: render_template(name, **context), None)
+            data = new.encode()
+            gz, gz_ms = _one_call_ms(lambda d: po_app.compress_bytes(d, 'gzip'), data)
+            row = f"{label:<10} {legacy_ms:>9.3f} {new_ms:>11.3f} {len(old.encode()) / 1024:>9.1f} " \
+                  f"{len(data) / 1024:>8.1f} {len(gz) / 1024:>8.1f} {gz_ms:>8.3f}"
+            if brotli is not None:
+                br, br_ms = _one_call_ms(lambda d: po_app.compress_bytes(d, 'br'), data)
+                row += f" {len(br) / 1024:>7.1f} {br_ms:>7.3f}"
+            print(row)
+    css = sum(len(css.encode()) for css in po_app.ASSETS.values())
+    print(f"stylesheets: {css / 1024:.1f} KB, fetched once and then served from the browser cache")
+    if brotli is None:
+        print("brotli is not installed, br columns skipped")
+
+
+# ==========================================
+#  STARTUP
+# ==========================================
+
+# নতুন প্রসেসে চলে, যাতে import এর খরচ এই স্ক্রিপ্টের আগের import এ ঢাকা না পড়ে
+_COLD_START_PROBE = '''
+import json, sys, time
+started = time.perf_counter()
+import app
+out = {"import_ms": (time.perf_counter() - started) * 1000}
+if sys.argv[1] == "eager":
+    app.load_data_stack()
+    out["import_ms"] = (time.perf_counter() - started) * 1000
+client = app.app.test_client()
+started = time.perf_counter()
+client.get("/")
+out["get_ms"] = (time.perf_counter() - started) * 1000
+out["data_stack"] = "pandas" in sys.modules
+out["rss_kb"] = int(open("/proc/self/status").read().split("VmRSS:")[1].split()[0])
+print(json.dumps(out))
+'''
+
+# gunicorn এর মতো: master থেকে fork হওয়া ওয়ার্কার, প্রত্যেকে একটা রিপোর্ট বানানোর পর মেমরি মাপা হয়
+_WORKERS_PROBE = '''
+import gc, json, os, sys
+import app
+if sys.argv[1] == "preload":
+    app.load_data_stack()
+    gc.freeze()
+release_r, release_w = os.pipe()
+children = []
+for _ in range(int(sys.argv[2])):
+    ready_r, ready_w = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(release_w)
+        app.app.test_client().get("/")
+        app.load_data_stack()
+        os.write(ready_w, b"1")
+        os.read(release_r, 1)
+        os._exit(0)
+    os.close(ready_w)
+    children.append((pid, ready_r))
+for pid, ready_r in children:
+    os.read(ready_r, 1)
+
+def rollup(pid):
+    fields = {}
+    for line in open(f"/proc/{pid}/smaps_rollup"):
+        parts = line.split()
+        if len(parts) == 3 and parts[2] == "kB":
+            fields[parts[0].rstrip(":")] = int(parts[1])
+    return fields
+
+workers = [rollup(pid) for pid, _ in children]
+os.close(release_w)
+for pid, _ in children:
+    os.waitpid(pid, 0)
+print(json.dumps({
+    "master_rss_kb": rollup(os.getpid())["Rss"],
+    "private_kb": sum(w["Private_Clean"] + w["Private_Dirty"] for w in workers) / len(workers),
+    "pss_kb": sum(w["Pss"] for w in workers) / len(workers),
+}))
+'''
+
+
+def _probe(code, *argv):
+    app_dir = os.path.dirname(os.path.abspath(po_app.__file__))
+    out = subprocess.run([sys.executable, '-c', code, *argv], cwd=app_dir, check=True,
+                         capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def bench_startup(args):
+    print(f"{'mode':<8} {'import ms':>9} {'GET / ms':>9} {'RSS MB':>7}  data stack loaded")
+    for mode in ('eager', 'lazy'):
+        runs = [_probe(_COLD_START_PROBE, mode) for _ in range(args.repeat)]
+        best = min(runs, key=lambda r: r['import_ms'])
+        print(f"{mode:<8} {best['import_ms']:>9.1f} {best['get_ms']:>9.1f} {best['rss_kb'] / 1024:>7.1f}  "
+              f"{'yes' if best['data_stack'] else 'no'}")
+    print("eager = import app followed by load_data_stack(), what every worker paid before")
+
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        print("no /proc/<pid>/smaps_rollup here, per-worker memory skipped")
+        return
+    print()
+    print(f"{'mode':<8} {'workers':>7} {'master RSS MB':>13} {'private MB/worker':>17} {'PSS MB/worker':>13}")
+    for mode in ('lazy', 'preload'):
+        result = _probe(_WORKERS_PROBE, mode, str(args.workers))
+        print(f"{mode:<8} {args.workers:>7} {result['master_rss_kb'] / 1024:>13.1f} "
+              f"{result['private_kb'] / 1024:>17.1f} {result['pss_kb'] / 1024:>13.1f}")
+    print("each worker has served the form and built one report before it is measured")
+
+
+def _int_list(value):
+    return [int(v) for v in value.split(',') if v]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    sizes = sub.add_parser('sizes', help='per-token cost of size classification and ordering')
+    sizes.add_argument('--repeat', type=int, default=20000)
+
+    pipeline = sub.add_parser('pipeline', help='per-stage timings on synthetic PO batches')
+    pipeline.add_argument('--batches', type=_int_list, default=[1, 10, 50, 100, 500],
+                          help='comma separated batch sizes (files per batch)')
+    pipeline.add_argument('--pages', type=int, default=3, help='pages per PDF')
+    pipeline.add_argument('--table-pages', type=int, default=1, help='pages carrying colour tables')
+    pipeline.add_argument('--colors', type=int, default=6, help='colours per PO')
+    pipeline.add_argument('--sizes', type=int, default=8, help='size columns per PO')
+    pipeline.add_argument('--multiline', type=float, default=0.3, help='share of multi-line colour names')
+    pipeline.add_argument('--seed', type=int, default=0)
+    pipeline.add_argument('--write', metavar='DIR', help='also write the generated PDFs here')
+    pipeline.add_argument('--no-memory', action='store_true', help='skip the tracemalloc peak-memory pass')
+
+    backends = sub.add_parser('backends', help='speed and accuracy of each text-extraction backend')
+    backends.add_argument('--files', type=int, default=50)
+    backends.add_argument('--backend', action='append', choices=po_app.BACKEND_CHOICES,
+                          help='backend to compare (repeatable, default: all)')
+    backends.add_argument('--pages', type=int, default=3)
+    backends.add_argument('--table-pages', type=int, default=1)
+    backends.add_argument('--colors', type=int, default=6)
+    backends.add_argument('--sizes', type=int, default=8)
+    backends.add_argument('--multiline', type=float, default=0.3)
+    backends.add_argument('--seed', type=int, default=0)
+
+    metadata = sub.add_parser('metadata', help='extract_metadata() on pathological and realistic first pages')
+    metadata.add_argument('--lengths', type=_int_list, default=[500, 1000, 2000, 4000, 8000],
+                          help='comma separated input lengths in characters')
+    metadata.add_argument('--budget', type=float, default=1000.0,
+                          help='stop timing the legacy extractor once one call exceeds this many ms')
+
+    pages = sub.add_parser('pages', help='one large PDF parsed serially and split into page ranges')
+    pages.add_argument('--pages', type=_int_list, default=[10, 25, 50, 100, 200],
+                       help='comma separated page counts')
+    pages.add_argument('--workers', type=_int_list, default=[2, 4], help='comma separated pool sizes')
+    pages.add_argument('--colors', type=int, default=4, help='colours per page')
+    pages.add_argument('--sizes', type=int, default=8)
+    pages.add_argument('--multiline', type=float, default=0.3)
+    pages.add_argument('--seed', type=int, default=0)
+
+    templates = sub.add_parser('templates', help='inline vs precompiled templates, and compressed page sizes')
+    templates.add_argument('--files', type=_int_list, default=[1, 10, 50],
+                           help='comma separated batch sizes for the result page')
+    templates.add_argument('--seed', type=int, default=0)
+
+    startup = sub.add_parser('startup', help='cold import time and per-worker memory, lazy vs preloaded')
+    startup.add_argument('--workers', type=int, default=4, help='forked workers in the memory probe')
+    startup.add_argument('--repeat', type=int, default=3, help='cold starts per mode (best one is shown)')
+
+    args = parser.parse_args()
+    if args.command == 'sizes':
+        bench_sizes(args.repeat)
+    elif args.command == 'pipeline':
+        bench_pipeline(args)
+    elif args.command == 'backends':
+        args.backend = args.backend or list(po_app.BACKEND_CHOICES)
+        bench_backends(args)
+    elif args.command == 'metadata':
+        bench_metadata(args.lengths, args.budget)
+    elif args.command == 'pages':
+        bench_pages(args)
+    elif args.command == 'templates':
+        bench_templates(args)
+    elif args.command == 'startup':
+        bench_startup(args)
+
+
+if __name__ == '__main__':
+    main()
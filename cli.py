@@ -0,0 +1,245 @@
+"""Bulk PO extraction from the command line, without going through HTTP uploads.
+
+    python cli.py archive/ -o po_rows.csv
+    python cli.py archive/ -o po_rows.parquet --workers 8
+    python cli.py archive/ -o report.xlsx --checkpoint nightly.jsonl
+
+Every PDF under the directory is parsed in a process pool. Each finished file is
+appended to a JSONL checkpoint, so re-running the same command after a crash only
+parses the files that are still missing. The checkpoint is removed once the output
+has been written (unless --keep-checkpoint is given).
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import app as po_app
+
+
+OUTPUT_FORMATS = ('csv', 'json', 'parquet', 'xlsx')
+
+
+def find_pdfs(root):
+    found = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if name.lower().endswith('.pdf'):
+                path = os.path.join(dirpath, name)
+                found.append(os.path.relpath(path, root))
+    return found
+
+
+def file_state(path):
+    st = os.stat(path)
+    return st.st_size, int(st.st_mtime)
+
+
+# ==========================================
+#  CHECKPOINT
+# ==========================================
+
+def checkpoint_header(backend):
+    return {'parser_version': po_app.PARSER_VERSION, 'backend': backend}
+
+
+def load_checkpoint(path, backend):
+    # শেষ লাইনটা ক্র্যাশের সময় অর্ধেক লেখা থাকতে পারে, সেটা বাদ
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding='utf-8') as f:
+        lines = f.read().split('\n')
+    try:
+        header = json.loads(lines[0])
+    except ValueError:
+        return done
+    if header != checkpoint_header(backend):
+        print(f"Checkpoint {path} was written by another parser version or backend, starting over.", file=sys.stderr)
+        return done
+    for line in lines[1:]:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        done[record['path']] = record
+    return done
+
+
+class CheckpointWriter:
+    def __init__(self, path, backend, done):
+        # অসম্পূর্ণ শেষ লাইন সহ ফাইলটা পরিষ্কার করে আবার লেখা হয়, তারপর append
+        self.f = open(path + '.tmp', 'w', encoding='utf-8')
+        self.write(checkpoint_header(backend))
+        for record in done.values():
+            self.write(record)
+        self.f.close()
+        os.replace(path + '.tmp', path)
+        self.f = open(path, 'a', encoding='utf-8')
+
+    def write(self, record):
+        self.f.write(json.dumps(record, separators=(',', ':')) + '\n')
+        self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+
+def make_record(rel_path, state, data, meta):
+    return {'path': rel_path, 'state': list(state), 'rows': data.to_payload(), 'meta': meta}
+
+
+# ==========================================
+#  PROGRESS
+# ==========================================
+
+class Progress:
+    def __init__(self, total, enabled, done=0, width=30):
+        self.total = total
+        self.enabled = enabled
+        self.width = width
+        self.done = self.resumed = done
+        self.started = time.perf_counter()
+
+    def step(self, count=1):
+        self.done += count
+        if not self.enabled:
+            return
+        elapsed = time.perf_counter() - self.started
+        rate = (self.done - self.resumed) / elapsed if elapsed > 0 else 0.0
+        eta = (self.total - self.done) / rate if rate else 0.0
+        filled = int(self.width * self.done / self.total) if self.total else self.width
+        bar = '#' * filled + '-' * (self.width - filled)
+        sys.stderr.write(f"\r[{bar}] {self.done}/{self.total} files  {rate:6.1f} files/s  ETA {eta:5.0f}s")
+        sys.stderr.flush()
+
+    def finish(self):
+        if self.enabled:
+            sys.stderr.write('\n')
+
+
+# ==========================================
+#  EXTRACTION
+# ==========================================
+
+def extract_files(root, paths, backend, workers, on_result):
+    # on_result(rel_path, data, meta, stats) প্রতিটি ফাইল শেষ হলেই ডাকা হয়, যাতে সাথে সাথে checkpoint হয়
+    if workers <= 1 or len(paths) <= 1:
+        for rel_path in paths:
+            data, meta, stats = po_app.extract_with_stats(os.path.join(root, rel_path), backend)
+            on_result(rel_path, data, meta, stats)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=po_app.pool_context()) as pool:
+        futures = {
+            pool.submit(po_app.extract_with_stats, os.path.join(root, rel_path), backend): rel_path
+            for rel_path in paths
+        }
+        for future in as_completed(futures):
+            data, meta, stats = future.result()
+            on_result(futures[future], data, meta, stats)
+
+
+def write_output(path, fmt, quantities, meta, colors):
+    tmp_path = path + '.tmp'
+    if fmt == 'xlsx':
+        po_app.write_xlsx_report(tmp_path, quantities, meta, colors)
+    else:
+        chunks = po_app.EXPORT_WRITERS[fmt](quantities, meta, po_app.app.config['EXPORT_CHUNK_ROWS'])
+        if fmt == 'parquet':
+            f = open(tmp_path, 'wb')
+        else:
+            f = open(tmp_path, 'w', encoding='utf-8', newline='')
+        with f:
+            for chunk in chunks:
+                f.write(chunk)
+    os.replace(tmp_path, path)
+
+
+def run(args):
+    root = args.directory
+    paths = find_pdfs(root)
+    checkpoint = args.checkpoint or args.output + '.checkpoint.jsonl'
+
+    done = load_checkpoint(checkpoint, args.backend)
+    states = {rel_path: file_state(os.path.join(root, rel_path)) for rel_path in paths}
+    # ফাইল বদলে গেলে (সাইজ বা mtime) আবার পার্স হবে
+    done = {p: r for p, r in done.items() if p in states and tuple(r['state']) == states[p]}
+    todo = [p for p in paths if p not in done]
+    print(f"{len(paths)} PDF files, {len(done)} already in checkpoint, {len(todo)} to parse", file=sys.stderr)
+
+    writer = CheckpointWriter(checkpoint, args.backend, done)
+    progress = Progress(len(paths), not args.no_progress and sys.stderr.isatty(), len(done))
+    results = {p: (po_app.PORows.from_payload(r['rows']), r['meta']) for p, r in done.items()}
+
+    def on_result(rel_path, data, meta, stats):
+        # পার্স ব্যর্থ ফাইল checkpoint এ যায় না, রিজিউম করলে আবার চেষ্টা হবে
+        if 'error' not in stats:
+            writer.write(make_record(rel_path, states[rel_path], data, meta))
+        results[rel_path] = (data, meta)
+        progress.step()
+
+    started = time.perf_counter()
+    try:
+        extract_files(root, todo, args.backend, args.workers, on_result)
+    finally:
+        writer.close()
+        progress.finish()
+    elapsed = time.perf_counter() - started
+
+    # ফাইলের ক্রম সবসময় path অনুযায়ী, তাই রিজিউম করা রান আর একটানা রানের আউটপুট একই
+    dedupe = po_app.new_dedupe_report()
+    all_data, final_meta = po_app.merge_results([results[p] for p in paths], dedupe)
+    quantities = colors = None
+    if all_data:
+        df = po_app.prepare_frame(all_data)
+        quantities = po_app.consolidate_quantities(df)
+        colors = list(df['Color'].unique())
+    write_output(args.output, args.format, quantities, final_meta, colors)
+
+    if not args.keep_checkpoint:
+        os.remove(checkpoint)
+
+    empty = sum(1 for data, meta in results.values() if not data and meta['buyer'] == 'N/A')
+    rate = len(todo) / elapsed if elapsed > 0 else 0.0
+    print(f"Parsed {len(todo)} files in {elapsed:.1f}s ({rate:.1f} files/s), {len(all_data)} rows, "
+          f"{empty} files without PO tables", file=sys.stderr)
+    message = po_app.dedupe_message(dedupe)
+    if message:
+        print(message, file=sys.stderr)
+    print(f"Wrote {args.output}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('directory', help='directory to search for PDF files (recursively)')
+    parser.add_argument('-o', '--output', required=True, help='output file')
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, help='output format (default: from the output extension)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='parser processes')
+    parser.add_argument('--backend', choices=po_app.BACKEND_CHOICES, default=po_app.app.config['EXTRACT_BACKEND'])
+    parser.add_argument('--checkpoint', help='checkpoint file (default: OUTPUT.checkpoint.jsonl)')
+    parser.add_argument('--keep-checkpoint', action='store_true', help='keep the checkpoint after a successful run')
+    parser.add_argument('--no-progress', action='store_true', help='do not draw the progress bar')
+
+    args = parser.parse_args()
+    if not os.path.isdir(args.directory):
+        parser.error(f"not a directory: {args.directory}")
+    if args.format is None:
+        args.format = os.path.splitext(args.output)[1].lstrip('.').lower()
+        if args.format not in OUTPUT_FORMATS:
+            parser.error('cannot tell the output format from the file name, use --format')
+    if args.format == 'parquet':
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            parser.error('Parquet output needs pyarrow installed')
+    if args.format == 'xlsx' and not po_app.xlsxwriter_available():
+        parser.error('Excel output needs xlsxwriter installed')
+    run(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+"""gunicorn settings, read automatically when gunicorn starts from this directory.
+
+    gunicorn app:app
+    GUNICORN_PRELOAD=1 gunicorn -w 4 app:app
+
+By default every worker imports only Flask and loads pandas/numpy/pypdf on its
+first upload, so workers spawn fast and idle ones stay small. With
+GUNICORN_PRELOAD=1 the master loads the app and the whole data stack once before
+forking, so workers start warm and share those pages copy-on-write. Code changes
+then need a full restart, a HUP does not reload the preloaded app.
+
+Set SECRET_KEY (the same value for every worker) to use batches: the batch
+session cookie has to be readable by any worker. Without it the batch routes
+answer 503 and the plain upload form works as before.
+
+Each worker runs GUNICORN_THREADS threads (gthread), so a worker whose upload is
+parsing or waiting for extraction capacity can still serve the form, job status
+and the other light routes.
+"""
+import gc
+import os
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', '0') == '1'
+# আপলোড পার্স হচ্ছে বা লাইনে অপেক্ষা করছে এমন ওয়ার্কারও বাকি থ্রেড দিয়ে হালকা রিকোয়েস্ট সার্ভ করে
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+    import app
+    seconds = app.load_data_stack()
+    # fork এর আগের অবজেক্টগুলো GC থেকে সরিয়ে রাখা হয়, নাহলে ওয়ার্কারের GC সেগুলো ছুঁয়ে পেজ কপি করে ফেলে
+    gc.freeze()
+    server.log.info("Preloaded the data stack in %.2fs", seconds)
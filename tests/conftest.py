@@ -0,0 +1,61 @@
+import io
+import os
+import random
+import re
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as po_app  # noqa: E402
+import benchmark  # noqa: E402
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    # প্রতিটি টেস্টের নিজস্ব SQLite ফাইল আর সিরিয়াল পার্স, যাতে টেস্টগুলো একে অপরকে না ছোঁয়
+    config = {
+        'TESTING': True,
+        'EXTRACT_WORKERS': 1,
+        'EXTRACT_CACHE_PATH': str(tmp_path / 'extract_cache.sqlite3'),
+        'PO_STORE_PATH': str(tmp_path / 'po_store.sqlite3'),
+        'JOB_STORE_PATH': str(tmp_path / 'jobs.sqlite3'),
+        'BATCH_STORE_PATH': str(tmp_path / 'batches.sqlite3'),
+    }
+    for key, value in config.items():
+        monkeypatch.setitem(po_app.app.config, key, value)
+    monkeypatch.setattr(po_app.app, 'secret_key', 'test-secret')
+    for name in ('_cache', '_store', '_job_store', '_batch_store'):
+        monkeypatch.setattr(po_app, name, None)
+    monkeypatch.setattr(po_app, 'ADMISSION', po_app.Admission())
+    return po_app.app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_po():
+    # (pdf bytes, প্রত্যাশিত রো); একই seed আর ভিন্ন pages দিলে একই ব্লক কিন্তু ভিন্ন বাইটের ফাইল
+    def make(order_no, seed=0, **options):
+        return benchmark.synthetic_po(random.Random(seed), order_no, **options)
+    return make
+
+
+@pytest.fixture
+def upload():
+    def files(*named):
+        return {'pdf_files': [(io.BytesIO(data), name) for name, data in named]}
+    return files
+
+
+def total_of(expected):
+    return sum(row['Quantity'] for row in expected)
+
+
+def grand_total(html):
+    match = re.search(r'grand-total-value">([^<]*)<', html)
+    return int(match.group(1).replace(',', '')) if match else None
@@ -0,0 +1,129 @@
+import io
+import os
+import random
+import runpy
+import threading
+import time
+
+import pytest
+
+import app as po_app
+
+
+class UnreadableBody(io.BytesIO):
+    # ADMISSION.check() বডি পড়ার আগেই ফেরত দিলে এটা কখনো পড়া হয় না
+    def read(self, *args, **kwargs):
+        raise AssertionError("the upload body was read before admission")
+
+    readline = readinto = read
+
+
+@pytest.fixture
+def busy(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'EXTRACT_MAX_PAGES', 10)
+    monkeypatch.setitem(app.config, 'EXTRACT_QUEUE_SIZE', 0)
+    monkeypatch.setitem(app.config, 'RETRY_AFTER_SECONDS', 7)
+    po_app.ADMISSION.pages_in_flight = 10
+    yield
+    po_app.ADMISSION.pages_in_flight = 0
+
+
+@pytest.mark.parametrize('path', ['/', '/api/jobs', '/api/export.csv', '/batch/files', '/?backend=pdfplumber'])
+def test_busy_server_rejects_before_reading_the_upload(client, busy, path):
+    response = client.post(
+        path, input_stream=UnreadableBody(b'x' * 1024), content_length=1024,
+        content_type='multipart/form-data; boundary=x',
+    )
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '7'
+
+
+def test_busy_messages(client, busy):
+    api = client.post('/api/export.csv', data={})
+    assert api.get_json() == {'error': 'Too many uploads are being processed, please retry later.'}
+    page = client.post('/', data={})
+    assert 'The server is busy with other uploads.' in page.get_data(as_text=True)
+    assert client.get('/').status_code == 200
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_full_worker_keeps_a_thread_for_light_requests(app, make_po, upload, monkeypatch):
+    # ডিফল্ট কনফিগেই: gunicorn.conf.py এর থ্রেড সংখ্যা অ্যাপও জানে, আর লাইন থ্রেডের চেয়ে ছোট
+    threads = runpy.run_path(os.path.join(os.path.dirname(po_app.__file__), 'gunicorn.conf.py'))['threads']
+    assert app.config['REQUEST_THREADS'] == threads
+    assert app.config['EXTRACT_QUEUE_SIZE'] < threads - 1
+    monkeypatch.setitem(app.config, 'EXTRACT_MAX_PAGES', 3)
+
+    release = threading.Event()
+    extract = po_app._extract_admitted
+
+    def blocked(*args, **kwargs):
+        release.wait(10)
+        return extract(*args, **kwargs)
+    monkeypatch.setattr(po_app, '_extract_admitted', blocked)
+
+    statuses = []
+
+    def post(seed):
+        pdf, _ = make_po(4500 + seed, seed=seed)
+        statuses.append(app.test_client().post('/', data=upload(('a.pdf', pdf))).status_code)
+
+    # একটা পার্স হচ্ছে, বাকিগুলো লাইনে; সব মিলিয়ে একটা থ্রেড বাকি
+    uploads = [threading.Thread(target=post, args=(seed,)) for seed in range(threads - 1)]
+    for thread in uploads:
+        thread.start()
+    try:
+        wait_for(lambda: po_app.ADMISSION.stats()['waiting'] == threads - 2)
+        assert po_app.ADMISSION.stats()['pages_in_flight'] == 3
+
+        client = app.test_client()
+        started = time.monotonic()
+        response = client.post('/', data=upload(('b.pdf', make_po(4600)[0])))
+        assert response.status_code == 503
+        assert time.monotonic() - started < 1
+        assert client.get('/').status_code == 200
+    finally:
+        release.set()
+        for thread in uploads:
+            thread.join()
+    assert statuses == [200] * (threads - 1)
+    assert po_app.ADMISSION.stats()['uploads'] == 0
+
+
+def test_backend_comes_from_query_or_header(client, make_po, upload):
+    pdf, _ = make_po(4500, seed=1)
+    assert client.post('/?backend=nope', data=upload(('a.pdf', pdf))).status_code == 400
+    assert client.post('/', data=upload(('a.pdf', pdf)), headers={'X-PO-Backend': 'nope'}).status_code == 400
+    # ফর্ম ফিল্ড আর দেখা হয় না
+    data = dict(upload(('a.pdf', pdf)), backend='nope')
+    assert client.post('/', data=data).status_code == 200
+
+
+def test_page_counter_across_chunk_boundaries(make_po):
+    rng = random.Random(0)
+    for pages in (1, 7, 30):
+        pdf, _ = make_po(4500, seed=pages, pages=pages)
+        pdf = pdf.replace(b'/Type /Page', b'/Type\n  /Page')
+        counter = po_app.PageCounter()
+        pos = 0
+        while pos < len(pdf):
+            step = rng.randint(1, 200)
+            counter.feed(pdf[pos:pos + step])
+            pos += step
+        assert counter.close() == pages
+
+
+def test_spooled_upload_is_counted_while_reading(app, tmp_path, make_po, monkeypatch):
+    pdf, _ = make_po(4500, seed=1, pages=12)
+    source = po_app.read_stream('a.pdf', io.BytesIO(pdf), str(tmp_path), spool_max_bytes=1)
+    assert source.path is not None and source.data is None
+    assert source.pages == 12
+
+    monkeypatch.setattr(po_app, 'scan_pages', lambda source: pytest.fail("counted twice"))
+    assert po_app.estimate_pages(source) == 12
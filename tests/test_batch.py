@@ -0,0 +1,81 @@
+import app as po_app
+from conftest import grand_total, total_of
+
+
+def batch_page(client):
+    response = client.get('/batch')
+    assert response.status_code == 200
+    return response.get_data(as_text=True)
+
+
+def batch_files(client):
+    # সেশনের ব্যাচ সরাসরি স্টোর থেকে, যেকোনো ওয়ার্কার যেভাবে পায়
+    with client.session_transaction() as session:
+        batch_id = session['batch_id']
+    return po_app.get_batch_store().load(batch_id).to_dict()['files']
+
+
+def test_batch_add_and_remove(client, make_po, upload):
+    pos = [make_po(4500 + idx, seed=idx) for idx in range(3)]
+
+    response = client.post('/batch/files', data=upload(('a.pdf', pos[0][0]), ('b.pdf', pos[1][0])))
+    assert response.status_code == 303
+    client.post('/batch/files', data=upload(('c.pdf', pos[2][0])))
+    assert grand_total(batch_page(client)) == total_of(pos[0][1] + pos[1][1] + pos[2][1])
+
+    files = batch_files(client)
+    assert [f['name'] for f in files] == ['a.pdf', 'b.pdf', 'c.pdf']
+
+    assert client.post(f"/batch/files/{files[1]['digest']}/remove").status_code == 303
+    assert [f['name'] for f in batch_files(client)] == ['a.pdf', 'c.pdf']
+    assert grand_total(batch_page(client)) == total_of(pos[0][1] + pos[2][1])
+
+    assert client.post('/batch/files/nope/remove').status_code == 404
+
+
+def test_batch_matches_single_upload(client, make_po, upload):
+    pos = [make_po(4500 + idx, seed=idx) for idx in range(3)]
+    full = client.post('/', data=upload(*[(f'{idx}.pdf', pdf) for idx, (pdf, _) in enumerate(pos)]))
+
+    client.post('/batch/files', data=upload(('0.pdf', pos[0][0])))
+    client.post('/batch/files', data=upload(('1.pdf', pos[1][0]), ('2.pdf', pos[2][0])))
+    assert grand_total(batch_page(client)) == grand_total(full.get_data(as_text=True))
+
+
+def test_batch_skips_files_it_already_has(client, make_po, upload):
+    pdf, expected = make_po(4500, seed=1)
+    client.post('/batch/files', data=upload(('a.pdf', pdf)))
+    client.post('/batch/files', data=upload(('again.pdf', pdf)))
+
+    page = batch_page(client)
+    assert 'Skipped 1 duplicate file(s).' in page
+    assert grand_total(page) == total_of(expected)
+    assert len(batch_files(client)) == 1
+
+
+def test_batch_survives_a_new_worker(client, make_po, upload, monkeypatch):
+    pdf, expected = make_po(4500, seed=1)
+    client.post('/batch/files', data=upload(('a.pdf', pdf)))
+
+    monkeypatch.setattr(po_app, '_batch_store', None)
+    assert grand_total(batch_page(client)) == total_of(expected)
+    assert client.get('/batch/export.csv').status_code == 200
+
+
+def test_batch_clear(client, make_po, upload):
+    pdf, _ = make_po(4500, seed=1)
+    client.post('/batch/files', data=upload(('a.pdf', pdf)))
+    assert client.post('/batch/clear').status_code == 303
+    assert 'Add PDF files to start the batch.' in batch_page(client)
+    assert client.get('/batch/export.csv').status_code == 404
+
+
+def test_batch_needs_secret_key(client, make_po, upload, monkeypatch):
+    monkeypatch.setattr(po_app.app, 'secret_key', None)
+    pdf, expected = make_po(4500, seed=1)
+    for response in (client.get('/batch'), client.post('/batch/files', data=upload(('a.pdf', pdf))),
+                     client.post('/batch/clear'), client.get('/batch/export.csv')):
+        assert response.status_code == 503
+        assert 'SECRET_KEY is not set' in response.get_data(as_text=True)
+    # সাধারণ আপলোড ফর্ম কী ছাড়াও চলে
+    assert grand_total(client.post('/', data=upload(('a.pdf', pdf))).get_data(as_text=True)) == total_of(expected)
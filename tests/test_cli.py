@@ -0,0 +1,72 @@
+import csv
+import json
+import sys
+
+import app as po_app
+import cli
+from conftest import total_of
+
+
+def run_cli(monkeypatch, *argv):
+    monkeypatch.setattr(sys, 'argv', ['cli.py', *argv, '--workers', '1', '--no-progress'])
+    cli.main()
+
+
+def csv_total(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return sum(int(row['Quantity']) for row in csv.DictReader(f))
+
+
+def count_extractions(monkeypatch):
+    calls = []
+    extract = po_app.extract_with_stats
+
+    def counting(source, backend='pypdf'):
+        calls.append(source)
+        return extract(source, backend)
+    monkeypatch.setattr(po_app, 'extract_with_stats', counting)
+    return calls
+
+
+def test_cli_writes_deduplicated_csv(app, tmp_path, make_po, monkeypatch):
+    first, first_rows = make_po(4500, seed=1)
+    second, second_rows = make_po(4600, seed=2)
+    (tmp_path / 'in' / 'copies').mkdir(parents=True)
+    (tmp_path / 'in' / 'a.pdf').write_bytes(first)
+    (tmp_path / 'in' / 'b.pdf').write_bytes(second)
+    (tmp_path / 'in' / 'copies' / 'a.pdf').write_bytes(first)
+    output = tmp_path / 'out.csv'
+
+    run_cli(monkeypatch, str(tmp_path / 'in'), '-o', str(output))
+    assert csv_total(output) == total_of(first_rows + second_rows)
+    assert not (tmp_path / 'out.csv.checkpoint.jsonl').exists()
+
+
+def test_cli_resumes_from_checkpoint(app, tmp_path, make_po, monkeypatch):
+    pdfs = [make_po(4500 + idx, seed=idx) for idx in range(3)]
+    (tmp_path / 'in').mkdir()
+    for idx, (pdf, _) in enumerate(pdfs):
+        (tmp_path / 'in' / f'{idx}.pdf').write_bytes(pdf)
+    output = tmp_path / 'out.csv'
+
+    calls = count_extractions(monkeypatch)
+    run_cli(monkeypatch, str(tmp_path / 'in'), '-o', str(output), '--keep-checkpoint')
+    assert len(calls) == 3
+
+    run_cli(monkeypatch, str(tmp_path / 'in'), '-o', str(output), '--keep-checkpoint')
+    assert len(calls) == 3
+    assert csv_total(output) == total_of([row for _, rows in pdfs for row in rows])
+
+
+def test_cli_does_not_checkpoint_failed_files(app, tmp_path, make_po, monkeypatch):
+    pdf, expected = make_po(4500, seed=1)
+    (tmp_path / 'in').mkdir()
+    (tmp_path / 'in' / 'good.pdf').write_bytes(pdf)
+    (tmp_path / 'in' / 'broken.pdf').write_bytes(b'%PDF-1.4 not really a pdf')
+    output = tmp_path / 'out.csv'
+
+    run_cli(monkeypatch, str(tmp_path / 'in'), '-o', str(output), '--keep-checkpoint')
+    with open(str(output) + '.checkpoint.jsonl', encoding='utf-8') as f:
+        paths = [json.loads(line).get('path') for line in f.read().splitlines()[1:]]
+    assert paths == ['good.pdf']
+    assert csv_total(output) == total_of(expected)
@@ -0,0 +1,105 @@
+import csv
+import io
+import time
+
+import app as po_app
+from conftest import grand_total, total_of
+
+
+def wait_for(client, job_id, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = client.get(f'/api/jobs/{job_id}').get_json()
+        if status['status'] in ('done', 'failed'):
+            return status
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_job_lifecycle(client, make_po, upload):
+    first, first_rows = make_po(4500, seed=1)
+    second, second_rows = make_po(4600, seed=2)
+
+    response = client.post('/api/jobs', data=upload(('a.pdf', first), ('b.pdf', second)))
+    assert response.status_code == 202
+    job = response.get_json()
+    assert job['status_url'] == f"/api/jobs/{job['job_id']}"
+
+    status = wait_for(client, job['job_id'])
+    assert status['status'] == 'done'
+    assert status['files_done'] == status['files_total'] == 2
+    assert [f['name'] for f in status['files']] == ['a.pdf', 'b.pdf']
+
+    result = client.get(job['result_url'])
+    assert result.status_code == 200
+    assert grand_total(result.get_data(as_text=True)) == total_of(first_rows + second_rows)
+
+    export = client.get(f"/api/jobs/{job['job_id']}/export.csv")
+    assert export.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(export.get_data(as_text=True))))
+    assert sum(int(row['Quantity']) for row in rows) == total_of(first_rows + second_rows)
+
+
+def test_job_is_visible_to_other_workers(client, make_po, upload, monkeypatch):
+    pdf, expected = make_po(4500, seed=1)
+    job_id = client.post('/api/jobs', data=upload(('a.pdf', pdf))).get_json()['job_id']
+    wait_for(client, job_id)
+
+    # অন্য ওয়ার্কার: একই ফাইলে নতুন JobStore, মেমোরিতে কিছু নেই
+    monkeypatch.setattr(po_app, '_job_store', None)
+    assert client.get(f'/api/jobs/{job_id}').get_json()['status'] == 'done'
+    assert grand_total(client.get(f'/api/jobs/{job_id}/result').get_data(as_text=True)) == total_of(expected)
+
+
+def test_job_skips_duplicate_files(client, make_po, upload):
+    pdf, expected = make_po(4500, seed=1)
+    job_id = client.post('/api/jobs', data=upload(('a.pdf', pdf), ('copy.pdf', pdf))).get_json()['job_id']
+    status = wait_for(client, job_id)
+    assert status['files_total'] == 1
+    assert status['duplicate_files_skipped'] == 1
+    assert grand_total(client.get(f'/api/jobs/{job_id}/result').get_data(as_text=True)) == total_of(expected)
+
+
+def test_unknown_job(client):
+    assert client.get('/api/jobs/nope').status_code == 404
+    assert client.get('/api/jobs/nope/result').status_code == 404
+    assert client.get('/api/jobs/nope/export.csv').status_code == 404
+
+
+def test_job_without_files(client):
+    response = client.post('/api/jobs', data={})
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'No PDF files uploaded.'}
+
+
+def dead_worker_job(store, heartbeat):
+    # ওয়ার্কার মারা গেছে: রো running অবস্থায় থেকে গেছে, heartbeat আর আসে না
+    job = po_app.Job([], None)
+    job.status = 'running'
+    store.save(job)
+    with store._connect() as conn:
+        conn.execute("UPDATE jobs SET pid = 999999, heartbeat = ? WHERE id = ?", (heartbeat, job.id))
+    return job.id
+
+
+def test_job_of_a_dead_worker_fails(client):
+    store = po_app.get_job_store()
+    job_id = dead_worker_job(store, time.time() - po_app.app.config['JOB_STALE_SECONDS'] - 1)
+    alive_id = dead_worker_job(store, time.time())
+
+    status = client.get(f'/api/jobs/{job_id}').get_json()
+    assert status['status'] == 'failed'
+    assert 'pid 999999' in status['error']
+    assert client.get(f'/api/jobs/{job_id}/result').status_code == 500
+    assert store.load(job_id).finished is not None
+    assert client.get(f'/api/jobs/{alive_id}').get_json()['status'] == 'running'
+
+
+def test_purge_drops_unfinished_old_jobs(app):
+    store = po_app.get_job_store()
+    old_id = dead_worker_job(store, time.time() - app.config['JOB_TTL_SECONDS'] - 1)
+    alive_id = dead_worker_job(store, time.time())
+
+    store.purge(time.time() - app.config['JOB_TTL_SECONDS'])
+    assert store.load(old_id) is None
+    assert store.load(alive_id).status == 'running'
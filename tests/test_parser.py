@@ -0,0 +1,27 @@
+import app as po_app
+
+
+def parse(*lines):
+    rows = po_app.PORows()
+    po_app.parse_page_text('\n'.join(('Colo/Size S M Total',) + lines), '4500', rows)
+    return [(row['Color'], row['Size'], row['Quantity']) for row in rows]
+
+
+def test_long_quantities_fit():
+    # EAN এর মতো ১০ অঙ্কের সংখ্যা int32 এ আঁটে না
+    assert parse('NAVY', '3000000000', '2,35', '5', '2,35', 'Total', 'Quantity') == [
+        ('NAVY', 'S', 3000000000), ('NAVY', 'M', 5),
+    ]
+    rows = po_app.PORows()
+    rows.add_block('4500', 'NAVY', ['S'], [3000000000])
+    assert rows.to_frame()['Quantity'].sum() == 3000000000
+    assert list(po_app.PORows.from_payload(rows.to_payload())) == list(rows)
+
+
+def test_out_of_range_block_keeps_the_rest_of_the_page():
+    assert parse(
+        'RED', '1', '2,35', '2', '2,35',
+        'NAVY', '3' * 25, '2,35', '5', '2,35',
+        'BLUE', '7', '2,35', '8', '2,35',
+        'Total', 'Quantity',
+    ) == [('RED', 'S', 1), ('RED', 'M', 2), ('BLUE', 'S', 7), ('BLUE', 'M', 8)]
@@ -0,0 +1,57 @@
+import app as po_app
+from conftest import grand_total, total_of
+
+
+def store_total(client, **filters):
+    response = client.get('/api/store/totals', query_string=filters)
+    assert response.status_code == 200
+    return sum(row['quantity'] for row in response.get_json()['rows'])
+
+
+def test_upload_stores_deduplicated_totals(client, make_po, upload):
+    # একই ব্লক দুটো ভিন্ন বাইটের ফাইলে: রিপোর্টে একবার, স্টোরেও একবার
+    first, expected = make_po(4500, seed=1, pages=3)
+    repeat, _ = make_po(4500, seed=1, pages=4)
+    page = client.post('/', data=upload(('a.pdf', first), ('b.pdf', repeat))).get_data(as_text=True)
+
+    assert 'Merged' in page
+    assert grand_total(page) == total_of(expected)
+    assert store_total(client) == total_of(expected)
+
+
+def test_batch_stores_the_merged_batch(client, make_po, upload):
+    first, first_rows = make_po(4500, seed=1, pages=3)
+    repeat, _ = make_po(4500, seed=1, pages=4)
+    other, other_rows = make_po(4600, seed=2)
+
+    # ব্লকটা একই আপলোডের দুটো ফাইলে
+    client.post('/batch/files', data=upload(('other.pdf', other)))
+    client.post('/batch/files', data=upload(('a.pdf', first), ('b.pdf', repeat)))
+
+    assert grand_total(client.get('/batch').get_data(as_text=True)) == total_of(first_rows + other_rows)
+    assert store_total(client) == total_of(first_rows + other_rows)
+    assert store_total(client, order_no='4500') == total_of(first_rows)
+
+
+def test_batch_add_keeps_colours_of_earlier_adds(client, make_po, upload):
+    # একই PO এর দুটো আলাদা ফাইল দুই ধাপে: দ্বিতীয় ধাপে প্রথম ফাইলের কালার হারায় না
+    first, first_rows = make_po(4500, seed=1, colors=3)
+    second, second_rows = make_po(4500, seed=7, colors=3)
+    client.post('/batch/files', data=upload(('a.pdf', first)))
+    client.post('/batch/files', data=upload(('b.pdf', second)))
+
+    page = client.get('/batch').get_data(as_text=True)
+    order = client.get('/api/store/pos/4500').get_json()
+    assert {row['color'] for row in order['rows']} == {row['Color'] for row in first_rows + second_rows}
+    assert store_total(client) == grand_total(page) == total_of(first_rows + second_rows)
+
+
+def test_store_skips_blank_colours(app):
+    rows = po_app.PORows()
+    rows.add_block('4500', 'NAVY', ['S', 'M'], [10, 20])
+    rows.add_block('4500', '  ', ['S', 'M'], [5, 5])
+    meta = {'buyer': 'N/A', 'booking': 'N/A', 'style': 'N/A', 'season': 'N/A', 'dept': 'N/A', 'item': 'N/A'}
+    po_app.get_store().save(rows, meta)
+
+    order = po_app.get_store().order('4500')
+    assert [(row['color'], row['size'], row['quantity']) for row in order['rows']] == [('NAVY', 'M', 20), ('NAVY', 'S', 10)]
@@ -0,0 +1,71 @@
+import io
+import zipfile
+
+from conftest import grand_total, total_of
+
+
+def make_zip(members):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members:
+            archive.writestr(name, data)
+    return buf.getvalue()
+
+
+def test_zip_matches_plain_upload(client, make_po, upload):
+    first, first_rows = make_po(4500, seed=1)
+    second, second_rows = make_po(4600, seed=2)
+    archive = make_zip([
+        ('pos/a.pdf', first), ('pos/b.pdf', second),
+        ('__MACOSX/pos/._a.pdf', b'junk'), ('pos/readme.txt', b'not a pdf'),
+    ])
+
+    zipped = client.post('/', data=upload(('pos.zip', archive)))
+    plain = client.post('/', data=upload(('a.pdf', first), ('b.pdf', second)))
+    assert zipped.status_code == plain.status_code == 200
+    assert grand_total(zipped.get_data(as_text=True)) == grand_total(plain.get_data(as_text=True))
+    assert grand_total(zipped.get_data(as_text=True)) == total_of(first_rows + second_rows)
+
+
+def test_zip_and_pdf_in_one_upload(client, make_po, upload):
+    first, first_rows = make_po(4500, seed=1)
+    second, second_rows = make_po(4600, seed=2)
+    response = client.post('/', data=upload(('pos.zip', make_zip([('a.pdf', first)])), ('b.pdf', second)))
+    assert grand_total(response.get_data(as_text=True)) == total_of(first_rows + second_rows)
+
+
+def test_zip_with_too_many_members(client, app, make_po, upload, monkeypatch):
+    monkeypatch.setitem(app.config, 'ZIP_MAX_MEMBERS', 2)
+    archive = make_zip([(f'{idx}.pdf', make_po(4500 + idx, seed=idx)[0]) for idx in range(3)])
+
+    response = client.post('/api/export.csv', data=upload(('pos.zip', archive)))
+    assert response.status_code == 413
+    assert response.get_json() == {'error': 'ZIP uploads may contain at most 2 PDF files.'}
+    assert client.post('/', data=upload(('pos.zip', archive))).status_code == 413
+
+
+def test_zip_that_unpacks_too_large(client, app, make_po, upload, monkeypatch):
+    monkeypatch.setitem(app.config, 'ZIP_MAX_BYTES', 1024 * 1024)
+    # zip এ ছোট, খুললে সীমার বেশি
+    archive = make_zip([('a.pdf', make_po(4500, seed=1)[0]), ('padding.pdf', b'0' * (2 * 1024 * 1024))])
+    assert len(archive) < 1024 * 1024
+
+    response = client.post('/api/jobs', data=upload(('pos.zip', archive)))
+    assert response.status_code == 413
+    assert 'at most 1 MB' in response.get_json()['error']
+
+
+def test_invalid_zip(client, upload):
+    response = client.post('/api/export.csv', data=upload(('pos.zip', b'PK\x03\x04 not a zip')))
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'pos.zip is not a valid ZIP archive.'}
+    page = client.post('/', data=upload(('pos.zip', b'not a zip')))
+    assert page.status_code == 400
+    assert 'pos.zip is not a valid ZIP archive.' in page.get_data(as_text=True)
+
+
+def test_zip_in_batch(client, make_po, upload):
+    first, first_rows = make_po(4500, seed=1)
+    second, second_rows = make_po(4600, seed=2)
+    client.post('/batch/files', data=upload(('pos.zip', make_zip([('a.pdf', first), ('b.pdf', second)]))))
+    assert grand_total(client.get('/batch').get_data(as_text=True)) == total_of(first_rows + second_rows)